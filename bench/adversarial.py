@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Worst-case per-line parse time of tetra_monitor on adversarial input.
+
+Builds lines meant to make the parser backtrack: seeded soup of the anchors and
+field names every log family looks for, each anchor repeated up to and past
+TETRA_LINE_MAX, long runs of digits / blanks / brackets / colons, multi-line
+records that never close, and oversized lines. Every line is timed on its own
+through process_line, and the run exits 1 when any family's p99.9 is over
+--budget-ms. Like micro.py the numbers are machine-specific; the point is the
+order of magnitude (a quadratic pattern shows up as tens of ms to seconds).
+
+    python bench/adversarial.py                   # default budget, 3000 soup lines
+    python bench/adversarial.py --budget-ms 2 --lines 20000 --seed 7
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tetra_monitor  # noqa: E402
+
+# Anchors and field names of the parser's patterns, plus separators.
+FRAGMENTS = [
+    "GROUP_TX ", "src=", "dst=", "call from ISSI ", "to GSSI ", "issi: ", "issi=", "ssi: ", "ssi_type: Ssi",
+    "energy_saving_mode: ", "Eg1", "StayAlive", "MsRssiUpdate { issi: ", "rssi_dbfs: ",
+    "D-SDS-DATA DSdsData {", "calling_party_address_ssi: Some(", "user_defined_data: Type4(", "<- USdsData {",
+    "CmceSdsData { source_issi: ", "SDS: U-SDS-DATA from ISSI ", "SDS: LIP ", "LIP report ", "from ISSI ",
+    "lat=", "lon=", "speed=", "heading=", "LipPdu {", "LocationReport {", "latitude: ", "longitude: ",
+    "source_issi: ", "source: ", "source=", "location ", "gps ", "lip ", "position:", "voice frame #", "ts=",
+    "uuid=", "subscriber deaffiliate issi=", "BrewEntity: deaffiliate issi=", "groups=[", "subscriber affiliate issi=",
+    "affiliated to groups [", "DRelease {", "D-Release ", "call_identifier: ", "<- U-DISCONNECT UDisconnect {",
+    "received_address: TetraAddress {", "GroupIdentityUplink {", "gssi: Some(", "ts_assigned: [", "true, ",
+    "BrewEntity: SDS transfer uuid=", "BrewEntity: sending SDS uuid=", "SDS: U-STATUS from ISSI ", "status=",
+    "MS 2145007 energy saving mode change response: ", "rx_u_setup_p2p: call from ISSI ", "-> call_id=",
+    "[", "]", "(", ")", "{", "}", ", ", ": ", " ", "    ", "\t",
+]
+NUMBERS = ["1", "12", "2145007", "91", "40.4168", "-3.7038", "12345", "0", "1.5", "+2", "255"]
+
+
+def soup(r, length):
+    parts, n = [], 0
+    while n < length:
+        part = r.choice(FRAGMENTS) if r.random() < 0.6 else r.choice(NUMBERS)
+        parts.append(part)
+        n += len(part)
+    return "".join(parts)
+
+
+def families(seed, lines):
+    r = random.Random(seed)
+    cap = tetra_monitor.LINE_MAX
+    gen = tetra_monitor.TrafficGenerator(200, seed=seed)
+    yield "normal", [msg for _, msg in zip(range(lines), (m for _, m in gen.lines(500, start=0.0)))]
+    yield "soup", [soup(r, r.randint(1, 2 * cap)) for _ in range(lines)]
+    repeat = []
+    for frag in FRAGMENTS:
+        for length in (cap, 4 * cap):
+            repeat.append((frag + r.choice(NUMBERS) + " ") * (length // (len(frag) + 3)))
+    yield "repeat", repeat
+    runs = []
+    for head in ("SDS: LIP ", "LipPdu { issi: ", "call from ISSI ", "issi: 1 ", "groups=[", "user_defined_data: Type4(1, [", ""):
+        for run in ("1", " ", "[", "{", "(", ":", ", ", "1 "):
+            runs.append(head + run * (cap // len(run)))
+    yield "runs", runs
+    # Records that open and keep going: each continuation line is timed, and the
+    # one that cuts the record (size, line count or a line from elsewhere) pays
+    # for parsing it.
+    records = []
+    for _ in range(max(1, lines // 500)):
+        records.append("-> D-SDS-DATA DSdsData {")
+        records.extend("    " + soup(r, r.randint(10, 200)) + "," for _ in range(r.randint(50, 400)))
+    records.append("done")
+    yield "records", records
+    yield "oversize", [soup(r, 64 * 1024) for _ in range(20)] + ["GROUP_TX " * (64 * 1024 // 9)] * 5
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--budget-ms", type=float, default=5.0, help="p99.9 per line, every family")
+    ap.add_argument("--lines", type=int, default=3000, help="lines of the generated families")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    tetra_monitor.HAS_REQUESTS = False
+    tetra_monitor.emit = lambda event_type, payload, urgent=False: None
+    hub = tetra_monitor.StationHub([None])
+    mon = hub.primary
+    t0 = 1_760_000_000_000_000
+
+    def timed(msgs):
+        out = []
+        for i, msg in enumerate(msgs):
+            line = json.dumps({"MESSAGE": msg, "__REALTIME_TIMESTAMP": str(t0 + i), "_PID": "1"})
+            start = time.perf_counter()
+            mon.process_line(line)
+            out.append(time.perf_counter() - start)
+        return out
+
+    timed(["warm up " + f for f in FRAGMENTS] * 3)  # compile every pattern once
+    print(f"LINE_MAX {tetra_monitor.LINE_MAX}, budget p99.9 <= {args.budget_ms} ms")
+    print(f"{'family':10s} {'lines':>6s} {'p50 ms':>8s} {'p99 ms':>8s} {'p99.9 ms':>9s} {'max ms':>8s}")
+    over = []
+    gc.disable()
+    try:
+        for name, msgs in families(args.seed, args.lines):
+            t = sorted(timed(msgs))
+            p999 = percentile(t, 0.999) * 1000
+            print(f"{name:10s} {len(t):6d} {percentile(t, 0.5) * 1000:8.3f} {percentile(t, 0.99) * 1000:8.3f}"
+                  f" {p999:9.3f} {t[-1] * 1000:8.3f}")
+            if p999 > args.budget_ms:
+                over.append(name)
+    finally:
+        gc.enable()
+    c = tetra_monitor.counters
+    print(f"{c.lines_truncated} messages truncated, {c.records_joined} records joined, {c.records_cut} cut")
+    if over:
+        print("over budget: " + ", ".join(over))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
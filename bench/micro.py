@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for tetra_monitor: one scenario per log family, the SDS/LIP
+decoders, _terminal_to_dict and emit, at 10 / 1k / 10k terminals.
+
+Every timing run of a scenario is paired with a run of a fixed reference
+workload (JSON decode, a regex, a dict build, JSON encode), and the scenario's
+result is the median of its cost over the reference's across those pairs, next
+to its best-of-N ns per line (or per call) for reading. A shared VM that
+changes speed by 2x from one second to the next moves both halves of a pair
+together, so the ratio stays put where the raw ns do not. The monitor runs on
+a simulated clock that advances 100 ms per line, so time-windowed state (SDS
+correlation, record timeouts) is the same however fast the host is.
+
+--save records a baseline from --runs separate processes: per scenario the
+median ratio and its spread, (max - min) / median. A comparison run exits 1
+when a scenario is still slower than its baseline by more than --threshold
+and by more than twice the recorded spread after two re-measurements.
+Baselines are machine-specific: record them on the machine you compare on.
+
+    python bench/micro.py                     # compare against the baseline
+    python bench/micro.py --save              # write a new baseline (5 runs)
+    python bench/micro.py -k sds --sizes 1000 # subset
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tetra_monitor  # noqa: E402
+
+BASELINE = os.path.join(ROOT, "bench", "baselines", "micro.json")
+SIZES = (10, 1000, 10000)
+LOCAL = "2145001"
+PEER = "2145002"
+TGS = ["91", "262", "2621", "1", "10", "214", "2140", "9"]
+
+# LIP short report for Madrid (0x0A + 9 bytes), an ISO-8859-1 text SDS behind a
+# 2-byte SDS-TL header, "QRV on TG 214 from 21:00" 7-bit packed, and a binary
+# payload that walks every decoder fallback before giving up.
+LIP_BYTES = [10, 15, 213, 219, 233, 203, 218, 122, 24, 128]
+TEXT_BYTES = [130, 4] + list(b"Net at 21:00 on TG 214, all welcome")
+GSM7_BYTES = [81, 169, 21, 244, 118, 131, 168, 71, 144, 44, 70, 3, 153, 229, 239, 54, 72, 22, 211, 193, 96]
+BINARY_BYTES = [1, 0, 2, 3, 0, 4, 5, 0, 6, 7, 0, 8, 9, 0, 11, 12, 0, 14, 15, 0]
+
+
+def gsm_block(gssi, detach=False):
+    det = "Some(Detach)" if detach else "None"
+    return (f"GroupIdentityUplink {{ class_of_usage: Some(4), group_identity_detachment_uplink: {det}, "
+            f"gssi: Some({gssi}), address_extension: None, vgssi: None }}")
+
+
+def byte_list(data):
+    return ", ".join(str(b) for b in data)
+
+
+# Each scenario is a cycle of messages replayed in order; {n} is the cycle number
+# so ids and uuids stay unique, {x} an existing External terminal.
+SCENARIOS = {
+    "rssi": [
+        "MsRssiUpdate { issi: {x}, rssi_dbfs: -42.5 }",
+    ],
+    "group_tx": [
+        "BrewWorker: GROUP_TX uuid=g{n} src={x} dst=91",
+        "BrewEntity: GROUP_IDLE gssi=91",
+    ],
+    "p2p_setup": [
+        f"CMCE: rx_u_setup_p2p: call from ISSI {LOCAL} to ISSI {PEER} -> call_id={{n}}",
+        "<- U-DISCONNECT UDisconnect { call_identifier: {n}, disconnect_cause: 1 }",
+    ],
+    "brew_circuit": [
+        f"CMCE: accepting Brew setup request uuid=c{{n}} call_id={{n}} src={{x}} dst={LOCAL} duplex=true",
+        "BrewEntity: CIRCUIT CALL RELEASE uuid=c{n} cause=0",
+    ],
+    "voice_frame": [
+        "BrewEntity: voice frame #{n} uuid=v1 len=36 bytes ts=2",
+    ],
+    "location_update": [
+        "mm_bs.rs:481: rx_prim: SapMsg { sap: LmmSap, src: Mle, dest: Mm, msg: LmmMleUnitdataInd("
+        f"LmmMleUnitdataInd {{ handle: 4, received_address: TetraAddress {{ ssi: {LOCAL}, ssi_type: Ssi, "
+        "encrypted: false } }) }",
+        "mm_bs.rs:76: <- ULocationUpdateDemand { location_update_type: ItsiAttach, ssi: None, "
+        "group_identity_location_demand: Some(GroupIdentityLocationDemand { group_identity_attach_detach_mode: 1, "
+        "group_identity_uplink: Some([" + ", ".join(gsm_block(g) for g in range(9, 33)) + "]) }), proprietary: None }",
+    ],
+    "sds_usds": [
+        f"<- USdsData {{ area_selection: 0, user_defined_data: Type4({len(TEXT_BYTES) * 8}, [{byte_list(TEXT_BYTES)}]) }}",
+        f"SDS: U-SDS-DATA from ISSI {LOCAL} to ISSI {PEER}",
+    ],
+    "sds_cmce": [
+        f"CmceSdsData(CmceSdsData {{ source_issi: {LOCAL}, dest_issi: {PEER}, "
+        f"user_defined_data: Type4({len(LIP_BYTES) * 8}, [{byte_list(LIP_BYTES)}]) }})",
+    ],
+    "sds_dsds": [
+        f"-> D-SDS-DATA DSdsData {{ calling_party_address_ssi: Some({{x}}), called_party_ssi: {LOCAL}, "
+        f"user_defined_data: Type4({len(TEXT_BYTES) * 8}, [{byte_list(TEXT_BYTES)}]) }}",
+    ],
+    "sds_brew": [
+        f"BrewEntity: sending SDS uuid=o{{n}} src={LOCAL} dst={{x}} type=4 296 bits",
+        f"BrewEntity: SDS transfer uuid=i{{n}} src={{x}} dst={LOCAL} 37 bytes",
+        "BrewEntity: SDS_REPORT uuid=r{n} status=0 -> Brew",
+    ],
+    "sds_short_transfer": [
+        f"BrewWorker: SHORT_TRANSFER uuid=s{{n}} src={{x}} dst={LOCAL}",
+    ],
+    "sds_status": [
+        f"SDS: U-STATUS from ISSI {LOCAL} to ISSI {{x}}, status=32768",
+    ],
+    "lip_sds_text": [
+        f"SDS: LIP from ISSI {LOCAL}: lat=40.4168 lon=-3.7038 speed=12 heading=90",
+    ],
+    "lip_lippdu": [
+        f"LipPdu {{ issi: {LOCAL}, latitude: 40.4168, longitude: -3.7038, speed: 12, heading: 90 }}",
+    ],
+    "lip_location": [
+        f"LocationReport {{ source: {LOCAL}, latitude: 40.4168, longitude: -3.7038 }}",
+    ],
+    "lip_generic": [
+        f"gps position from: {LOCAL}, lat=40.4168, lon=-3.7038, speed=12",
+    ],
+    "noise": [
+        "DEBUG [phy] burst decoded: slot=2 frame=14 multiframe=33 crc_ok=true",
+        "TRACE [umac] MAC-RESOURCE fill bits=17 length_indication=12 encryption_mode=0",
+        "DEBUG [llc] BL-DATA ns=1 nr=0 fcs_ok=true len=88",
+    ],
+}
+
+FUNCTIONS = {
+    "decode_lip_pdu": (tetra_monitor._try_decode_lip_pdu_bytes, LIP_BYTES),
+    "decode_sds_text": (tetra_monitor._try_decode_sds_text, TEXT_BYTES),
+    "decode_sds_binary": (tetra_monitor._try_decode_sds_text, BINARY_BYTES),
+    "unpack_gsm7": (tetra_monitor._unpack_gsm7, bytes(GSM7_BYTES)),
+}
+
+
+def make_monitor(size):
+    """A primary monitor holding `size` terminals: one in ten local, the rest External."""
+    hub = tetra_monitor.StationHub([None])
+    mon = hub.primary
+    now = time.time()
+    for i in range(size):
+        issi = str(2145000 + i) if i % 10 == 0 or i < 2 else str(3000000 + i)
+        local = issi.startswith("2145")
+        mon.terminals[issi] = {
+            "selected": "TG 91",
+            "groups": ["91", "214", "2140"] if local else [TGS[i % len(TGS)]],
+            "status": "Online" if local else "External",
+            "is_local": local,
+            "last_seen": "12:00:00",
+            "activity": None,
+            "activity_tg": None,
+        }
+        mon.callsign_cache[issi] = f"EA{i % 10}XYZ"
+        mon.seen_at[issi] = now
+    for issi in (LOCAL, PEER):
+        mon.terminals.setdefault(issi, dict(mon.terminals[next(iter(mon.terminals))], is_local=True, status="Online"))
+        mon.callsign_cache.setdefault(issi, "")
+    return hub, mon
+
+
+class SimClock:
+    """Stands in for the time module inside tetra_monitor; bench loops call step() per line."""
+
+    def __init__(self, now=1_760_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def step(self, seconds=0.1):
+        self.now += seconds
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+CLOCK = SimClock()
+
+REF_RE = re.compile(r"src=(\d+)\s+dst=(\d+)")
+REF_LINES = [json.dumps({"MESSAGE": f"BrewWorker: GROUP_TX uuid=r{i} src={3000000 + i} dst={91 + i % 7}",
+                         "__REALTIME_TIMESTAMP": str(1_760_000_000_000_000 + i)}) for i in range(64)]
+
+
+def reference_work():
+    """The yardstick every timing run is paired with: the same kind of work as a monitor line."""
+    table = {}
+    for line in REF_LINES:
+        record = json.loads(line)
+        m = REF_RE.search(record["MESSAGE"])
+        if m:
+            src, dst = m.groups()
+            table[src] = {"id": src, "selected": f"TG {dst}", "groups": [dst]}
+    return json.dumps(table)
+
+
+def make_reference(budget):
+    """A timing run of the reference sized to about half of budget; returns ns per pass."""
+    start = time.perf_counter()
+    for _ in range(20):
+        reference_work()
+    count = max(1, int(budget / 2 / max((time.perf_counter() - start) / 20, 1e-9)))
+
+    def once():
+        start = time.perf_counter_ns()
+        for _ in range(count):
+            reference_work()
+        return (time.perf_counter_ns() - start) / count
+    return once
+
+
+def journal_cycle(template, size, count):
+    externals = [str(3000000 + i) for i in range(size) if i % 10 and i >= 2] or [PEER]
+    lines = []
+    t0 = 1_760_000_000_000_000
+    for n in range(count):
+        x = externals[n % len(externals)]
+        for msg in template:
+            lines.append(json.dumps({"MESSAGE": msg.replace("{n}", str(n)).replace("{x}", x),
+                                     "__REALTIME_TIMESTAMP": str(t0 + len(lines) * 1000)}))
+    return lines
+
+
+def measure(args, fn, max_seconds=1.0):
+    """
+    Up to args.repeat timing runs (at least 3, about max_seconds in all) with
+    the collector off, each right after a reference run. Returns (best ns,
+    median of ns / reference ns).
+    """
+    ref = args.reference
+    pairs = []
+    gc.collect()
+    gc.disable()
+    started = time.perf_counter()
+    try:
+        for i in range(args.repeat):
+            base = ref()
+            pairs.append((fn(), base))
+            if i >= 2 and time.perf_counter() - started > max_seconds:
+                break
+    finally:
+        gc.enable()
+    return min(ns for ns, _ in pairs), statistics.median(ns / base for ns, base in pairs)
+
+
+def bench_lines(name, size, args):
+    hub, mon = make_monitor(size)
+    per_cycle = len(SCENARIOS[name])
+    lines = journal_cycle(SCENARIOS[name], size, args.cycles)
+    # Warm caches and first-time branches, and size the run so one timing pass
+    # takes about --budget seconds (a call on a 10k table costs ~100 ms a line).
+    start = time.perf_counter()
+    for line in lines[: per_cycle * 5]:
+        CLOCK.step()
+        mon.process_line(line)
+    cycles = int(args.budget / max((time.perf_counter() - start) / 5, 1e-9))
+    lines = lines[: per_cycle * max(5, min(args.cycles, cycles))]
+
+    def once():
+        step, process = CLOCK.step, mon.process_line
+        start = time.perf_counter_ns()
+        for line in lines:
+            step()
+            process(line)
+        return (time.perf_counter_ns() - start) / len(lines)
+
+    return measure(args, once)
+
+
+def bench_call(fn, arg, args):
+    start = time.perf_counter()
+    for _ in range(100):
+        fn(arg)
+    count = max(100, int(args.budget / max((time.perf_counter() - start) / 100, 1e-9)))
+
+    def once():
+        start = time.perf_counter_ns()
+        for _ in range(count):
+            fn(arg)
+        return (time.perf_counter_ns() - start) / count
+    return measure(args, once)
+
+
+def scenarios(args):
+    """key -> zero-argument callable returning (ns per line/call, ratio to the reference)."""
+    jobs = {}
+    sizes = args.sizes or SIZES
+    for name in SCENARIOS:
+        for size in sizes:
+            jobs[f"line/{name}@{size}"] = lambda name=name, size=size: bench_lines(name, size, args)
+    for name, (fn, arg) in FUNCTIONS.items():
+        jobs[f"fn/{name}"] = lambda fn=fn, arg=arg: bench_call(fn, arg, args)
+    for size in sizes:
+        jobs[f"fn/terminal_to_dict@{size}"] = lambda size=size: bench_call(
+            make_monitor(size)[1]._terminal_to_dict, LOCAL, args)
+    payload = make_monitor(10)[1]._terminal_to_dict(LOCAL)
+    jobs["fn/emit"] = lambda: bench_call(
+        lambda p: tetra_monitor.emit("update_terminal", p), payload, args)
+    return {key: job for key, job in jobs.items() if not args.k or re.search(args.k, key)}
+
+
+def report(key, result, out):
+    ns, ratio = result
+    print(f"  {key:<36} {ns:>10.0f} ns {ratio:>9.3f} x ref", file=out, flush=True)
+
+
+def machine():
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "processor": platform.processor() or platform.machine(), "node": platform.node()}
+
+
+def record(args):
+    """Run the scenarios in --runs fresh processes; key -> {ratio, spread, ns} over the runs."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--json", "--cycles", str(args.cycles),
+           "--budget", str(args.budget), "--repeat", str(args.repeat)]
+    if args.k:
+        cmd += ["-k", args.k]
+    if args.sizes:
+        cmd += ["--sizes", ",".join(map(str, args.sizes))]
+    runs = []
+    for i in range(args.runs):
+        print(f"run {i + 1}/{args.runs}", flush=True)
+        runs.append(json.loads(subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout))
+    results = {}
+    for key in runs[0]:
+        ratios = [run[key][1] for run in runs]
+        mid = statistics.median(ratios)
+        results[key] = {"ratio": round(mid, 4), "spread": round((max(ratios) - min(ratios)) / mid, 3),
+                        "ns": round(statistics.median(run[key][0] for run in runs))}
+    return results
+
+
+def limit(base, threshold):
+    """Slowest ratio still within the baseline: beyond both the threshold and twice its spread fails."""
+    return base["ratio"] * (1 + max(threshold, 2 * base["spread"]))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("-k", help="only run scenarios whose key matches this regex")
+    ap.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], help="table sizes, e.g. 10,1000")
+    ap.add_argument("--cycles", type=int, default=500, help="max scenario cycles per timing run")
+    ap.add_argument("--budget", type=float, default=0.02, help="target seconds per timing run")
+    ap.add_argument("--repeat", type=int, default=25, help="timing runs per scenario")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    ap.add_argument("--runs", type=int, default=5, help="processes a --save baseline is recorded from")
+    ap.add_argument("--json", action="store_true", help="print key -> [ns, ratio] as JSON (used by --save)")
+    args = ap.parse_args()
+
+    if args.save:
+        results = record(args)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        old = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                old = {k: v for k, v in json.load(f).get("results", {}).items() if isinstance(v, dict)}
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine(), "results": {**old, **results}}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        for key, base in results.items():
+            print(f"  {key:<36} {base['ns']:>10} ns {base['ratio']:>9.3f} x ref  spread {base['spread']:.0%}")
+        print(f"baseline written to {os.path.relpath(args.baseline)}")
+        return
+
+    tetra_monitor.HAS_REQUESTS = False  # callsigns come from the prefilled cache
+    tetra_monitor.time = CLOCK
+    args.reference = make_reference(args.budget)
+    baseline = None
+    if not args.json:
+        if not os.path.exists(args.baseline):
+            print("no baseline yet; run with --save first")
+            return
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != machine():
+            print(f"warning: baseline was recorded on {baseline.get('machine')}, numbers may not compare")
+
+    jobs = scenarios(args)
+    out = sys.__stderr__ if args.json else sys.__stdout__
+    # emit() writes JSON lines to stdout as in production; send them to a null sink.
+    sys.stdout = io.TextIOWrapper(open(os.devnull, "wb"), write_through=False)
+    try:
+        results = {}
+        for key, job in jobs.items():
+            results[key] = job()
+            report(key, results[key], out)
+        regressions = []
+        if baseline:
+            # A slow scenario is measured twice more (lowest ratio counts)
+            # before it counts as a regression.
+            for key in results:
+                base = baseline["results"].get(key)
+                if not isinstance(base, dict):
+                    print(f"  {key}: no baseline, re-record with --save", file=out)
+                    continue
+                for _ in range(2):
+                    if results[key][1] <= limit(base, args.threshold):
+                        break
+                    results[key] = min(results[key], jobs[key](), key=lambda r: r[1])
+                if results[key][1] > limit(base, args.threshold):
+                    regressions.append((key, base, results[key][1]))
+    finally:
+        sys.stdout.flush()
+        sys.stdout = sys.__stdout__
+
+    if args.json:
+        print(json.dumps(results))
+        return
+    for key, base, ratio in regressions:
+        print(f"REGRESSION {key}: {base['ratio']:.3f} -> {ratio:.3f} x ref (+{(ratio / base['ratio'] - 1):.0%}, "
+              f"allowed +{max(args.threshold, 2 * base['spread']):.0%})")
+    if regressions:
+        sys.exit(1)
+    print(f"{len(results)} scenarios within {args.threshold:.0%} (or their recorded spread) of the baseline")
+
+
+if __name__ == "__main__":
+    main()
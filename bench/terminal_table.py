@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Terminal table growth over a simulated month of network traffic.
+
+A BrandMeister-style network: a few thousand new ISSIs show up every day,
+talkers are drawn Zipf-like from everyone heard so far, one group call every
+--call-interval seconds (GROUP_TX ... GROUP_IDLE), plus a handful of local
+radios re-registering every hour. The monitor runs on a simulated clock, once
+with the default TETRA_MAX_TERMINALS / TETRA_EXTERNAL_TTL policy and once
+unbounded, and the table size, memory held by the monitor, full_state size and
+processing cost are printed per day checkpoint.
+
+    python bench/terminal_table.py [--days 30] [--call-interval 30]
+"""
+import argparse
+from collections import deque
+import json
+import os
+import random
+import sys
+import time as real_time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tetra_monitor  # noqa: E402
+
+DAY = 86400
+START = 1_760_000_000
+LOCALS = [str(2145000 + i) for i in range(20)]
+TGS = ["91", "262", "2621", "1", "10", "214", "2140", "9"]
+
+
+class SimClock:
+    """Stands in for the time module inside tetra_monitor."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(real_time, name)
+
+
+def traffic(days, call_interval, new_per_day, seed=1):
+    """Yield (ts, message) in time order."""
+    rng = random.Random(seed)
+    heard = []
+    next_issi = 3_000_000
+    events = []
+    for day in range(days):
+        for _ in range(new_per_day):
+            heard.append(str(next_issi))
+            next_issi += rng.randint(1, 7)
+        day_start = START + day * DAY
+        for hour in range(24):
+            for issi in LOCALS:
+                events.append((day_start + hour * 3600 + rng.random() * 60,
+                               f"ULocationUpdateDemand {{ location_update_type: PeriodicLocationUpdating, "
+                               f"received_address: TetraAddress {{ ssi: {issi}, ssi_type: Ssi }} }}"))
+        t = day_start
+        while t < day_start + DAY:
+            # Zipf-ish regulars plus a long tail of one-off talkers from
+            # everyone heard so far.
+            r = rng.random()
+            if r < 0.03:
+                src = rng.choice(LOCALS)
+            elif r < 0.3:
+                src = rng.choice(heard)
+            else:
+                src = heard[min(len(heard), int(rng.paretovariate(1.0))) - 1]
+            tg = rng.choice(TGS)
+            events.append((t, f"GROUP_TX src={src} dst={tg}"))
+            events.append((t + rng.uniform(3, 20), f"GROUP_IDLE gssi={tg}"))
+            t += rng.expovariate(1 / call_interval)
+        events.sort()
+        yield from events
+        events = []
+
+
+def deep_size(obj, seen):
+    """Bytes held by obj and everything reachable from it that is not yet in seen."""
+    if id(obj) in seen or isinstance(obj, type) or callable(obj) and not isinstance(obj, (dict, list)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_size(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def run(args, bounded):
+    tetra_monitor.MAX_TERMINALS = args.max_terminals if bounded else 0
+    tetra_monitor.EXTERNAL_TTL = args.ttl if bounded else 0
+    clock = SimClock(START)
+    tetra_monitor.time = clock
+    emitted = {"removed": 0}
+
+    def sink(event_type, payload, urgent=False):
+        if event_type == "remove_terminal":
+            emitted["removed"] += 1
+
+    tetra_monitor.emit = sink
+    hub = tetra_monitor.StationHub([None])
+    mon = hub.primary
+    for issi in LOCALS:
+        mon.callsign_cache[issi] = ""
+
+    rows = []
+    checkpoints = {1, 7, 14, 30, args.days}
+    day, lines, cpu = 0, 0, 0.0
+
+    def checkpoint():
+        full = json.dumps({tid: mon._terminal_to_dict(tid) for tid in mon.terminals})
+        rows.append((day, len(mon.terminals), deep_size(mon, set()), len(full),
+                     cpu / max(lines, 1) * 1e6, emitted["removed"]))
+
+    for ts, msg in traffic(args.days, args.call_interval, args.new_per_day):
+        while ts >= START + (day + 1) * DAY:
+            day += 1
+            if day in checkpoints:
+                checkpoint()
+                lines, cpu = 0, 0.0
+        clock.now = ts
+        started = real_time.perf_counter()
+        mon.process_line({"MESSAGE": msg, "__REALTIME_TIMESTAMP": int(ts * 1e6)})
+        mon.expire(ts)
+        cpu += real_time.perf_counter() - started
+        lines += 1
+    day = args.days
+    if not rows or rows[-1][0] != day:
+        checkpoint()
+    tetra_monitor.time = real_time
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--call-interval", type=float, default=30.0, help="mean seconds between group calls")
+    ap.add_argument("--new-per-day", type=int, default=3000, help="new ISSIs appearing on the network per day")
+    ap.add_argument("--max-terminals", type=int, default=tetra_monitor.MAX_TERMINALS)
+    ap.add_argument("--ttl", type=float, default=tetra_monitor.EXTERNAL_TTL)
+    args = ap.parse_args()
+    tetra_monitor.HAS_REQUESTS = False
+
+    for bounded in (True, False):
+        label = (f"bounded (max {args.max_terminals}, ttl {args.ttl:.0f}s)" if bounded else "unbounded")
+        print(label)
+        print(f"  {'day':>4} {'terminals':>10} {'state':>10} {'full_state':>11} {'us/line':>8} {'evicted':>8}")
+        for day, n, heap, full, us, removed in run(args, bounded):
+            print(f"  {day:>4} {n:>10} {heap / 1e6:>8.1f}MB {full / 1e3:>9.0f}kB {us:>8.1f} {removed:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Synthetic bluestation/flowstation traffic from tetra_monitor.TrafficGenerator.
+
+Either write a capture file (journal-export JSON, one entry per line, the
+format `journalctl -o json` prints) or feed the lines straight into a
+monitor's process_line as fast as it takes them and report throughput. The
+same seed, terminal count, rate and mix always give the same lines.
+
+    python bench/traffic.py --terminals 500 --rate 2000 --seconds 600 -o net500.jsonl
+    python bench/traffic.py --terminals 500 --rate 2000 --seconds 60      # in-process
+    python bench/traffic.py --input net500.jsonl                          # replay a capture
+    python bench/traffic.py --input /var/lib/tetra/capture/capture-main-*.jsonl.gz
+
+A capture can also be played into a running monitor through a FIFO source
+(TETRA_SOURCES=bs=fifo:/tmp/tetra.fifo, then cat net500.jsonl > /tmp/tetra.fifo).
+For a live dashboard fed in real time use TETRA_GENERATE=1 instead. Captures
+taken in the field by the monitor's TETRA_CAPTURE_DIR tap replay the same way.
+"""
+import argparse
+import collections
+import gzip
+import itertools
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tetra_monitor  # noqa: E402
+
+START = 1_760_000_000.0
+
+
+def generated(args):
+    gen = tetra_monitor.TrafficGenerator(args.terminals, seed=args.seed,
+                                         mix=tetra_monitor.parse_gen_mix(args.mix))
+    count = int(args.rate * args.seconds)
+    stream = itertools.islice(gen.lines(args.rate, start=START), count)
+    return gen, (gen.journal(ts, msg, seq) for seq, (ts, msg) in enumerate(stream, 1))
+
+
+def read_captures(paths):
+    """Lines of each capture in turn; a .gz still being written ends at its last flush."""
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        yield line
+            except (EOFError, gzip.BadGzipFile):
+                pass
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--terminals", type=int, default=500)
+    ap.add_argument("--rate", type=float, default=500, help="lines per second of log time")
+    ap.add_argument("--seconds", type=float, default=60, help="log time to generate")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--mix", default="", help='weights to override, e.g. "group=20,noise=40"')
+    ap.add_argument("-o", "--out", help="write a capture file instead of processing")
+    ap.add_argument("--input", nargs="+", help="replay these capture files (.jsonl or .jsonl.gz, in order) instead of generating")
+    args = ap.parse_args()
+
+    if args.out:
+        _, lines = generated(args)
+        n = 0
+        with open(args.out, "w") as f:
+            for n, line in enumerate(lines, 1):
+                f.write(line + "\n")
+        print(f"{n} lines, {args.seconds:.0f} s of log time -> {args.out}")
+        return
+
+    tetra_monitor.HAS_REQUESTS = False
+    events = collections.Counter()
+    tetra_monitor.emit = lambda event_type, payload, urgent=False: events.update([event_type])
+    hub = tetra_monitor.StationHub([None])
+    mon = hub.primary
+    if args.input:
+        lines = read_captures(args.input)
+    else:
+        gen, lines = generated(args)
+        mon.callsign_cache.update(gen.callsigns)
+        lines = list(lines)  # time processing, not generation
+
+    started = time.perf_counter()
+    for line in lines:
+        mon.process_line(line)
+    elapsed = time.perf_counter() - started
+
+    n = mon.lines_processed
+    print(f"{n} lines in {elapsed:.2f} s: {n / elapsed:.0f} lines/s, {sum(events.values()) / elapsed:.0f} events/s")
+    print(f"{len(mon.terminals)} terminals, {len(mon.open_calls)} calls open, {len(mon.private_calls)} private calls")
+    print("events: " + json.dumps(dict(events.most_common())))
+
+
+if __name__ == "__main__":
+    main()
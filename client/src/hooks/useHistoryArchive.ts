@@ -0,0 +1,43 @@
+import { useState, useCallback } from "react";
+import { api } from "@shared/routes";
+
+// Pages older entries out of the persistent history store (server/history.ts).
+// The live list from useTetraWebSocket stays capped at 50; archived pages are
+// appended below it. Entries already present in the live list are skipped —
+// event ids restart with every monitor process, so (id, timestamp, source) is
+// used as the identity.
+export function useHistoryArchive<T extends { id: string; timestamp: string }>(
+  kind: "calls" | "sds",
+  filters: Record<string, string>,
+  live: T[],
+) {
+  const [older, setOlder] = useState<T[]>([]);
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [exhausted, setExhausted] = useState(false);
+  const [loading, setLoading] = useState(false);
+
+  const identity = (e: any) => `${e.id}|${e.timestamp}|${e.sourceId ?? e.srcIssi ?? ""}`;
+
+  const loadOlder = useCallback(async () => {
+    if (loading || exhausted) return;
+    setLoading(true);
+    try {
+      const params = new URLSearchParams({ ...filters, limit: "50" });
+      if (cursor) params.set("cursor", cursor);
+      const path = kind === "calls" ? api.history.calls.path : api.history.sds.path;
+      const res = await fetch(`${path}?${params}`);
+      if (!res.ok) throw new Error(String(res.status));
+      const page: { items: T[]; nextCursor: string | null } = await res.json();
+      const seen = new Set([...live, ...older].map(identity));
+      setOlder(prev => [...prev, ...page.items.filter(e => !seen.has(identity(e)))]);
+      setCursor(page.nextCursor);
+      if (!page.nextCursor) setExhausted(true);
+    } catch {
+      setExhausted(true);
+    } finally {
+      setLoading(false);
+    }
+  }, [kind, JSON.stringify(filters), live, older, cursor, loading, exhausted]);
+
+  return { older, loadOlder, loading, exhausted };
+}
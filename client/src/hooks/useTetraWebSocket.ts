@@ -1,4 +1,5 @@
 import { useState, useEffect, useRef, useCallback } from "react";
+import { LATENCY_BUCKETS } from "@shared/schema";
 
 export interface Terminal {
   id: string;
@@ -14,6 +15,9 @@ export interface Terminal {
   timeSlot?: number | null;
   rssiDbfs?: number | null;
   energySaving?: string | null;
+  // Multi-station monitor only: station with the freshest view, and every station hearing it.
+  station?: string;
+  stations?: string[];
 }
 
 export interface CallLogEntry {
@@ -28,6 +32,11 @@ export interface CallLogEntry {
   activity?: "TX" | "RX" | null;
   timeSlot?: number | null;
   callType?: "group" | "private";
+  // Epoch ms; endTs/duration (seconds) stay null while the call is on air.
+  startTs?: number;
+  endTs?: number | null;
+  duration?: number | null;
+  station?: string;
 }
 
 export interface SdsLipData {
@@ -52,6 +61,7 @@ export interface SdsMessage {
   sizeUnit: "bits" | "bytes";
   textContent?: string;
   lipData?: SdsLipData;
+  station?: string;
 }
 
 export interface GpsPosition {
@@ -159,7 +169,65 @@ export interface TetraState {
   mode: string;
 }
 
-export function useTetraWebSocket(): TetraState {
+// Relay topics (server/routes.ts). Omitted topics mean everything; tg/issi
+// narrow terminals, calls, SDS and GPS to the given sets.
+export type TetraTopic = "terminals" | "calls" | "sds" | "gps" | "rf" | "flowstation" | "stats" | "system";
+
+export interface TetraSubscription {
+  topics?: TetraTopic[];
+  tg?: string[];
+  issi?: string[];
+  station?: string[];
+  // Ask the relay to pack each tick's events into one frame (default on).
+  batch?: boolean;
+}
+
+// Receive-side counters for comparing framing modes; inspect as
+// window.__tetraWsStats in the browser console.
+export const wsClientStats = { since: Date.now(), frames: 0, events: 0, bytes: 0, decodeMs: 0 };
+if (typeof window !== "undefined") (window as any).__tetraWsStats = wsClientStats;
+
+// Relay→browser latency, measured only while the Dashboard latency overlay is
+// open (wsLatency.enabled). A ping every TRACE_PING_MS estimates the relay's
+// clock offset (the lowest round trip wins); each event carrying trace.relay
+// then took arrival + offset - relay. Histogram counts go back to the relay
+// as trace_report for /metrics; the recent samples feed the overlay.
+const TRACE_PING_MS = 5000;
+const TRACE_RECENT = 512;
+export const wsLatency = {
+  enabled: false,
+  offsetMs: null as number | null,
+  rttMs: null as number | null,
+  recent: [] as number[],                                         // seconds, newest last
+  counts: new Array<number>(LATENCY_BUCKETS.length + 1).fill(0),  // since the last trace_report
+  sum: 0,
+};
+
+function traceArrival(msg: any, arrived: number) {
+  const at = arrived + wsLatency.offsetMs!;
+  for (const ev of msg.type === "batch" ? msg.payload || [] : [msg]) {
+    if (ev?.trace?.relay == null) continue;
+    const v = Math.max(0, (at - ev.trace.relay) / 1000);
+    let i = 0;
+    while (i < LATENCY_BUCKETS.length && v > LATENCY_BUCKETS[i]) i++;
+    wsLatency.counts[i]++;
+    wsLatency.sum += v;
+    wsLatency.recent.push(v);
+    if (wsLatency.recent.length > TRACE_RECENT) wsLatency.recent.shift();
+  }
+}
+
+function traceTick(ws: WebSocket) {
+  if (!wsLatency.enabled || ws.readyState !== WebSocket.OPEN) return;
+  ws.send(JSON.stringify({ type: "ping", t: Date.now() }));
+  if (wsLatency.counts.some(c => c > 0)) {
+    ws.send(JSON.stringify({ type: "trace_report", le: LATENCY_BUCKETS, counts: wsLatency.counts, sum: wsLatency.sum }));
+    wsLatency.counts = wsLatency.counts.map(() => 0);
+    wsLatency.sum = 0;
+  }
+}
+
+export function useTetraWebSocket(subscription: TetraSubscription = {}): TetraState {
   const [terminals, setTerminals] = useState<Record<string, Terminal>>({});
   const [localHistory, setLocalHistory] = useState<CallLogEntry[]>([]);
   const [externalHistory, setExternalHistory] = useState<CallLogEntry[]>([]);
@@ -180,168 +248,242 @@ export function useTetraWebSocket(): TetraState {
   const [mode, setMode] = useState("connecting");
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectTimer = useRef<ReturnType<typeof setTimeout>>();
+  const params = new URLSearchParams();
+  if (subscription.topics?.length) params.set("topics", subscription.topics.join(","));
+  if (subscription.tg?.length) params.set("tg", subscription.tg.join(","));
+  if (subscription.issi?.length) params.set("issi", subscription.issi.join(","));
+  if (subscription.station?.length) params.set("station", subscription.station.join(","));
+  if (subscription.batch !== false) params.set("batch", "1");
+  const query = params.toString();
 
   const connect = useCallback(() => {
     const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
-    const url = `${protocol}//${window.location.host}/ws`;
+    const url = `${protocol}//${window.location.host}/ws${query ? `?${query}` : ""}`;
 
     const ws = new WebSocket(url);
     wsRef.current = ws;
 
+    let traceTimer: ReturnType<typeof setInterval> | undefined;
     ws.onopen = () => {
       setConnected(true);
+      wsLatency.offsetMs = null;
+      wsLatency.rttMs = null;
+      traceTimer = setInterval(() => traceTick(ws), TRACE_PING_MS);
     };
 
-    ws.onmessage = (event) => {
-      try {
-        const msg = JSON.parse(event.data);
-
-        switch (msg.type) {
-          case "full_state":
-            setTerminals(msg.payload.terminals || {});
-            setLocalHistory(msg.payload.localHistory || []);
-            setExternalHistory(msg.payload.externalHistory || []);
-            setSdsMessages(msg.payload.sdsMessages || []);
-            setGpsPositions(msg.payload.gpsPositions || {});
-            setGpsHistory(msg.payload.gpsHistory || {});
-            if (msg.payload.rfCalls) setRfCalls(msg.payload.rfCalls);
-            if (msg.payload.fsDashboardActive !== undefined) setFsDashboardActive(!!msg.payload.fsDashboardActive);
-            setEmergencies(msg.payload.emergencies || []);
-            setBrewStatus(msg.payload.brewStatus ?? null);
-            setLastHeard(msg.payload.lastHeard || []);
-            setTxQuality(msg.payload.txQuality ?? null);
-            setHealth(msg.payload.health ?? null);
-            setSdrHealth(msg.payload.sdrHealth ?? null);
-            setSysHealth(msg.payload.sysHealth ?? null);
-            break;
-
-          case "fs_emergency":
-            setEmergencies(msg.payload?.emergencies || []);
-            break;
-
-          case "fs_brew_status":
-            setBrewStatus(msg.payload ?? null);
-            break;
-
-          case "fs_last_heard":
-            setLastHeard(msg.payload?.list || []);
-            break;
-
-          case "fs_tx_quality":
-            setTxQuality(msg.payload ?? null);
-            break;
-
-          case "fs_health":
-            setHealth(msg.payload ?? null);
-            break;
-
-          case "fs_sdr_health":
-            setSdrHealth(msg.payload ?? null);
-            break;
-
-          case "fs_sys_health":
-            setSysHealth(msg.payload ?? null);
-            break;
-
-          case "rf_calls_state":
-            setRfCalls(msg.payload || []);
-            break;
-
-          case "fs_dashboard_status":
-            setFsDashboardActive(!!msg.payload?.active);
-            break;
-
-          case "rf_call_started":
-            setRfCalls(prev => {
-              const filtered = prev.filter((c: RfCall) => c.callId !== msg.payload.callId);
-              return [...filtered, msg.payload as RfCall];
-            });
-            break;
-
-          case "rf_call_ended":
-            setRfCalls(prev => prev.filter((c: RfCall) => c.callId !== msg.payload.callId));
-            break;
+    // Ids listed so far by the full_state being received; null outside one.
+    let fullStateIds: Set<string> | null = null;
+    const handleEvent = (msg: any) => {
+      switch (msg.type) {
+        case "pong": {
+          const now = Date.now();
+          const rtt = now - msg.payload.t;
+          if (wsLatency.rttMs == null || rtt <= wsLatency.rttMs) {
+            wsLatency.rttMs = rtt;
+            wsLatency.offsetMs = msg.payload.server - (msg.payload.t + now) / 2;
+          }
+          break;
+        }
+        // full_state_begin carries every section except the terminals, which
+        // follow in full_state_chunk frames and are merged as they arrive;
+        // full_state_end drops the terminals none of them listed.
+        case "full_state":
+        case "full_state_begin":
+          if (msg.type === "full_state") setTerminals(msg.payload.terminals || {});
+          else fullStateIds = new Set();
+          setLocalHistory(msg.payload.localHistory || []);
+          setExternalHistory(msg.payload.externalHistory || []);
+          setSdsMessages(msg.payload.sdsMessages || []);
+          setGpsPositions(msg.payload.gpsPositions || {});
+          setGpsHistory(msg.payload.gpsHistory || {});
+          if (msg.payload.rfCalls) setRfCalls(msg.payload.rfCalls);
+          if (msg.payload.fsDashboardActive !== undefined) setFsDashboardActive(!!msg.payload.fsDashboardActive);
+          setEmergencies(msg.payload.emergencies || []);
+          setBrewStatus(msg.payload.brewStatus ?? null);
+          setLastHeard(msg.payload.lastHeard || []);
+          setTxQuality(msg.payload.txQuality ?? null);
+          setHealth(msg.payload.health ?? null);
+          setSdrHealth(msg.payload.sdrHealth ?? null);
+          setSysHealth(msg.payload.sysHealth ?? null);
+          break;
+
+        case "full_state_chunk": {
+          if (!fullStateIds) break;
+          const chunk: Record<string, Terminal> = msg.payload?.terminals || {};
+          for (const id of Object.keys(chunk)) fullStateIds.add(id);
+          setTerminals(prev => ({ ...prev, ...chunk }));
+          break;
+        }
 
-          case "rf_ts_voice":
-            if (msg.payload?.ts >= 1 && msg.payload?.ts <= 4) {
-              const vc = msg.payload.carrier != null ? String(msg.payload.carrier) : "single";
-              setTsVoiceActivity(prev => ({ ...prev, [`${vc}:${msg.payload.ts}`]: Date.now() }));
-            }
-            break;
+        case "full_state_end": {
+          const listed = fullStateIds;
+          fullStateIds = null;
+          if (!listed) break;
+          setTerminals(prev => {
+            const next: Record<string, Terminal> = {};
+            for (const id of Object.keys(prev)) if (listed.has(id)) next[id] = prev[id];
+            return next;
+          });
+          break;
+        }
 
-          case "update_terminal":
-            setTerminals(prev => ({
-              ...prev,
-              [msg.payload.id]: msg.payload
-            }));
-            break;
-
-          case "new_call": {
-            const entry = msg.payload as CallLogEntry;
-            if (entry.isLocal) {
-              setLocalHistory(prev => [entry, ...prev].slice(0, 50));
-            } else {
-              setExternalHistory(prev => [entry, ...prev].slice(0, 50));
-            }
-            break;
+        case "fs_emergency":
+          setEmergencies(msg.payload?.emergencies || []);
+          break;
+
+        case "fs_brew_status":
+          setBrewStatus(msg.payload ?? null);
+          break;
+
+        case "fs_last_heard":
+          setLastHeard(msg.payload?.list || []);
+          break;
+
+        case "fs_tx_quality":
+          setTxQuality(msg.payload ?? null);
+          break;
+
+        case "fs_health":
+          setHealth(msg.payload ?? null);
+          break;
+
+        case "fs_sdr_health":
+          setSdrHealth(msg.payload ?? null);
+          break;
+
+        case "fs_sys_health":
+          setSysHealth(msg.payload ?? null);
+          break;
+
+        case "rf_calls_state":
+          setRfCalls(msg.payload || []);
+          break;
+
+        case "fs_dashboard_status":
+          setFsDashboardActive(!!msg.payload?.active);
+          break;
+
+        case "rf_call_started":
+          setRfCalls(prev => {
+            const filtered = prev.filter((c: RfCall) => c.callId !== msg.payload.callId);
+            return [...filtered, msg.payload as RfCall];
+          });
+          break;
+
+        case "rf_call_ended":
+          setRfCalls(prev => prev.filter((c: RfCall) => c.callId !== msg.payload.callId));
+          break;
+
+        case "rf_ts_voice":
+          if (msg.payload?.ts >= 1 && msg.payload?.ts <= 4) {
+            const vc = msg.payload.carrier != null ? String(msg.payload.carrier) : "single";
+            setTsVoiceActivity(prev => ({ ...prev, [`${vc}:${msg.payload.ts}`]: Date.now() }));
+          }
+          break;
+
+        case "update_terminal":
+          setTerminals(prev => ({
+            ...prev,
+            [msg.payload.id]: msg.payload
+          }));
+          break;
+
+        case "remove_terminal":
+          setTerminals(prev => {
+            if (!(msg.payload?.id in prev)) return prev;
+            const next = { ...prev };
+            delete next[msg.payload.id];
+            return next;
+          });
+          break;
+
+        case "new_call": {
+          const entry = msg.payload as CallLogEntry;
+          if (entry.isLocal) {
+            setLocalHistory(prev => [entry, ...prev].slice(0, 50));
+          } else {
+            setExternalHistory(prev => [entry, ...prev].slice(0, 50));
           }
+          break;
+        }
 
-          case "update_call": {
-            const updated = msg.payload as CallLogEntry;
-            if (updated.isLocal) {
-              setLocalHistory(prev => prev.map(e => e.id === updated.id ? updated : e));
-            } else {
-              setExternalHistory(prev => prev.map(e => e.id === updated.id ? updated : e));
-            }
-            break;
+        case "update_call": {
+          const updated = msg.payload as CallLogEntry;
+          if (updated.isLocal) {
+            setLocalHistory(prev => prev.map(e => e.id === updated.id ? updated : e));
+          } else {
+            setExternalHistory(prev => prev.map(e => e.id === updated.id ? updated : e));
           }
+          break;
+        }
 
-          case "sds_message": {
-            const sds = msg.payload as SdsMessage;
-            setSdsMessages(prev => {
-              const idx = prev.findIndex(m => m.id === sds.id);
-              if (idx >= 0) {
-                const updated = [...prev];
-                updated[idx] = sds;
-                return updated;
-              }
-              return [sds, ...prev].slice(0, 50);
-            });
-            // Update GPS positions + track history when SDS carries LIP data
-            if (sds.lipData && sds.srcIssi) {
-              const newPos: GpsPosition = {
-                issi: sds.srcIssi,
-                callsign: sds.srcCallsign || null,
-                lat: sds.lipData!.lat,
-                lon: sds.lipData!.lon,
-                speed: sds.lipData!.speed ?? null,
-                heading: sds.lipData!.heading ?? null,
-                timestamp: new Date().toISOString(),
-                hasFix: true,
-              };
-              setGpsPositions(prev => ({
-                ...prev,
-                [sds.srcIssi]: { ...newPos, callsign: sds.srcCallsign || prev[sds.srcIssi]?.callsign || null },
-              }));
-              setGpsHistory(prev => {
-                const existing = prev[sds.srcIssi] || [];
-                const updated = [...existing, newPos].slice(-200);
-                return { ...prev, [sds.srcIssi]: updated };
-              });
+        case "sds_message": {
+          const sds = msg.payload as SdsMessage;
+          setSdsMessages(prev => {
+            const idx = prev.findIndex(m => m.id === sds.id);
+            if (idx >= 0) {
+              const updated = [...prev];
+              updated[idx] = sds;
+              return updated;
             }
-            break;
+            return [sds, ...prev].slice(0, 50);
+          });
+          // Update GPS positions + track history when SDS carries LIP data
+          if (sds.lipData && sds.srcIssi) {
+            const newPos: GpsPosition = {
+              issi: sds.srcIssi,
+              callsign: sds.srcCallsign || null,
+              lat: sds.lipData!.lat,
+              lon: sds.lipData!.lon,
+              speed: sds.lipData!.speed ?? null,
+              heading: sds.lipData!.heading ?? null,
+              timestamp: new Date().toISOString(),
+              hasFix: true,
+            };
+            setGpsPositions(prev => ({
+              ...prev,
+              [sds.srcIssi]: { ...newPos, callsign: sds.srcCallsign || prev[sds.srcIssi]?.callsign || null },
+            }));
+            setGpsHistory(prev => {
+              const existing = prev[sds.srcIssi] || [];
+              const updated = [...existing, newPos].slice(-200);
+              return { ...prev, [sds.srcIssi]: updated };
+            });
           }
+          break;
+        }
+
+        case "status":
+          setMode(msg.payload.mode || "unknown");
+          break;
+      }
+    };
 
-          case "status":
-            setMode(msg.payload.mode || "unknown");
-            break;
+    // Frames are either one event or, with batching on, {"type":"batch","payload":[...]}
+    // holding every event of one relay tick; React applies the whole batch in one render.
+    ws.onmessage = (event) => {
+      const t0 = performance.now();
+      const arrived = Date.now();
+      try {
+        const msg = JSON.parse(event.data);
+        if (wsLatency.enabled && wsLatency.offsetMs != null) traceArrival(msg, arrived);
+        if (msg.type === "batch") {
+          for (const ev of msg.payload || []) handleEvent(ev);
+          wsClientStats.events += msg.payload?.length || 0;
+        } else {
+          handleEvent(msg);
+          wsClientStats.events++;
         }
       } catch (e) {
         // ignore parse errors
       }
+      wsClientStats.frames++;
+      wsClientStats.bytes += event.data.length;
+      wsClientStats.decodeMs += performance.now() - t0;
     };
 
     ws.onclose = () => {
+      clearInterval(traceTimer);
       setConnected(false);
       wsRef.current = null;
       reconnectTimer.current = setTimeout(connect, 2000);
@@ -350,7 +492,7 @@ export function useTetraWebSocket(): TetraState {
     ws.onerror = () => {
       ws.close();
     };
-  }, []);
+  }, [query]);
 
   useEffect(() => {
     connect();
@@ -90,6 +90,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "LOCAL HISTORY",
     "external_history": "EXTERNAL HISTORY",
     "no_calls_logged": "No calls logged",
+    "history_load_older": "Load older",
     "entry_one": "entry",
     "entry_other": "entries",
     "confirm_shutdown": "Shutdown?",
@@ -381,6 +382,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "HISTORIAL LOCAL",
     "external_history": "HISTORIAL EXTERNO",
     "no_calls_logged": "Sin llamadas registradas",
+    "history_load_older": "Cargar anteriores",
     "entry_one": "entrada",
     "entry_other": "entradas",
     "confirm_shutdown": "\u00bfApagar?",
@@ -624,6 +626,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "\u672c\u5730\u5386\u53f2",
     "external_history": "\u5916\u90e8\u5386\u53f2",
     "no_calls_logged": "\u65e0\u901a\u8bdd\u8bb0\u5f55",
+    "history_load_older": "加载更早记录",
     "entry_one": "\u6761",
     "entry_other": "\u6761",
     "confirm_shutdown": "\u5173\u673a\uff1f",
@@ -859,6 +862,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "本地歷史",
     "external_history": "外部歷史",
     "no_calls_logged": "無通話記錄",
+    "history_load_older": "載入更早記錄",
     "entry_one": "條",
     "entry_other": "條",
     "confirm_shutdown": "關機？",
@@ -1102,6 +1106,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "HIST\u00d3RICO LOCAL",
     "external_history": "HIST\u00d3RICO EXTERNO",
     "no_calls_logged": "Sem chamadas registradas",
+    "history_load_older": "Carregar anteriores",
     "entry_one": "entrada",
     "entry_other": "entradas",
     "confirm_shutdown": "Desligar?",
@@ -1345,6 +1350,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "LOKALER VERLAUF",
     "external_history": "EXTERNER VERLAUF",
     "no_calls_logged": "Keine Anrufe protokolliert",
+    "history_load_older": "Ältere laden",
     "entry_one": "Eintrag",
     "entry_other": "Eintr\u00e4ge",
     "confirm_shutdown": "Herunterfahren?",
@@ -1588,6 +1594,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "HISTORIQUE LOCAL",
     "external_history": "HISTORIQUE EXTERNE",
     "no_calls_logged": "Aucun appel enregistr\u00e9",
+    "history_load_older": "Charger plus anciens",
     "entry_one": "entr\u00e9e",
     "entry_other": "entr\u00e9es",
     "confirm_shutdown": "\u00c9teindre ?",
@@ -1831,6 +1838,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "CRONOLOGIA LOCALE",
     "external_history": "CRONOLOGIA ESTERNA",
     "no_calls_logged": "Nessuna chiamata registrata",
+    "history_load_older": "Carica precedenti",
     "entry_one": "voce",
     "entry_other": "voci",
     "confirm_shutdown": "Spegnere?",
@@ -2074,6 +2082,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "LOKAL HISTORIK",
     "external_history": "EKSTERN HISTORIK",
     "no_calls_logged": "Ingen opkald registreret",
+    "history_load_older": "Indlæs ældre",
     "entry_one": "post",
     "entry_other": "poster",
     "confirm_shutdown": "Sluk?",
@@ -2317,6 +2326,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "LOKALE GESCHIEDENIS",
     "external_history": "EXTERNE GESCHIEDENIS",
     "no_calls_logged": "Geen gesprekken geregistreerd",
+    "history_load_older": "Oudere laden",
     "entry_one": "vermelding",
     "entry_other": "vermeldingen",
     "confirm_shutdown": "Afsluiten?",
@@ -2560,6 +2570,7 @@ const translations: Record<Language, Record<string, string>> = {
     "local_history": "ISTORIC LOCAL",
     "external_history": "ISTORIC EXTERN",
     "no_calls_logged": "Niciun apel înregistrat",
+    "history_load_older": "Încarcă mai vechi",
     "entry_one": "intrare",
     "entry_other": "intrări",
     "confirm_shutdown": "Oprire?",
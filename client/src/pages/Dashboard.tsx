@@ -1,10 +1,12 @@
-import { useTetraWebSocket, type Terminal, type CallLogEntry, type SdsMessage, type RfCall, type EmergencyEntry, type LastHeardEntry, type TxQuality, type HealthSnapshot, type SdrHealth, type SysHealth, type BrewStatus } from "../hooks/useTetraWebSocket";
+import { useTetraWebSocket, wsLatency, type Terminal, type CallLogEntry, type SdsMessage, type RfCall, type EmergencyEntry, type LastHeardEntry, type TxQuality, type HealthSnapshot, type SdrHealth, type SysHealth, type BrewStatus } from "../hooks/useTetraWebSocket";
 import { useState, useEffect, useRef, useMemo } from "react";
 import { Radio, Wifi, WifiOff, ArrowUpFromLine, ArrowDownToLine, Power, RotateCcw, Cpu, Thermometer, MemoryStick, Lock, RefreshCw, MessageSquare, ArrowUp, ArrowDown, MapPin, Navigation, Globe, Zap, Network, Eye, EyeOff, Signal as SignalIcon, RadioTower, Clock as ClockIcon, ShieldCheck, ShieldAlert, Siren, Activity, Gauge } from "lucide-react";
 import { getCountryCode, getFlagEmoji } from "@/lib/callsignFlags";
 import { useI18n } from "@/lib/i18n";
+import { useHistoryArchive } from "@/hooks/useHistoryArchive";
 import { DgnaSender } from "@/components/DgnaSender";
 import tetraLogo from "@assets/tetra_1771538916537.png";
+import { LATENCY_STAGES, type LatencyStage, type LatencySummary } from "@shared/schema";
 
 function Clock() {
   const [time, setTime] = useState(new Date().toLocaleTimeString("en-GB"));
@@ -313,6 +315,14 @@ function TerminalRow({ t: terminal, tgName, issiCallsign, showDgna, fsActive }:
               </span>
             ) : null;
           })()}
+          {terminal.stations?.length ? (
+            <span
+              className="text-[10px] font-bold border border-sky-400/50 text-sky-300 rounded px-1 tracking-wide uppercase"
+              data-testid={`text-station-${terminal.id}`}
+            >
+              {terminal.stations.join(" · ")}
+            </span>
+          ) : null}
           {terminal.energySaving ? (
             <EnergySavingBadge mode={terminal.energySaving} />
           ) : null}
@@ -884,6 +894,8 @@ function CallHistory({ entries, title, isLocal, issiCallsign }: {
   const { t } = useI18n();
   const tgName = useTgNames();
   const scrollRef = useRef<HTMLDivElement>(null);
+  const { older, loadOlder, loading, exhausted } = useHistoryArchive("calls", { local: isLocal ? "1" : "0" }, entries);
+  const shown = older.length ? [...entries, ...older] : entries;
 
   return (
     <div
@@ -902,12 +914,12 @@ function CallHistory({ entries, title, isLocal, issiCallsign }: {
         ref={scrollRef}
         className="overflow-y-auto flex-1 p-2 sm:p-3 font-mono text-xs sm:text-sm min-h-[150px] max-h-[300px] space-y-0.5"
       >
-        {entries.length === 0 ? (
+        {shown.length === 0 ? (
           <div className="text-muted-foreground/50 text-center py-8 text-xs">{t("no_calls_logged")}</div>
         ) : (
-          entries.map((entry, i) => (
+          shown.map((entry, i) => (
             <div
-              key={entry.id}
+              key={i < entries.length ? entry.id : `archive-${i}-${entry.id}`}
               className={`py-0.5 px-1.5 sm:px-2 rounded transition-colors duration-500 whitespace-normal sm:whitespace-nowrap ${
                 i === 0 && entry.activity === "TX" ? "bg-red-500/10" : ""
               }`}
@@ -948,9 +960,22 @@ function CallHistory({ entries, title, isLocal, issiCallsign }: {
               {entry.timeSlot != null ? (
                 <span className="text-cyan-400/80 text-[10px] ml-1">TS{entry.timeSlot}</span>
               ) : null}
+              {entry.duration != null ? (
+                <span className="text-muted-foreground/70 text-[10px] ml-1" data-testid={`text-duration-${entry.id}`}>{entry.duration}s</span>
+              ) : null}
             </div>
           ))
         )}
+        {!exhausted && entries.length > 0 && (
+          <button
+            onClick={loadOlder}
+            disabled={loading}
+            className="w-full mt-1 py-1 text-[10px] uppercase tracking-widest text-muted-foreground hover:text-foreground border border-dashed border-white/10 rounded disabled:opacity-50"
+            data-testid={`button-load-older-${isLocal ? 'local' : 'external'}`}
+          >
+            {loading ? "…" : t("history_load_older")}
+          </button>
+        )}
       </div>
     </div>
   );
@@ -1529,6 +1554,82 @@ function BtsDetails() {
   );
 }
 
+const LATENCY_LABELS: Record<LatencyStage, string> = {
+  journal_to_parse: "journal → parse",
+  parse_to_emit: "parse → emit",
+  emit_to_relay: "emit → relay",
+  relay_to_browser: "relay → browser",
+};
+
+// Debug overlay (?debug=latency): the relay's per-stage latency plus this
+// browser's own relay→browser samples, which only it can time.
+function LatencyOverlay() {
+  const [stages, setStages] = useState<Record<string, LatencySummary>>({});
+  const [, setTick] = useState(0);
+
+  useEffect(() => {
+    wsLatency.enabled = true;
+    let alive = true;
+    const load = () => {
+      fetch("/api/trace/latency")
+        .then(res => res.json())
+        .then(data => { if (alive) setStages(data.stages || {}); })
+        .catch(() => {});
+      setTick(n => n + 1);
+    };
+    load();
+    const interval = setInterval(load, 2000);
+    return () => {
+      alive = false;
+      clearInterval(interval);
+      wsLatency.enabled = false;
+    };
+  }, []);
+
+  const recent = [...wsLatency.recent].sort((a, b) => a - b);
+  const at = (q: number) => recent.length ? Math.round(recent[Math.min(recent.length - 1, Math.floor(q * recent.length))] * 1e4) / 10 : null;
+  const rows = LATENCY_STAGES.map(stage => {
+    if (stage !== "relay_to_browser") return { stage, ...stages[stage] };
+    return { stage, count: recent.length, p50Ms: at(0.5), p95Ms: at(0.95), p99Ms: at(0.99), maxMs: at(1) };
+  });
+  const ms = (v: number | null | undefined) => v == null ? "—" : v < 10 ? v.toFixed(1) : Math.round(v).toString();
+
+  return (
+    <div className="fixed bottom-2 left-2 z-50 glass-panel rounded-md px-3 py-2 font-mono text-[11px] text-foreground shadow-lg" data-testid="overlay-latency">
+      <div className="flex items-center gap-2 mb-1 text-amber-400 font-bold tracking-[0.12em] uppercase text-[10px]">
+        <Activity className="w-3 h-3" /> latency (ms)
+        <span className="ml-auto text-muted-foreground normal-case tracking-normal font-normal">
+          rtt {wsLatency.rttMs ?? "—"}
+        </span>
+      </div>
+      <table>
+        <thead>
+          <tr className="text-muted-foreground">
+            <th className="text-left pr-3 font-normal">stage</th>
+            <th className="text-right pr-2 font-normal">n</th>
+            <th className="text-right pr-2 font-normal">p50</th>
+            <th className="text-right pr-2 font-normal">p95</th>
+            <th className="text-right pr-2 font-normal">p99</th>
+            <th className="text-right font-normal">max</th>
+          </tr>
+        </thead>
+        <tbody>
+          {rows.map(r => (
+            <tr key={r.stage} data-testid={`latency-${r.stage}`}>
+              <td className="pr-3">{LATENCY_LABELS[r.stage]}</td>
+              <td className="text-right pr-2">{r.count ?? 0}</td>
+              <td className="text-right pr-2">{ms(r.p50Ms)}</td>
+              <td className="text-right pr-2">{ms(r.p95Ms)}</td>
+              <td className="text-right pr-2">{ms(r.p99Ms)}</td>
+              <td className="text-right">{ms(r.maxMs)}</td>
+            </tr>
+          ))}
+        </tbody>
+      </table>
+    </div>
+  );
+}
+
 export default function Dashboard() {
   const { t } = useI18n();
   const tgName = useTgNames();
@@ -1548,6 +1649,8 @@ export default function Dashboard() {
   }, [terminalList, issiCustom]);
   const issiCallsign = (id: string | number) => issiCallsignMap.get(String(id)) || "";
 
+  const showLatency = useMemo(() => new URLSearchParams(window.location.search).get("debug") === "latency", []);
+
   const txCount = terminalList.filter(t => t.activity === "TX").length;
   const rxCount = terminalList.filter(t => t.activity === "RX").length;
 
@@ -1659,6 +1762,7 @@ export default function Dashboard() {
 
         <SdsPanel messages={sdsMessages} />
       </main>
+      {showLatency && <LatencyOverlay />}
     </div>
   );
 }
@@ -293,7 +293,7 @@ function StationSidebar({
 }
 
 export default function GpsMap() {
-  const { gpsPositions, gpsHistory, terminals } = useTetraWebSocket();
+  const { gpsPositions, gpsHistory, terminals } = useTetraWebSocket({ topics: ["gps", "terminals"] });
   const { t } = useI18n();
   const [layer, setLayer] = useState<LayerType>("map");
   const [selectedIssi, setSelectedIssi] = useState<string | null>(null);
@@ -49,10 +49,12 @@ export default function LogLive() {
           setConnected(true);
           return;
         }
-        if (data.line) {
+        // The server's ring buffer overran while this client was too slow.
+        const line = data.gap ? `[... ${data.gap} lines skipped ...]` : data.line;
+        if (line) {
           setConnected(true);
           setLines((prev) => {
-            const next = [data.line, ...prev];
+            const next = [line, ...prev];
             if (next.length > MAX_LINES) {
               return next.slice(0, MAX_LINES);
             }
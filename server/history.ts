@@ -0,0 +1,367 @@
+import * as path from "path";
+import pg from "pg";
+
+// ── Persistent call / SDS history ────────────────────────────────────────────
+// Live state (currentState.localHistory etc.) stays capped at MAX_HISTORY; every
+// new_call / update_call / sds_message is additionally written here so the
+// dashboard can page back through days of traffic. Writes are buffered and
+// flushed in one transaction per batch; an update for an entry that is still
+// pending simply replaces the pending row (upsert coalescing).
+//
+// Backend: Postgres when DATABASE_URL is set, otherwise a local SQLite file via
+// the optional `better-sqlite3` module. If neither is usable the store logs a
+// warning and queries return empty pages — the live dashboard is unaffected.
+
+const FLUSH_INTERVAL_MS = 1000;
+const FLUSH_BATCH_SIZE = 200;
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 500;
+const RETENTION_DAYS = parseInt(process.env.HISTORY_RETENTION_DAYS || "30", 10);
+const PRUNE_INTERVAL_MS = 60 * 60 * 1000;
+
+export interface HistoryQuery {
+  issi?: string;
+  tg?: string;
+  type?: string;
+  local?: boolean;
+  from?: number;
+  to?: number;
+  cursor?: string;
+  limit?: number;
+}
+
+export interface HistoryPage {
+  items: any[];
+  nextCursor: string | null;
+}
+
+interface CallRow {
+  key: string;
+  ts_ms: number;
+  source_issi: string;
+  target: string;
+  call_type: string;
+  is_local: number;
+  payload: string;
+}
+
+interface SdsRow {
+  key: string;
+  ts_ms: number;
+  src_issi: string;
+  dst_issi: string;
+  message_type: string;
+  payload: string;
+}
+
+const SCHEMA = [
+  `CREATE TABLE IF NOT EXISTS call_history (
+    seq %SERIAL% PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    ts_ms BIGINT NOT NULL,
+    source_issi TEXT NOT NULL,
+    target TEXT NOT NULL,
+    call_type TEXT NOT NULL,
+    is_local INTEGER NOT NULL,
+    payload TEXT NOT NULL
+  )`,
+  `CREATE INDEX IF NOT EXISTS call_history_ts_idx ON call_history (ts_ms)`,
+  `CREATE INDEX IF NOT EXISTS call_history_source_idx ON call_history (source_issi, seq)`,
+  `CREATE INDEX IF NOT EXISTS call_history_target_idx ON call_history (target, seq)`,
+  `CREATE INDEX IF NOT EXISTS call_history_type_idx ON call_history (call_type, seq)`,
+  `CREATE TABLE IF NOT EXISTS sds_history (
+    seq %SERIAL% PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    ts_ms BIGINT NOT NULL,
+    src_issi TEXT NOT NULL,
+    dst_issi TEXT NOT NULL,
+    message_type TEXT NOT NULL,
+    payload TEXT NOT NULL
+  )`,
+  `CREATE INDEX IF NOT EXISTS sds_history_ts_idx ON sds_history (ts_ms)`,
+  `CREATE INDEX IF NOT EXISTS sds_history_src_idx ON sds_history (src_issi, seq)`,
+  `CREATE INDEX IF NOT EXISTS sds_history_dst_idx ON sds_history (dst_issi, seq)`,
+  `CREATE INDEX IF NOT EXISTS sds_history_type_idx ON sds_history (message_type, seq)`,
+];
+
+const UPSERT_CALL = `INSERT INTO call_history (key, ts_ms, source_issi, target, call_type, is_local, payload)
+  VALUES (?, ?, ?, ?, ?, ?, ?)
+  ON CONFLICT (key) DO UPDATE SET payload = excluded.payload`;
+
+const UPSERT_SDS = `INSERT INTO sds_history (key, ts_ms, src_issi, dst_issi, message_type, payload)
+  VALUES (?, ?, ?, ?, ?, ?)
+  ON CONFLICT (key) DO UPDATE SET payload = excluded.payload`;
+
+// Cursors are the opaque seq of the last row returned; pages walk seq downwards.
+function encodeCursor(seq: number): string {
+  return Buffer.from(String(seq)).toString("base64url");
+}
+
+function decodeCursor(cursor?: string): number | null {
+  if (!cursor) return null;
+  const n = Number(Buffer.from(cursor, "base64url").toString());
+  return Number.isFinite(n) ? n : null;
+}
+
+function clampLimit(limit?: number): number {
+  if (!limit || !Number.isFinite(limit) || limit <= 0) return DEFAULT_PAGE_SIZE;
+  return Math.min(Math.floor(limit), MAX_PAGE_SIZE);
+}
+
+abstract class BatchedHistoryStore {
+  private session = String(Date.now());
+  private pendingCalls = new Map<string, CallRow>();
+  private pendingSds = new Map<string, SdsRow>();
+  private flushTimer: ReturnType<typeof setTimeout> | null = null;
+  private flushing: Promise<void> | null = null;
+
+  constructor() {
+    const prune = setInterval(() => {
+      this.prune(Date.now() - RETENTION_DAYS * 24 * 60 * 60 * 1000).catch((e) =>
+        console.error("[history] prune failed:", e?.message || e));
+    }, PRUNE_INTERVAL_MS);
+    prune.unref?.();
+  }
+
+  // Python event ids restart at 1 with every monitor process, so rows are keyed
+  // by (session, id). The relay starts a new session on every spawn.
+  newSession(): void {
+    this.session = String(Date.now());
+  }
+
+  recordCall(entry: any): void {
+    if (!entry || entry.id == null) return;
+    const key = `${this.session}:${entry.id}`;
+    const prev = this.pendingCalls.get(key);
+    this.pendingCalls.set(key, {
+      key,
+      ts_ms: prev?.ts_ms ?? Date.now(),
+      source_issi: String(entry.sourceId ?? ""),
+      target: String(entry.targetIssi ?? entry.targetTg ?? ""),
+      call_type: entry.callType === "private" ? "private" : "group",
+      is_local: entry.isLocal ? 1 : 0,
+      payload: JSON.stringify(entry),
+    });
+    this.scheduleFlush();
+  }
+
+  recordSds(entry: any): void {
+    if (!entry || entry.id == null) return;
+    const key = `${this.session}:${entry.id}`;
+    const prev = this.pendingSds.get(key);
+    this.pendingSds.set(key, {
+      key,
+      ts_ms: prev?.ts_ms ?? Date.now(),
+      src_issi: String(entry.srcIssi ?? ""),
+      dst_issi: String(entry.dstIssi ?? ""),
+      message_type: entry.messageType === "status" ? "status" : "data",
+      payload: JSON.stringify(entry),
+    });
+    this.scheduleFlush();
+  }
+
+  private scheduleFlush(): void {
+    if (this.pendingCalls.size + this.pendingSds.size >= FLUSH_BATCH_SIZE) {
+      this.flush();
+      return;
+    }
+    if (!this.flushTimer) {
+      this.flushTimer = setTimeout(() => this.flush(), FLUSH_INTERVAL_MS);
+    }
+  }
+
+  flush(): Promise<void> {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+    if (this.flushing) return this.flushing.then(() => this.flush());
+    if (this.pendingCalls.size === 0 && this.pendingSds.size === 0) return Promise.resolve();
+    const calls = Array.from(this.pendingCalls.values());
+    const sds = Array.from(this.pendingSds.values());
+    this.pendingCalls.clear();
+    this.pendingSds.clear();
+    this.flushing = this.writeBatch(calls, sds)
+      .catch((e) => console.error(`[history] batch of ${calls.length + sds.length} rows failed:`, e?.message || e))
+      .finally(() => { this.flushing = null; });
+    return this.flushing;
+  }
+
+  async queryCalls(q: HistoryQuery): Promise<HistoryPage> {
+    const where: string[] = [];
+    const params: any[] = [];
+    if (q.issi) { where.push("(source_issi = ? OR (call_type = 'private' AND target = ?))"); params.push(q.issi, q.issi); }
+    if (q.tg) { where.push("target = ? AND call_type = 'group'"); params.push(q.tg); }
+    if (q.type) { where.push("call_type = ?"); params.push(q.type); }
+    if (q.local !== undefined) { where.push("is_local = ?"); params.push(q.local ? 1 : 0); }
+    return this.page("call_history", where, params, q);
+  }
+
+  async querySds(q: HistoryQuery): Promise<HistoryPage> {
+    const where: string[] = [];
+    const params: any[] = [];
+    if (q.issi) { where.push("(src_issi = ? OR dst_issi = ?)"); params.push(q.issi, q.issi); }
+    if (q.tg) { where.push("dst_issi = ?"); params.push(q.tg); }
+    if (q.type) { where.push("message_type = ?"); params.push(q.type); }
+    return this.page("sds_history", where, params, q);
+  }
+
+  private async page(table: string, where: string[], params: any[], q: HistoryQuery): Promise<HistoryPage> {
+    // Rows still waiting for the next batch would be invisible to the query.
+    await this.flush();
+    const cursor = decodeCursor(q.cursor);
+    if (cursor !== null) { where.push("seq < ?"); params.push(cursor); }
+    if (q.from !== undefined) { where.push("ts_ms >= ?"); params.push(q.from); }
+    if (q.to !== undefined) { where.push("ts_ms < ?"); params.push(q.to); }
+    const limit = clampLimit(q.limit);
+    const sql = `SELECT seq, ts_ms, payload FROM ${table}`
+      + (where.length ? ` WHERE ${where.join(" AND ")}` : "")
+      + ` ORDER BY seq DESC LIMIT ${limit + 1}`;
+    const rows = await this.select(sql, params);
+    const items = rows.slice(0, limit).map((r) => ({ ...JSON.parse(r.payload), tsMs: Number(r.ts_ms) }));
+    const nextCursor = rows.length > limit ? encodeCursor(Number(rows[limit - 1].seq)) : null;
+    return { items, nextCursor };
+  }
+
+  private async prune(beforeMs: number): Promise<void> {
+    await this.flush();
+    await this.execute("DELETE FROM call_history WHERE ts_ms < ?", [beforeMs]);
+    await this.execute("DELETE FROM sds_history WHERE ts_ms < ?", [beforeMs]);
+  }
+
+  protected abstract writeBatch(calls: CallRow[], sds: SdsRow[]): Promise<void>;
+  protected abstract select(sql: string, params: any[]): Promise<any[]>;
+  protected abstract execute(sql: string, params: any[]): Promise<void>;
+}
+
+class SqliteHistoryStore extends BatchedHistoryStore {
+  private upsertCall: any;
+  private upsertSds: any;
+  private writeTx: (calls: CallRow[], sds: SdsRow[]) => void;
+
+  constructor(private db: any) {
+    super();
+    db.pragma("journal_mode = WAL");
+    db.pragma("synchronous = NORMAL");
+    for (const stmt of SCHEMA) db.exec(stmt.replace("%SERIAL%", "INTEGER"));
+    this.upsertCall = db.prepare(UPSERT_CALL);
+    this.upsertSds = db.prepare(UPSERT_SDS);
+    this.writeTx = db.transaction((calls: CallRow[], sds: SdsRow[]) => {
+      for (const r of calls) this.upsertCall.run(r.key, r.ts_ms, r.source_issi, r.target, r.call_type, r.is_local, r.payload);
+      for (const r of sds) this.upsertSds.run(r.key, r.ts_ms, r.src_issi, r.dst_issi, r.message_type, r.payload);
+    });
+  }
+
+  protected async writeBatch(calls: CallRow[], sds: SdsRow[]): Promise<void> {
+    this.writeTx(calls, sds);
+  }
+
+  protected async select(sql: string, params: any[]): Promise<any[]> {
+    return this.db.prepare(sql).all(...params);
+  }
+
+  protected async execute(sql: string, params: any[]): Promise<void> {
+    this.db.prepare(sql).run(...params);
+  }
+}
+
+// Postgres uses $1..$n placeholders; the shared SQL above is written with `?`.
+function toPg(sql: string): string {
+  let i = 0;
+  return sql.replace(/\?/g, () => `$${++i}`);
+}
+
+class PgHistoryStore extends BatchedHistoryStore {
+  private schema: Promise<void> | null = null;
+
+  constructor(private pool: pg.Pool) {
+    super();
+    // An idle client losing its connection is reported on the pool; unhandled, it would take the relay down.
+    pool.on("error", (e) => console.error("[history] Postgres connection error:", e?.message || e));
+    this.ensureSchema().catch(() => {});  // logged below; retried by the next batch or query
+  }
+
+  // Creates the tables once. A failure (database unreachable at startup, say)
+  // is logged and forgotten, so the next batch or query tries again.
+  private ensureSchema(): Promise<void> {
+    if (!this.schema) {
+      const pending = (async () => {
+        for (const stmt of SCHEMA) await this.pool.query(stmt.replace("%SERIAL%", "BIGSERIAL"));
+      })();
+      pending.catch((e) => {
+        console.error("[history] Postgres schema setup failed, will retry:", e?.message || e);
+        if (this.schema === pending) this.schema = null;
+      });
+      this.schema = pending;
+    }
+    return this.schema;
+  }
+
+  protected async writeBatch(calls: CallRow[], sds: SdsRow[]): Promise<void> {
+    await this.ensureSchema();
+    const client = await this.pool.connect();
+    try {
+      await client.query("BEGIN");
+      for (const r of calls) await client.query(toPg(UPSERT_CALL), [r.key, r.ts_ms, r.source_issi, r.target, r.call_type, r.is_local, r.payload]);
+      for (const r of sds) await client.query(toPg(UPSERT_SDS), [r.key, r.ts_ms, r.src_issi, r.dst_issi, r.message_type, r.payload]);
+      await client.query("COMMIT");
+    } catch (e) {
+      await client.query("ROLLBACK").catch(() => {});
+      throw e;
+    } finally {
+      client.release();
+    }
+  }
+
+  protected async select(sql: string, params: any[]): Promise<any[]> {
+    await this.ensureSchema();
+    const res = await this.pool.query(toPg(sql), params);
+    return res.rows;
+  }
+
+  protected async execute(sql: string, params: any[]): Promise<void> {
+    await this.ensureSchema();
+    await this.pool.query(toPg(sql), params);
+  }
+}
+
+class NullHistoryStore extends BatchedHistoryStore {
+  protected async writeBatch(): Promise<void> {}
+  protected async select(): Promise<any[]> { return []; }
+  protected async execute(): Promise<void> {}
+}
+
+export type HistoryStore = BatchedHistoryStore;
+
+export async function createHistoryStore(): Promise<HistoryStore> {
+  if (process.env.DATABASE_URL) {
+    console.log("[history] using Postgres (DATABASE_URL)");
+    return new PgHistoryStore(new pg.Pool({ connectionString: process.env.DATABASE_URL }));
+  }
+  const dbPath = process.env.HISTORY_DB_PATH || path.join(process.cwd(), "history.db");
+  try {
+    // Optional native module — absent on hosts where it could not be built.
+    const mod: any = await import("better-sqlite3");
+    const Database = mod.default ?? mod;
+    console.log(`[history] using SQLite at ${dbPath}`);
+    return new SqliteHistoryStore(new Database(dbPath));
+  } catch (e: any) {
+    console.warn(`[history] persistent history disabled (${e?.message || e})`);
+    return new NullHistoryStore();
+  }
+}
+
+export function parseHistoryQuery(query: Record<string, any>): HistoryQuery {
+  const str = (v: any) => (typeof v === "string" && /^[A-Za-z0-9_-]{1,32}$/.test(v) ? v : undefined);
+  const int = (v: any) => (typeof v === "string" && /^\d+$/.test(v) ? parseInt(v, 10) : undefined);
+  return {
+    issi: str(query.issi),
+    tg: str(query.tg),
+    type: str(query.type),
+    local: query.local === "1" ? true : query.local === "0" ? false : undefined,
+    from: int(query.from),
+    to: int(query.to),
+    cursor: typeof query.cursor === "string" ? query.cursor : undefined,
+    limit: int(query.limit),
+  };
+}
@@ -0,0 +1,182 @@
+import { spawn, execFileSync, type ChildProcess } from "child_process";
+import type { Response } from "express";
+
+// ── Shared journal tail for /api/log-stream ──────────────────────────────────
+// One `journalctl -f` per unit filter, no matter how many SSE clients watch it.
+// Lines land in a ring buffer with a monotonically increasing sequence number
+// (sent as the SSE `id`), and every subscriber keeps its own cursor into it: a
+// client whose socket is full (res.write() returned false) simply stops being
+// written to and catches up from the ring on 'drain'. If it falls further
+// behind than the ring holds, it gets a { gap } notice and resumes at the
+// oldest retained line. The tail is killed a few seconds after its last
+// subscriber leaves, so a page reload does not respawn journalctl.
+
+const RING_SIZE = 2000;
+const INITIAL_LINES = 50;
+const LINGER_MS = 5000;
+
+let journalctlAvailable: boolean | null = null;
+
+export function hasJournalctl(): boolean {
+  if (journalctlAvailable === null) {
+    try {
+      execFileSync("which", ["journalctl"], { stdio: "ignore" });
+      journalctlAvailable = true;
+    } catch {
+      journalctlAvailable = false;
+    }
+  }
+  return journalctlAvailable;
+}
+
+interface Subscriber {
+  res: Response;
+  cursor: number; // next seq to send
+  blocked: boolean;
+}
+
+class JournalTail {
+  private proc: ChildProcess | null = null;
+  private ring: string[] = [];
+  private firstSeq = 0; // seq of ring[0]
+  private subscribers = new Set<Subscriber>();
+  private lingerTimer: ReturnType<typeof setTimeout> | null = null;
+
+  constructor(readonly service: string, private onClosed: (tail: JournalTail) => void) {}
+
+  get nextSeq(): number {
+    return this.firstSeq + this.ring.length;
+  }
+
+  get subscriberCount(): number {
+    return this.subscribers.size;
+  }
+
+  start() {
+    const args = this.service
+      ? ["-u", this.service, "-f", "-n", String(INITIAL_LINES), "--no-pager"]
+      : ["-f", "-n", String(INITIAL_LINES), "--no-pager"];
+    const proc = spawn("journalctl", args, { stdio: ["ignore", "pipe", "pipe"] });
+    this.proc = proc;
+
+    let buf = "";
+    proc.stdout?.on("data", (chunk: Buffer) => {
+      buf += chunk.toString();
+      const lines = buf.split("\n");
+      buf = lines.pop() || "";
+      for (const line of lines) {
+        if (line.trim()) this.push(line);
+      }
+      this.pump();
+    });
+
+    proc.stderr?.on("data", (chunk: Buffer) => {
+      const text = chunk.toString().trim();
+      if (text) {
+        this.push(`[stderr] ${text}`);
+        this.pump();
+      }
+    });
+
+    proc.on("close", () => this.finish({ line: "[journalctl process ended]" }));
+    proc.on("error", (err) => this.finish({ error: err.message }));
+  }
+
+  // since: last seq the client already has (SSE Last-Event-ID or ?since=).
+  // Without it the client starts with the last INITIAL_LINES lines.
+  subscribe(res: Response, since?: number) {
+    if (this.lingerTimer) {
+      clearTimeout(this.lingerTimer);
+      this.lingerTimer = null;
+    }
+    const cursor = since !== undefined
+      ? Math.min(since + 1, this.nextSeq)
+      : Math.max(this.firstSeq, this.nextSeq - INITIAL_LINES);
+    const sub: Subscriber = { res, cursor, blocked: false };
+    this.subscribers.add(sub);
+    res.on("drain", () => {
+      sub.blocked = false;
+      this.send(sub);
+    });
+    res.on("close", () => this.unsubscribe(sub));
+    this.send(sub);
+  }
+
+  private unsubscribe(sub: Subscriber) {
+    if (!this.subscribers.delete(sub) || this.subscribers.size > 0) return;
+    this.lingerTimer = setTimeout(() => this.stop(), LINGER_MS);
+  }
+
+  private push(line: string) {
+    this.ring.push(line);
+    if (this.ring.length > RING_SIZE) {
+      this.ring.shift();
+      this.firstSeq++;
+    }
+  }
+
+  private pump() {
+    this.subscribers.forEach((sub) => {
+      if (!sub.blocked) this.send(sub);
+    });
+  }
+
+  private send(sub: Subscriber) {
+    if (sub.cursor < this.firstSeq) {
+      sub.res.write(`data: ${JSON.stringify({ gap: this.firstSeq - sub.cursor })}\n\n`);
+      sub.cursor = this.firstSeq;
+    }
+    while (sub.cursor < this.nextSeq) {
+      const seq = sub.cursor++;
+      const line = this.ring[seq - this.firstSeq];
+      if (!sub.res.write(`id: ${seq}\ndata: ${JSON.stringify({ line })}\n\n`)) {
+        sub.blocked = true;
+        return;
+      }
+    }
+  }
+
+  private finish(last: object) {
+    this.subscribers.forEach((sub) => {
+      this.send(sub);
+      sub.res.write(`data: ${JSON.stringify(last)}\n\n`);
+      sub.res.end();
+    });
+    this.subscribers.clear();
+    this.stop();
+  }
+
+  private stop() {
+    if (this.lingerTimer) {
+      clearTimeout(this.lingerTimer);
+      this.lingerTimer = null;
+    }
+    const proc = this.proc;
+    this.proc = null;
+    if (proc && proc.exitCode === null) proc.kill();
+    this.onClosed(this);
+  }
+}
+
+const tails = new Map<string, JournalTail>();
+
+// Attach an SSE response to the shared tail for `service` ('' = whole journal).
+export function subscribeJournal(service: string, res: Response, since?: number) {
+  let tail = tails.get(service);
+  if (!tail) {
+    tail = new JournalTail(service, (t) => {
+      if (tails.get(t.service) === t) tails.delete(t.service);
+    });
+    tails.set(service, tail);
+    tail.start();
+  }
+  tail.subscribe(res, since);
+}
+
+export function journalTailStats() {
+  return Array.from(tails.values()).map((t) => ({
+    service: t.service || null,
+    subscribers: t.subscriberCount,
+    nextSeq: t.nextSeq,
+  }));
+}
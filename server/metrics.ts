@@ -0,0 +1,145 @@
+// ── Prometheus /metrics ──────────────────────────────────────────────────────
+// Text exposition format 0.0.4, rendered at scrape time from counters the
+// relay already keeps plus the running totals the monitor sends in every
+// heartbeat. No client library: counters, gauges and fixed-bucket histograms
+// are all we need. Monitor counters start again from zero after a restart,
+// which rate()/increase() treat as a counter reset.
+
+import { LATENCY_BUCKETS, type LatencySummary } from "@shared/schema";
+
+export type Labels = Record<string, string | number>;
+
+function escapeLabel(v: string): string {
+  return v.replace(/\\/g, "\\\\").replace(/\n/g, "\\n").replace(/"/g, '\\"');
+}
+
+function labelText(labels?: Labels): string {
+  if (!labels) return "";
+  const parts = Object.entries(labels).map(([k, v]) => `${k}="${escapeLabel(String(v))}"`);
+  return parts.length ? `{${parts.join(",")}}` : "";
+}
+
+function valueText(v: number): string {
+  if (v === Infinity) return "+Inf";
+  if (v === -Infinity) return "-Inf";
+  return Number.isNaN(v) ? "NaN" : String(v);
+}
+
+export class Histogram {
+  readonly counts: number[];
+  sum = 0;
+
+  constructor(readonly buckets: number[]) {
+    this.counts = new Array(buckets.length + 1).fill(0);
+  }
+
+  observe(v: number) {
+    let i = 0;
+    while (i < this.buckets.length && v > this.buckets[i]) i++;
+    this.counts[i]++;
+    this.sum += v;
+  }
+}
+
+// One traced stage: a cumulative histogram for /metrics plus a ring of the
+// most recent samples, so the debug overlay shows percentiles of now rather
+// than of the whole uptime.
+const RECENT_SAMPLES = 1024;
+
+export class StageLatency {
+  readonly histogram = new Histogram(LATENCY_BUCKETS);
+  private recent = new Float64Array(RECENT_SAMPLES);
+  private recentCount = 0;
+
+  observe(seconds: number) {
+    const v = Math.max(0, seconds);  // clocks of different hosts can disagree a little
+    this.histogram.observe(v);
+    this.recent[this.recentCount++ % RECENT_SAMPLES] = v;
+  }
+
+  // Counts from a browser's trace_report; bucket bounds must match ours.
+  merge(le: unknown, counts: unknown, sum: unknown): boolean {
+    const h = this.histogram;
+    if (!Array.isArray(le) || le.length !== h.buckets.length || le.some((v, i) => v !== h.buckets[i])) return false;
+    if (!Array.isArray(counts) || counts.length !== h.counts.length || typeof sum !== "number") return false;
+    if (!counts.every(c => Number.isInteger(c) && c >= 0)) return false;
+    counts.forEach((c, i) => { h.counts[i] += c; });
+    h.sum += Math.max(0, sum);
+    return true;
+  }
+
+  summary(): LatencySummary {
+    const count = this.histogram.counts.reduce((a, b) => a + b, 0);
+    const n = Math.min(this.recentCount, RECENT_SAMPLES);
+    if (!n) return { count, p50Ms: null, p95Ms: null, p99Ms: null, maxMs: null };
+    const sorted = this.recent.slice(0, n).sort();
+    const at = (q: number) => Math.round(sorted[Math.min(n - 1, Math.floor(q * n))] * 1e4) / 10;
+    return { count, p50Ms: at(0.5), p95Ms: at(0.95), p99Ms: at(0.99), maxMs: at(1) };
+  }
+}
+
+// Samples are grouped under their family whatever order they are added in, as
+// the format requires.
+export class Exposition {
+  private families = new Map<string, string[]>();
+  private current: string[] = [];
+
+  private declare(name: string, type: string, help: string) {
+    let lines = this.families.get(name);
+    if (!lines) {
+      lines = [`# HELP ${name} ${help}`, `# TYPE ${name} ${type}`];
+      this.families.set(name, lines);
+    }
+    this.current = lines;
+  }
+
+  private sample(name: string, value: number, labels?: Labels) {
+    this.current.push(`${name}${labelText(labels)} ${valueText(value)}`);
+  }
+
+  counter(name: string, help: string, value: number | null | undefined, labels?: Labels) {
+    this.declare(name, "counter", help);
+    if (value != null) this.sample(name, value, labels);
+  }
+
+  gauge(name: string, help: string, value: number | null | undefined, labels?: Labels) {
+    this.declare(name, "gauge", help);
+    if (value != null) this.sample(name, value, labels);
+  }
+
+  // counts are per bucket (not cumulative), one more than buckets: the last is +Inf.
+  histogram(name: string, help: string, buckets: number[], counts: number[], sum: number, labels?: Labels) {
+    this.declare(name, "histogram", help);
+    let total = 0;
+    buckets.forEach((le, i) => {
+      total += counts[i] ?? 0;
+      this.sample(`${name}_bucket`, total, { ...labels, le });
+    });
+    total += counts[buckets.length] ?? 0;
+    this.sample(`${name}_bucket`, total, { ...labels, le: "+Inf" });
+    this.sample(`${name}_sum`, sum, labels);
+    this.sample(`${name}_count`, total, labels);
+  }
+
+  text(): string {
+    return Array.from(this.families.values(), lines => lines.join("\n")).join("\n") + "\n";
+  }
+}
+
+// Event-loop lag: how late a LAG_PROBE_MS timer fires. A blocked loop shows
+// up as one long sample when it frees up, which is what a histogram wants.
+const LAG_PROBE_MS = 500;
+export const LAG_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5];
+
+export function startLoopLagProbe(): { histogram: Histogram; lastSeconds: () => number } {
+  const histogram = new Histogram(LAG_BUCKETS);
+  let last = 0;
+  let expected = Date.now() + LAG_PROBE_MS;
+  setInterval(() => {
+    const now = Date.now();
+    last = Math.max(0, now - expected) / 1000;
+    histogram.observe(last);
+    expected = now + LAG_PROBE_MS;
+  }, LAG_PROBE_MS).unref();
+  return { histogram, lastSeconds: () => last };
+}
@@ -7,6 +7,11 @@ import { spawn, exec, execSync, type ChildProcess } from "child_process";
 import * as path from "path";
 import * as fs from "fs";
 import * as os from "os";
+import { createHistoryStore, parseHistoryQuery } from "./history";
+import { hasJournalctl, subscribeJournal, journalTailStats } from "./journalTail";
+import { TelemetrySampler } from "./telemetry";
+import { Exposition, StageLatency, startLoopLagProbe } from "./metrics";
+import { LATENCY_STAGES, type LatencyStage } from "@shared/schema";
 
 let pythonProcess: ChildProcess | null = null;
 const startTime = Date.now();
@@ -50,40 +55,6 @@ function getLocalIp(): string | null {
   return null;
 }
 
-function getVoltage(): number | null {
-  // 1) Pi 5 PMIC: vcgencmd pmic_read_adc EXT5V_V → "EXT5V_V 5.0670V"
-  try {
-    const out = execSync("vcgencmd pmic_read_adc EXT5V_V 2>/dev/null", { timeout: 2000 }).toString().trim();
-    const m = out.match(/([\d.]+)V/);
-    if (m) {
-      const v = parseFloat(m[1]);
-      if (v > 1) return Math.round(v * 100) / 100;
-    }
-  } catch {}
-
-  // 2) Kernel power supply subsystem (values in µV, only accept > 1V supply rails)
-  const preferredSources = ["rpi_supply", "ac", "usb", "BAT0", "BAT1"];
-  try {
-    for (const src of preferredSources) {
-      const vPath = `/sys/class/power_supply/${src}/voltage_now`;
-      if (fs.existsSync(vPath)) {
-        const volts = parseInt(fs.readFileSync(vPath, "utf-8").trim()) / 1_000_000;
-        if (volts > 1) return Math.round(volts * 100) / 100;
-      }
-    }
-    const dirs = fs.readdirSync("/sys/class/power_supply");
-    for (const d of dirs) {
-      const vPath = `/sys/class/power_supply/${d}/voltage_now`;
-      if (fs.existsSync(vPath)) {
-        const volts = parseInt(fs.readFileSync(vPath, "utf-8").trim()) / 1_000_000;
-        if (volts > 1) return Math.round(volts * 100) / 100;
-      }
-    }
-  } catch {}
-
-  return null;
-}
-
 export async function registerRoutes(
   httpServer: Server,
   app: Express
@@ -97,51 +68,37 @@ export async function registerRoutes(
     });
   });
 
-  app.get(api.system.stats.path, async (_req, res) => {
-    let cpuTemp: number | null = null;
-    let cpuLoad: number | null = null;
+  // Started at the end of registerRoutes, once the counters it reads exist.
+  const telemetry = new TelemetrySampler(() => ({
+    monitorLagMs: monitorStatus.heartbeat?.lagMs ?? null,
+    monitorLines: monitorStatus.heartbeat?.lines ?? null,
+    events: eventsBroadcast,
+    wsClients: channels.size,
+  }));
 
-    try {
-      const tempPath = "/sys/class/thermal/thermal_zone0/temp";
-      if (fs.existsSync(tempPath)) {
-        const raw = fs.readFileSync(tempPath, "utf-8").trim();
-        cpuTemp = Math.round(parseInt(raw) / 1000 * 10) / 10;
-      }
-    } catch {}
-
-    try {
-      const cpus = os.cpus();
-      const loadAvg = os.loadavg();
-      cpuLoad = Math.round((loadAvg[0] / cpus.length) * 100);
-      if (cpuLoad > 100) cpuLoad = 100;
-    } catch {}
-
-    let memTotal = 0;
-    let memAvailable = 0;
-    try {
-      const memInfo = fs.readFileSync("/proc/meminfo", "utf-8");
-      const totalMatch = memInfo.match(/MemTotal:\s+(\d+)/);
-      const availMatch = memInfo.match(/MemAvailable:\s+(\d+)/);
-      if (totalMatch) memTotal = parseInt(totalMatch[1]);
-      if (availMatch) memAvailable = parseInt(availMatch[1]);
-    } catch {}
-
-    const memUsed = memTotal > 0 ? Math.round(((memTotal - memAvailable) / memTotal) * 100) : null;
-    const localIp = getLocalIp();
-    const publicIp = await fetchPublicIp();
-    const voltage = getVoltage();
+  app.get(api.system.stats.path, async (_req, res) => {
+    const s = telemetry.latest();
+    // The public IP is cached for 5 minutes; only the very first request waits for it.
+    const publicIp = cachedPublicIp ?? await fetchPublicIp();
+    if (cachedPublicIp) void fetchPublicIp();
 
     res.json({
-      cpuTemp,
-      cpuLoad,
-      memUsed,
-      localIp,
+      cpuTemp: s?.cpuTemp ?? null,
+      cpuLoad: s?.cpuLoad ?? null,
+      memUsed: s?.memUsed ?? null,
+      localIp: getLocalIp(),
       publicIp,
-      voltage,
+      voltage: s?.voltage ?? null,
       hostname: os.hostname(),
     });
   });
 
+  app.get(api.system.history.path, (req, res) => {
+    const range = Math.min(Math.max(parseInt(String(req.query.range ?? '3600'), 10) || 3600, 60), 86400);
+    const points = Math.min(Math.max(parseInt(String(req.query.points ?? '120'), 10) || 120, 1), 1000);
+    res.json(telemetry.history(range, points));
+  });
+
   function getSystemPassword(): string {
     try {
       const configPath = path.join(process.cwd(), "config.json");
@@ -4294,66 +4251,34 @@ ${restartLine}
       'X-Accel-Buffering': 'no',
     });
 
-    let journalProcess: ChildProcess | null = null;
-    let hasJournalctl = false;
-
-    try {
-      execSync('which journalctl', { stdio: 'ignore' });
-      hasJournalctl = true;
-    } catch {}
-
-    if (hasJournalctl) {
-      const serviceName = typeof req.query.service === 'string' && /^[a-zA-Z0-9._@-]+$/.test(req.query.service)
-        ? req.query.service
-        : '';
-      const args = serviceName
-        ? ['-u', serviceName, '-f', '-n', '50', '--no-pager']
-        : ['-f', '-n', '50', '--no-pager'];
-      journalProcess = spawn('journalctl', args, {
-        stdio: ['ignore', 'pipe', 'pipe'],
-      });
-
-      let buf = '';
-      journalProcess.stdout?.on('data', (chunk: Buffer) => {
-        buf += chunk.toString();
-        const lines = buf.split('\n');
-        buf = lines.pop() || '';
-        for (const line of lines) {
-          if (line.trim()) {
-            res.write(`data: ${JSON.stringify({ line })}\n\n`);
-          }
-        }
-      });
-
-      journalProcess.stderr?.on('data', (chunk: Buffer) => {
-        const text = chunk.toString().trim();
-        if (text) {
-          res.write(`data: ${JSON.stringify({ line: `[stderr] ${text}` })}\n\n`);
-        }
-      });
-
-      journalProcess.on('close', () => {
-        res.write(`data: ${JSON.stringify({ line: "[journalctl process ended]" })}\n\n`);
-        res.end();
-      });
-
-      journalProcess.on('error', (err) => {
-        res.write(`data: ${JSON.stringify({ error: err.message })}\n\n`);
-        res.end();
-      });
-    } else {
+    if (!hasJournalctl()) {
       res.write(`data: ${JSON.stringify({ demo: true })}\n\n`);
+      return;
     }
 
-    req.on('close', () => {
-      if (journalProcess) {
-        journalProcess.kill();
-        journalProcess = null;
-      }
-    });
+    const serviceName = typeof req.query.service === 'string' && /^[a-zA-Z0-9._@-]+$/.test(req.query.service)
+      ? req.query.service
+      : '';
+    // Resume point: EventSource sends Last-Event-ID on reconnect; ?since= for explicit replay.
+    const resumeFrom = req.header('last-event-id') ?? (typeof req.query.since === 'string' ? req.query.since : undefined);
+    const since = resumeFrom !== undefined && /^\d+$/.test(resumeFrom) ? parseInt(resumeFrom, 10) : undefined;
+    subscribeJournal(serviceName, res, since);
+  });
+
+  app.get('/api/log-stream/status', (_req, res) => {
+    res.json({ tails: journalTailStats() });
   });
 
-  const wss = new WebSocketServer({ noServer: true });
+  // permessage-deflate is negotiated with clients that offer it (all browsers).
+  // Frames under 1 KiB go out uncompressed; WS_DEFLATE=0 turns it off.
+  const wss = new WebSocketServer({
+    noServer: true,
+    perMessageDeflate: process.env.WS_DEFLATE === '0' ? false : {
+      threshold: 1024,
+      zlibDeflateOptions: { level: 3 },
+      concurrencyLimit: 4,
+    },
+  });
   httpServer.on("upgrade", (req, socket, head) => {
     if (req.url === "/ws" || req.url?.startsWith("/ws?")) {
       wss.handleUpgrade(req, socket as any, head, (ws) => {
@@ -4362,14 +4287,333 @@ ${restartLine}
     }
   });
 
+  // ── Per-client outbound queues (backpressure) ─────────────────────────────
+  // Frames go straight to the socket while its bufferedAmount is below the
+  // high-water mark. Past that they wait in a per-client queue drained by a
+  // shared timer. A queue that keeps growing is coalesced (latest terminal per
+  // ISSI, latest snapshot-style event per type); if that is not enough the
+  // client is dropped back to a single fresh full_state once it catches up.
+  // Clients connected with ?batch=1 always queue: each drain tick packs the
+  // queue into one {"type":"batch","payload":[...]} frame. A full_state goes
+  // out as full_state_begin / full_state_chunk (WS_SNAPSHOT_CHUNK terminals
+  // each, serialised as they are sent) / full_state_end frames held in
+  // ch.snapshot, sent under the same high-water mark and always ahead of the
+  // queue.
+  // Urgent events (the monitor's "priority":"high" lines and URGENT_TYPES) skip
+  // all of it and are sent at once, even to a client waiting for a resync: the
+  // relay applies an event before broadcasting it and a snapshot is built and
+  // its begin frame sent in one drain call, so an urgent frame either is
+  // already in the client's state or lands after full_state_begin.
+  const WS_HIGH_WATER = 256 * 1024;
+  const WS_QUEUE_COALESCE = 500;
+  const WS_QUEUE_RESYNC = 2000;
+  const WS_DRAIN_MS = 50;
+  const WS_BATCH_MAX = 500;
+  const WS_SNAPSHOT_CHUNK = 200;
+  // Events that fully replace the previous one of the same type.
+  const LATEST_ONLY_TYPES = new Set(['rf_calls_state', 'fs_dashboard_status', 'fs_emergency', 'fs_brew_status', 'fs_last_heard', 'fs_tx_quality', 'fs_health', 'fs_sdr_health', 'fs_sys_health', 'rf_ts_voice', 'airtime_stats', 'system_stats']);
+  // Both Python (json.dumps) and the relay (JSON.stringify) write "type" first.
+  const EVENT_TYPE_RE = /^\{"type":\s*"([A-Za-z0-9_]+)"/;
+  const TERMINAL_ID_RE = /"payload":\s*\{"id":\s*"([^"]+)"/;
+  // tetra_monitor.emit(..., urgent=True) writes "priority" right after "type".
+  const PRIORITY_RE = /^\{"type":\s*"[A-Za-z0-9_]+",\s*"priority":\s*"high"/;
+  const URGENT_TYPES = new Set(['fs_emergency']);
+
+  // ── Topic subscriptions ───────────────────────────────────────────────────
+  // Clients pick topics on connect (/ws?topics=terminals,gps&tg=..&issi=..) or
+  // later with {"type":"subscribe",...}. No topics means everything. Event types
+  // not listed here (status, ...) go to every client.
+  const WS_TOPICS = ['terminals', 'calls', 'sds', 'gps', 'rf', 'flowstation', 'stats', 'system'];
+  const EVENT_TOPIC: Record<string, string> = {
+    update_terminal: 'terminals', remove_terminal: 'terminals',
+    new_call: 'calls', update_call: 'calls',
+    sds_message: 'sds',
+    rf_call_started: 'rf', rf_call_ended: 'rf', rf_calls_state: 'rf', rf_ts_voice: 'rf', fs_dashboard_status: 'rf',
+    fs_emergency: 'flowstation', fs_brew_status: 'flowstation', fs_last_heard: 'flowstation', fs_tx_quality: 'flowstation',
+    fs_health: 'flowstation', fs_sdr_health: 'flowstation', fs_sys_health: 'flowstation',
+    airtime_stats: 'stats',
+    system_stats: 'system',
+  };
+  // Types whose payload carries an ISSI/TG and can be narrowed by the tg/issi filter.
+  const FILTERABLE_TYPES = new Set(['update_terminal', 'new_call', 'update_call', 'sds_message']);
+
+  interface Subscription {
+    topics: Set<string>;
+    tgs: Set<string> | null;
+    issis: Set<string> | null;
+    stations: Set<string> | null;
+  }
+
+  function toList(v: unknown): string[] {
+    if (Array.isArray(v)) return v.flatMap(toList);
+    if (v == null || v === '') return [];
+    return String(v).split(',').map(x => x.trim()).filter(Boolean);
+  }
+
+  function parseSubscription(src: { topics?: unknown; tg?: unknown; issi?: unknown; station?: unknown }): Subscription {
+    const topics = toList(src.topics).filter(t => WS_TOPICS.includes(t));
+    const tgs = toList(src.tg);
+    const issis = toList(src.issi);
+    const stations = toList(src.station);
+    return {
+      topics: new Set(topics.length ? topics : WS_TOPICS),
+      tgs: tgs.length ? new Set(tgs) : null,
+      issis: issis.length ? new Set(issis) : null,
+      stations: stations.length ? new Set(stations) : null,
+    };
+  }
+
+  function hasFilter(sub: Subscription): boolean {
+    return !!(sub.tgs || sub.issis || sub.stations);
+  }
+
+  function isFullSubscription(sub: Subscription): boolean {
+    return sub.topics.size === WS_TOPICS.length && !hasFilter(sub);
+  }
+
+  function hasAny(set: Set<string> | null, ...ids: unknown[]): boolean {
+    return !!set && ids.some(id => id != null && set.has(String(id)));
+  }
+
+  function terminalMatches(sub: Subscription, t: any): boolean {
+    return hasAny(sub.issis, t?.id) || hasAny(sub.tgs, t?.selectedTg, t?.activityTg, ...(t?.groups ?? []));
+  }
+
+  function callMatches(sub: Subscription, c: any): boolean {
+    return hasAny(sub.issis, c?.sourceId, c?.targetIssi) || (c?.callType !== 'private' && hasAny(sub.tgs, c?.targetTg));
+  }
+
+  function sdsMatches(sub: Subscription, m: any): boolean {
+    return hasAny(sub.issis, m?.srcIssi, m?.dstIssi) || hasAny(sub.tgs, m?.dstIssi);
+  }
+
+  // Multi-station monitors tag entries with "station"; merged terminals also list "stations".
+  function stationMatches(sub: Subscription, p: any): boolean {
+    return !sub.stations || hasAny(sub.stations, p?.station, ...(p?.stations ?? []));
+  }
+
+  function payloadMatches(sub: Subscription, type: string, payload: any): boolean {
+    if (!hasFilter(sub)) return true;
+    if (payload == null || !stationMatches(sub, payload)) return false;
+    if (!sub.tgs && !sub.issis) return true;
+    if (type === 'update_terminal') return terminalMatches(sub, payload);
+    if (type === 'sds_message') return sdsMatches(sub, payload);
+    return callMatches(sub, payload);
+  }
+
+  // Whether a subscriber wants this event. The payload is only parsed (once per
+  // broadcast, shared by all clients) when a filtered client needs it.
+  function wants(sub: Subscription, msg: Outbound, payload: () => any): boolean {
+    const topic = EVENT_TOPIC[msg.type];
+    if (topic === undefined) return true;
+    if (msg.type === 'sds_message') {
+      // LIP reports also feed the gps topic; there only the issi filter applies.
+      if (sub.topics.has('sds') && payloadMatches(sub, msg.type, payload())) return true;
+      return sub.topics.has('gps') && msg.data.includes('"lipData"')
+        && (!sub.issis || hasAny(sub.issis, payload()?.srcIssi))
+        && (!sub.stations || stationMatches(sub, payload()));
+    }
+    if (!sub.topics.has(topic)) return false;
+    if (!FILTERABLE_TYPES.has(msg.type)) return true;
+    return payloadMatches(sub, msg.type, payload());
+  }
+
+  interface Outbound { type: string; data: string; urgent: boolean; }
+  interface ClientChannel {
+    id: number;
+    remote: string;
+    sub: Subscription;
+    batch: boolean;
+    connectedAt: number;
+    queue: Outbound[];
+    resync: boolean;
+    sent: number;
+    drops: number;
+    coalesced: number;
+    resyncs: number;
+    peakQueue: number;
+    frames: number;
+    bytes: number;
+    urgent: number;
+    snapshot: Snapshot | null;  // full_state being sent, ahead of the queue
+    snapshotAt: number;
+  }
+  const channels = new Map<WebSocket, ClientChannel>();
+  let nextChannelId = 1;
+
+  function terminalIdOf(data: string): string | null {
+    const m = TERMINAL_ID_RE.exec(data);
+    if (m) return m[1];
+    try { return String(JSON.parse(data).payload?.id ?? '') || null; } catch { return null; }
+  }
+
+  function coalesceQueue(ch: ClientChannel) {
+    const seenTerminals = new Set<string>();
+    const seenTypes = new Set<string>();
+    const kept: Outbound[] = [];
+    for (let i = ch.queue.length - 1; i >= 0; i--) {
+      const msg = ch.queue[i];
+      if (msg.type === 'update_terminal' || msg.type === 'remove_terminal') {
+        // The newest update or removal of a terminal supersedes older ones.
+        const id = terminalIdOf(msg.data);
+        if (id) {
+          if (seenTerminals.has(id)) continue;
+          seenTerminals.add(id);
+        }
+      } else if (LATEST_ONLY_TYPES.has(msg.type)) {
+        if (seenTypes.has(msg.type)) continue;
+        seenTypes.add(msg.type);
+      }
+      kept.push(msg);
+    }
+    kept.reverse();
+    ch.coalesced += ch.queue.length - kept.length;
+    ch.queue = kept;
+  }
+
+  // Totals across every client ever connected, for /metrics (per-channel counts go with the channel).
+  const wsTotals = { frames: 0, bytes: 0, urgent: 0 };
+
+  function sendFrame(ws: WebSocket, ch: ClientChannel, data: string, events = 1) {
+    ws.send(data);
+    ch.sent += events;
+    ch.frames++;
+    ch.bytes += data.length;
+    wsTotals.frames++;
+    wsTotals.bytes += data.length;
+  }
+
+  function enqueue(ws: WebSocket, ch: ClientChannel, msg: Outbound) {
+    if (msg.urgent) {
+      sendFrame(ws, ch, msg.data);
+      ch.urgent++;
+      wsTotals.urgent++;
+      return;
+    }
+    if (ch.resync) {
+      ch.drops++;
+      return;
+    }
+    if (!ch.batch && ch.queue.length === 0 && !ch.snapshot && ws.bufferedAmount < WS_HIGH_WATER) {
+      sendFrame(ws, ch, msg.data);
+      return;
+    }
+    ch.queue.push(msg);
+    if (ch.queue.length > WS_QUEUE_COALESCE) coalesceQueue(ch);
+    if (ch.queue.length > WS_QUEUE_RESYNC) {
+      ch.drops += ch.queue.length;
+      ch.queue = [];
+      ch.resync = true;
+      ch.resyncs++;
+    }
+    ch.peakQueue = Math.max(ch.peakQueue, ch.queue.length);
+  }
+
+  function drainChannel(ws: WebSocket, ch: ClientChannel) {
+    if (ws.readyState !== WebSocket.OPEN) return;
+    if (ch.resync) {
+      if (ws.bufferedAmount >= WS_HIGH_WATER) return;
+      ch.resync = false;
+      ch.snapshot = buildFullState(ch.sub);
+      ch.snapshotAt = 0;
+    }
+    // ch.snapshot may be the cached snapshot itself, shared with other clients.
+    const snap = ch.snapshot;
+    if (snap) {
+      while (ch.snapshotAt < snapshotLength(snap) && ws.bufferedAmount < WS_HIGH_WATER) {
+        sendFrame(ws, ch, snapshotFrame(snap, ch.snapshotAt++));
+      }
+      if (ch.snapshotAt < snapshotLength(snap)) return;
+      ch.snapshot = null;
+      ch.snapshotAt = 0;
+    }
+    if (ch.batch) {
+      // Events are already serialised; splice them into the batch frame as-is.
+      while (ch.queue.length && ws.bufferedAmount < WS_HIGH_WATER) {
+        const part = ch.queue.splice(0, WS_BATCH_MAX);
+        if (part.length === 1) sendFrame(ws, ch, part[0].data);
+        else sendFrame(ws, ch, `{"type":"batch","payload":[${part.map(m => m.data).join(',')}]}`, part.length);
+      }
+      return;
+    }
+    while (ch.queue.length && ws.bufferedAmount < WS_HIGH_WATER) {
+      sendFrame(ws, ch, ch.queue.shift()!.data);
+    }
+  }
+
+  function drainChannels() {
+    channels.forEach((ch, ws) => drainChannel(ws, ch));
+  }
+  setInterval(drainChannels, WS_DRAIN_MS).unref();
+
+  let eventsBroadcast = 0;
+  const eventsBroadcastByType = new Map<string, number>();
+
   function broadcast(data: string) {
-    wss.clients.forEach(client => {
-      if (client.readyState === WebSocket.OPEN) {
-        client.send(data);
+    const type = EVENT_TYPE_RE.exec(data)?.[1] ?? '';
+    eventsBroadcast++;
+    eventsBroadcastByType.set(type, (eventsBroadcastByType.get(type) ?? 0) + 1);
+    invalidateSnapshot(type);
+    const msg: Outbound = { type, data, urgent: URGENT_TYPES.has(type) || PRIORITY_RE.test(data) };
+    let parsed: { payload: any } | undefined;
+    const payload = () => {
+      if (!parsed) {
+        try { parsed = { payload: JSON.parse(data).payload ?? null }; } catch { parsed = { payload: null }; }
       }
+      return parsed.payload;
+    };
+    channels.forEach((ch, ws) => {
+      if (ws.readyState === WebSocket.OPEN && wants(ch.sub, msg, payload)) enqueue(ws, ch, msg);
     });
   }
 
+  app.get('/api/ws/metrics', (_req, res) => {
+    const now = Date.now();
+    const clients = Array.from(channels.entries()).map(([ws, ch]) => {
+      const secs = Math.max(1, (now - ch.connectedAt) / 1000);
+      // Bytes on the wire (after permessage-deflate, plus framing) vs. JSON handed to ws.send.
+      const wireBytes: number = (ws as any)._socket?.bytesWritten ?? 0;
+      return {
+        id: ch.id,
+        remote: ch.remote,
+        topics: Array.from(ch.sub.topics),
+        tg: ch.sub.tgs ? Array.from(ch.sub.tgs) : null,
+        issi: ch.sub.issis ? Array.from(ch.sub.issis) : null,
+        station: ch.sub.stations ? Array.from(ch.sub.stations) : null,
+        batch: ch.batch,
+        deflate: ws.extensions.includes('permessage-deflate'),
+        queueDepth: ch.queue.length,
+        peakQueueDepth: ch.peakQueue,
+        bufferedBytes: ws.bufferedAmount,
+        sent: ch.sent,
+        frames: ch.frames,
+        payloadBytes: ch.bytes,
+        wireBytes,
+        payloadBytesPerSec: Math.round(ch.bytes / secs),
+        wireBytesPerSec: Math.round(wireBytes / secs),
+        drops: ch.drops,
+        coalesced: ch.coalesced,
+        resyncs: ch.resyncs,
+        urgent: ch.urgent,
+        resyncPending: ch.resync,
+      };
+    });
+    res.json({
+      clients,
+      totals: {
+        clients: clients.length,
+        queueDepth: clients.reduce((a, c) => a + c.queueDepth, 0),
+        drops: clients.reduce((a, c) => a + c.drops, 0),
+        coalesced: clients.reduce((a, c) => a + c.coalesced, 0),
+        resyncs: clients.reduce((a, c) => a + c.resyncs, 0),
+        urgent: clients.reduce((a, c) => a + c.urgent, 0),
+        payloadBytesPerSec: clients.reduce((a, c) => a + c.payloadBytesPerSec, 0),
+        wireBytesPerSec: clients.reduce((a, c) => a + c.wireBytesPerSec, 0),
+      },
+      snapshot: snapshotStats,
+    });
+  });
+
   const MAX_GPS_HISTORY = 200; // max track points per ISSI
 
   const currentState: {
@@ -4381,16 +4625,228 @@ ${restartLine}
     gpsHistory: Record<string, any[]>;
   } = { terminals: {}, localHistory: [], externalHistory: [], sdsMessages: [], gpsPositions: {}, gpsHistory: {} };
   const MAX_HISTORY = 50;
+  // Station names when the monitor runs several sources (TETRA_SOURCES); [] for a single station.
+  let monitorStations: string[] = [];
+
+  // ── Cached full_state snapshot ────────────────────────────────────────────
+  // Each payload field is serialised on its own and reused until an event that
+  // can change it goes through broadcast() — every state change in the relay,
+  // and every Python state event, is followed by one. A reconnect storm then
+  // costs one string concatenation per client instead of a full JSON.stringify.
+  const SNAPSHOT_FIELDS: Array<[field: string, topic: string, get: () => unknown]> = [
+    ['stations', 'terminals', () => monitorStations],
+    ['terminals', 'terminals', () => currentState.terminals],
+    ['localHistory', 'calls', () => currentState.localHistory],
+    ['externalHistory', 'calls', () => currentState.externalHistory],
+    ['sdsMessages', 'sds', () => currentState.sdsMessages],
+    ['gpsPositions', 'gps', () => currentState.gpsPositions],
+    ['gpsHistory', 'gps', () => currentState.gpsHistory],
+    ['rfCalls', 'rf', () => rfCallsSnapshot()],
+    ['fsDashboardActive', 'rf', () => fsDashboardActive],
+    ['emergencies', 'flowstation', () => fsEmergencyList()],
+    ['brewStatus', 'flowstation', () => fsBrew],
+    ['lastHeard', 'flowstation', () => fsLastHeard],
+    ['txQuality', 'flowstation', () => fsTxQuality],
+    ['health', 'flowstation', () => fsHealth],
+    ['sdrHealth', 'flowstation', () => fsSdrHealth],
+    ['sysHealth', 'flowstation', () => fsSysHealth],
+  ];
+  // Snapshot fields each broadcast event type can change.
+  const EVENT_SNAPSHOT_FIELDS: Record<string, string[]> = {
+    full_state: SNAPSHOT_FIELDS.map(([f]) => f),
+    status: ['stations'],
+    update_terminal: ['terminals'],
+    remove_terminal: ['terminals'],
+    new_call: ['localHistory', 'externalHistory'],
+    update_call: ['localHistory', 'externalHistory'],
+    sds_message: ['sdsMessages', 'gpsPositions', 'gpsHistory'],
+    rf_call_started: ['rfCalls'],
+    rf_call_ended: ['rfCalls'],
+    rf_calls_state: ['rfCalls'],
+    fs_dashboard_status: ['fsDashboardActive'],
+    fs_emergency: ['emergencies'],
+    fs_brew_status: ['brewStatus'],
+    fs_last_heard: ['lastHeard'],
+    fs_tx_quality: ['txQuality'],
+    fs_health: ['health'],
+    fs_sdr_health: ['sdrHealth'],
+    fs_sys_health: ['sysHealth'],
+  };
+  // The terminals field is cached as its (lazily serialised) chunks instead.
+  const snapshotFieldJson = new Map<string, string>();
+  let snapshotTerminals: TerminalChunks | null = null;
+  let snapshotFull: Snapshot | null = null;
+  const snapshotStats = { version: 0, builds: 0, cacheHits: 0, fieldSerialisations: 0, chunkSerialisations: 0 };
+
+  function invalidateSnapshot(type: string) {
+    const fields = EVENT_SNAPSHOT_FIELDS[type];
+    if (!fields) return;
+    for (const f of fields) snapshotFieldJson.delete(f);
+    if (fields.includes('terminals')) snapshotTerminals = null;
+    snapshotFull = null;
+    snapshotStats.version++;
+  }
+
+  // Terminal chunk frames of a snapshot. The ids are fixed when the snapshot is
+  // built, but a chunk is only serialised when the first client sending it gets
+  // there (drainChannel), and then kept for every client sharing it: a resync
+  // costs nothing up front and a client that drops off mid-way never pays for
+  // the rest. A late chunk carries its terminals as they are by then and skips
+  // those removed since; the events queued behind the snapshot cover the rest.
+  interface TerminalChunks {
+    terminals: Record<string, unknown>;
+    ids: string[];
+    frames: Array<string | undefined>;
+  }
+  interface Snapshot {
+    begin: string;
+    chunks: TerminalChunks;
+    end: string;
+  }
+
+  function terminalChunks(terminals: Record<string, unknown>): TerminalChunks {
+    const ids = Object.keys(terminals);
+    return { terminals, ids, frames: new Array(Math.ceil(ids.length / WS_SNAPSHOT_CHUNK)) };
+  }
+
+  // begin (serialised "field":json parts) + terminal chunks + end.
+  function makeSnapshot(parts: string[], chunks: TerminalChunks): Snapshot {
+    const terminalCount = chunks.ids.length;
+    parts.push(`"terminalCount":${terminalCount}`);
+    return {
+      begin: `{"type":"full_state_begin","payload":{${parts.join(',')}}}`,
+      chunks,
+      end: `{"type":"full_state_end","payload":{"terminalCount":${terminalCount}}}`,
+    };
+  }
+
+  function snapshotLength(snap: Snapshot): number {
+    return snap.chunks.frames.length + 2;
+  }
+
+  function snapshotFrame(snap: Snapshot, i: number): string {
+    const { terminals, ids, frames } = snap.chunks;
+    if (i === 0) return snap.begin;
+    if (i > frames.length) return snap.end;
+    let frame = frames[i - 1];
+    if (frame === undefined) {
+      const chunk: Record<string, unknown> = {};
+      for (const id of ids.slice((i - 1) * WS_SNAPSHOT_CHUNK, i * WS_SNAPSHOT_CHUNK)) {
+        if (terminals[id] !== undefined) chunk[id] = terminals[id];
+      }
+      frame = frames[i - 1] = `{"type":"full_state_chunk","payload":{"terminals":${JSON.stringify(chunk)}}}`;
+      snapshotStats.chunkSerialisations++;
+    }
+    return frame;
+  }
+
+  function assembleSnapshot(fields: Array<[string, string, () => unknown]>): Snapshot {
+    const parts: string[] = [];
+    let chunks = terminalChunks({});
+    for (const [field, , get] of fields) {
+      if (field === 'terminals') {
+        if (!snapshotTerminals) snapshotTerminals = terminalChunks(currentState.terminals);
+        chunks = snapshotTerminals;
+        continue;
+      }
+      let json = snapshotFieldJson.get(field);
+      if (json === undefined) {
+        json = JSON.stringify(get()) ?? 'null';
+        snapshotFieldJson.set(field, json);
+        snapshotStats.fieldSerialisations++;
+      }
+      parts.push(`"${field}":${json}`);
+    }
+    snapshotStats.builds++;
+    return makeSnapshot(parts, chunks);
+  }
+
+  const historyStore = await createHistoryStore();
+
+  app.get(api.history.calls.path, async (req, res) => {
+    try {
+      res.json(await historyStore.queryCalls(parseHistoryQuery(req.query)));
+    } catch (err: any) {
+      res.status(500).json({ message: `Error: ${err.message}` });
+    }
+  });
+
+  app.get(api.history.sds.path, async (req, res) => {
+    try {
+      res.json(await historyStore.querySds(parseHistoryQuery(req.query)));
+    } catch (err: any) {
+      res.status(500).json({ message: `Error: ${err.message}` });
+    }
+  });
+
+  // Per-station view of the merged state (multi-source monitor). Terminals heard
+  // by several stations count towards each of them and appear once in merged.
+  app.get(api.stats.stations.path, (_req, res) => {
+    const names = monitorStations.length ? monitorStations : [null];
+    const terminals = Object.values(currentState.terminals);
+    const calls = currentState.localHistory.concat(currentState.externalHistory);
+    res.json({
+      stations: names.map((name) => {
+        const own = (x: any) => name === null || x?.station === name || (x?.stations ?? []).includes(name);
+        const mine = terminals.filter(own);
+        return {
+          name,
+          terminals: mine.length,
+          online: mine.filter((t: any) => t.status === 'Online').length,
+          active: mine.filter((t: any) => t.activity).length,
+          calls: calls.filter(own).length,
+          sds: currentState.sdsMessages.filter(own).length,
+        };
+      }),
+      merged: {
+        terminals: terminals.length,
+        sharedTerminals: terminals.filter((t: any) => (t.stations ?? []).length > 1).length,
+      },
+    });
+  });
+
+  // Latest rolling airtime aggregate from the monitor (emitted every TETRA_STATS_INTERVAL).
+  // Kept as the raw stdout line and only parsed when somebody asks for it.
+  let airtimeStatsRaw: string | null = null;
+
+  app.get(api.stats.airtime.path, (_req, res) => {
+    res.json(airtimeStatsRaw ? JSON.parse(airtimeStatsRaw).payload : {});
+  });
+
+  // Weekly activity heatmaps live in the monitor (ActivityHeatmap); each request
+  // is forwarded as a {"type":"heatmap","id"} command and answered by the
+  // activity_heatmap line with the same id, which goes to no WebSocket client.
+  // ?res=minutes per column (default 60), ?tg= / ?issi= comma lists, ?top=N ISSIs.
+  const HEATMAP_TIMEOUT_MS = 5000;
+  const heatmapRequests = new Map<number, (payload: any) => void>();
+  let nextHeatmapId = 1;
+
+  app.get(api.stats.heatmap.path, (req, res) => {
+    if (!pythonProcess) return res.status(503).json({ error: 'monitor not running' });
+    const list = (v: unknown) => typeof v === 'string' && v ? v.split(',').filter(Boolean) : undefined;
+    const id = nextHeatmapId++;
+    const timer = setTimeout(() => {
+      heatmapRequests.delete(id);
+      res.status(504).json({ error: 'monitor did not answer' });
+    }, HEATMAP_TIMEOUT_MS);
+    heatmapRequests.set(id, (payload) => {
+      clearTimeout(timer);
+      const { id: _id, ...heatmap } = payload ?? {};
+      res.json(heatmap);
+    });
+    sendToPython({
+      type: 'heatmap', id,
+      res: parseInt(String(req.query.res ?? '60'), 10) || 60,
+      top: parseInt(String(req.query.top ?? ''), 10) || undefined,
+      tg: list(req.query.tg), issi: list(req.query.issi),
+    });
+  });
 
   function updateStateFromEvent(event: any) {
     switch (event.type) {
       case 'full_state': {
+        // energySaving is already merged by Python (see sendEnergySaving).
         const incoming = event.payload.terminals || {};
-        // Re-apply cached energy_saving so Python full_state doesn't wipe EG
-        for (const [issi, t] of Object.entries(incoming) as [string, any][]) {
-          const eg = energySavingByIssi.get(issi);
-          if (eg !== undefined && t && t.energySaving == null) t.energySaving = eg;
-        }
         currentState.terminals = incoming;
         // Re-seed flowstation-registered radios that Python's full_state doesn't
         // know about (they registered before the monitor started tailing logs).
@@ -4411,11 +4867,14 @@ ${restartLine}
       }
       case 'update_terminal':
         if (event.payload && event.payload.id) {
-          const issi = String(event.payload.id);
-          if (energySavingByIssi.has(issi) && event.payload.energySaving == null) {
-            event.payload.energySaving = energySavingByIssi.get(issi) ?? null;
-          }
-          currentState.terminals[issi] = event.payload;
+          currentState.terminals[String(event.payload.id)] = event.payload;
+        }
+        break;
+      case 'remove_terminal':
+        // Evicted by the monitor (idle External terminal). A radio the flowstation
+        // still lists as registered stays.
+        if (event.payload && event.payload.id && !fsRegisteredMs.has(String(event.payload.id))) {
+          delete currentState.terminals[String(event.payload.id)];
         }
         break;
       case 'new_call': {
@@ -4430,12 +4889,14 @@ ${restartLine}
             if (currentState.externalHistory.length > MAX_HISTORY)
               currentState.externalHistory = currentState.externalHistory.slice(0, MAX_HISTORY);
           }
+          historyStore.recordCall(entry);
         }
         break;
       }
       case 'update_call': {
         const updated = event.payload;
         if (updated) {
+          historyStore.recordCall(updated);
           if (updated.isLocal) {
             currentState.localHistory = currentState.localHistory.map(
               (e: any) => e.id === updated.id ? updated : e
@@ -4463,6 +4924,7 @@ ${restartLine}
       case 'sds_message': {
         const sds = event.payload;
         if (sds) {
+          historyStore.recordSds(sds);
           const existingIdx = currentState.sdsMessages.findIndex((m: any) => m.id === sds.id);
           if (existingIdx >= 0) {
             currentState.sdsMessages[existingIdx] = sds;
@@ -4502,6 +4964,12 @@ ${restartLine}
 
   // ── Flowstation Energy Saving (EG1/EG2/EG3) — WS client to local dashboard ──
   const energySavingByIssi: Map<string, string | null> = new Map();
+  // Python owns the energySaving field of the terminals it emits, so every
+  // change of the flowstation EG map is forwarded to it over stdin instead of
+  // patching (and re-serialising) its events here.
+  const sendEnergySaving = (issi: string, mode: string | null) => {
+    sendToPython({ type: 'energy_saving', issi, mode });
+  };
 
   // ── Active RF calls — populated from flowstation call_started/call_ended ──
   // Mirrors Razvan's state.calls: keyed by call_id, each entry has ts (timeslot)
@@ -4529,11 +4997,15 @@ ${restartLine}
     // EG class is a hardware property — once we know it, never downgrade to null.
     // FlowStation sends mode=0 when the terminal exits power-saving to transmit,
     // but the Eg1/Eg2 class stays the same and should remain visible in the badge.
-    if (mode != null) energySavingByIssi.set(issi, mode);
+    if (mode != null && energySavingByIssi.get(issi) !== mode) {
+      energySavingByIssi.set(issi, mode);
+      sendEnergySaving(issi, mode);
+    }
     // If we have a cached class, use that; otherwise use the incoming mode.
     const effective = energySavingByIssi.get(issi) ?? null;
     const t = currentState.terminals[issi];
-    if (t && t.energySaving !== effective) {
+    // Terminals known to Python get re-emitted by it once the hint lands.
+    if (t && fsRegisteredMs.has(issi) && t.energySaving !== effective) {
       t.energySaving = effective;
       broadcast(JSON.stringify({ type: 'update_terminal', payload: t }));
     }
@@ -4567,7 +5039,10 @@ ${restartLine}
       else if (groups.length) selectedTg = `TG ${groups[0]}`;
     }
     const eg = energySavingByIssi.get(issi) ?? modeToStr(m.energy_saving_mode);
-    if (eg != null) energySavingByIssi.set(issi, eg);
+    if (eg != null && !energySavingByIssi.has(issi)) {
+      energySavingByIssi.set(issi, eg);
+      sendEnergySaving(issi, eg);
+    }
     const term = {
       id: issi,
       callsign: prev?.callsign,
@@ -4817,7 +5292,7 @@ ${restartLine}
         } else if (m.type === 'ms_energy_saving' && m.issi != null) {
           applyEsAndBroadcast(String(m.issi), modeToStr(m.mode));
         } else if (m.type === 'ms_deregistered' && m.issi != null) {
-          energySavingByIssi.delete(String(m.issi));
+          if (energySavingByIssi.delete(String(m.issi))) sendEnergySaving(String(m.issi), null);
           markMsOffline(String(m.issi));
         } else if (m.type === 'ts_voice' && m.ts != null) {
           // Razvan v0.2.2+: rate-limited (4 Hz/TS) voice activity ping per timeslot.
@@ -4885,31 +5360,52 @@ ${restartLine}
   }
   setTimeout(connectFlowstationWs, 500);
 
-  wss.on('connection', (ws) => {
-    // Enrich terminals with energy_saving from the flowstation map so the
-    // initial snapshot already carries EG even if Python's update_terminal
-    // events were emitted before fsWs connected.
-    const enrichedTerminals: Record<string, any> = {};
-    for (const [issi, t] of Object.entries(currentState.terminals)) {
-      const tAny: any = t;
-      const eg = energySavingByIssi.get(issi);
-      if (eg !== undefined && tAny && tAny.energySaving == null) {
-        enrichedTerminals[issi] = { ...tAny, energySaving: eg };
-      } else {
-        enrichedTerminals[issi] = tAny;
+  function filterRecord<T>(rec: Record<string, T>, keep: (key: string, v: T) => boolean): Record<string, T> {
+    const out: Record<string, T> = {};
+    for (const [k, v] of Object.entries(rec)) if (keep(k, v)) out[k] = v;
+    return out;
+  }
+
+  // Initial/resync snapshot, scoped to the client's topics and tg/issi filter.
+  // Sections outside the subscription are left out; the client keeps its defaults.
+  // Unfiltered snapshots come from the section cache; tg/issi-filtered ones are
+  // built per client.
+  function buildFullState(sub?: Subscription): Snapshot {
+    if (!sub || isFullSubscription(sub)) {
+      if (snapshotFull) {
+        snapshotStats.cacheHits++;
+        return snapshotFull;
       }
+      snapshotFull = assembleSnapshot(SNAPSHOT_FIELDS);
+      return snapshotFull;
+    }
+    if (!hasFilter(sub)) {
+      return assembleSnapshot(SNAPSHOT_FIELDS.filter(([, topic]) => sub.topics.has(topic)));
+    }
+    const payload: Record<string, unknown> = { stations: monitorStations };
+    let terminals: Record<string, unknown> = {};
+    if (sub.topics.has('terminals')) {
+      terminals = filterRecord(currentState.terminals, (_k, t) => payloadMatches(sub, 'update_terminal', t));
+    }
+    if (sub.topics.has('calls')) {
+      payload.localHistory = currentState.localHistory.filter(c => payloadMatches(sub, 'new_call', c));
+      payload.externalHistory = currentState.externalHistory.filter(c => payloadMatches(sub, 'new_call', c));
+    }
+    if (sub.topics.has('sds')) {
+      payload.sdsMessages = currentState.sdsMessages.filter(m => payloadMatches(sub, 'sds_message', m));
+    }
+    if (sub.topics.has('gps')) {
+      const keepIssi = (issi: string) => (!sub.issis || sub.issis.has(issi))
+        && (!sub.stations || stationMatches(sub, currentState.terminals[issi]));
+      payload.gpsPositions = filterRecord(currentState.gpsPositions, keepIssi);
+      payload.gpsHistory = filterRecord(currentState.gpsHistory, keepIssi);
     }
-    const snapshot = JSON.stringify({
-      type: 'full_state',
-      payload: {
-        terminals: enrichedTerminals,
-        localHistory: currentState.localHistory,
-        externalHistory: currentState.externalHistory,
-        sdsMessages: currentState.sdsMessages,
-        gpsPositions: currentState.gpsPositions,
-        gpsHistory: currentState.gpsHistory,
-        rfCalls: rfCallsSnapshot(),
-        fsDashboardActive,
+    if (sub.topics.has('rf')) {
+      payload.rfCalls = rfCallsSnapshot();
+      payload.fsDashboardActive = fsDashboardActive;
+    }
+    if (sub.topics.has('flowstation')) {
+      Object.assign(payload, {
         emergencies: fsEmergencyList(),
         brewStatus: fsBrew,
         lastHeard: fsLastHeard,
@@ -4917,20 +5413,317 @@ ${restartLine}
         health: fsHealth,
         sdrHealth: fsSdrHealth,
         sysHealth: fsSysHealth,
+      });
+    }
+    const parts = Object.entries(payload).map(([field, value]) => `"${field}":${JSON.stringify(value) ?? 'null'}`);
+    return makeSnapshot(parts, terminalChunks(terminals));
+  }
+
+  wss.on('connection', (ws, req) => {
+    const query = new URL(req.url || '/ws', 'http://localhost').searchParams;
+    const ch: ClientChannel = {
+      id: nextChannelId++,
+      remote: req.socket.remoteAddress || '',
+      sub: parseSubscription({ topics: query.get('topics'), tg: query.get('tg'), issi: query.get('issi'), station: query.get('station') }),
+      batch: query.get('batch') === '1',
+      connectedAt: Date.now(),
+      queue: [], resync: true, sent: 0, drops: 0, coalesced: 0, resyncs: 0, peakQueue: 0, frames: 0, bytes: 0, urgent: 0,
+      snapshot: null, snapshotAt: 0,
+    };
+    channels.set(ws, ch);
+    ws.on('close', () => channels.delete(ws));
+    // {"type":"subscribe","topics":[...],"tg":[...],"issi":[...]} replaces the
+    // subscription; queued frames are dropped and a fresh scoped snapshot follows.
+    ws.on('message', (raw) => {
+      let msg: any;
+      try { msg = JSON.parse(raw.toString()); } catch { return; }
+      // Latency overlay: clock-offset probe (answered at once, never queued) and
+      // the browser's own relay→browser histogram counts.
+      if (msg?.type === 'ping') {
+        ws.send(JSON.stringify({ type: 'pong', payload: { t: msg.t, server: Date.now() } }));
+        return;
+      }
+      if (msg?.type === 'trace_report') {
+        latency.relay_to_browser.merge(msg.le, msg.counts, msg.sum);
+        return;
       }
+      if (msg?.type !== 'subscribe') return;
+      ch.sub = parseSubscription(msg);
+      ch.queue = [];
+      ch.resync = true;
+      drainChannels();
     });
-    ws.send(snapshot);
+    drainChannel(ws, ch);
   });
 
   // Spawn Python monitor script
   const scriptPath = path.join(process.cwd(), 'tetra_monitor.py');
 
+  // Commands to the monitor: one JSON object per line on its stdin.
+  function sendToPython(cmd: object) {
+    const stdin = pythonProcess?.stdin;
+    if (!stdin || stdin.destroyed || !stdin.writable) return;
+    stdin.write(JSON.stringify(cmd) + '\n');
+  }
+
+  // Event types whose payload feeds updateStateFromEvent. Everything else is
+  // forwarded to clients as the original line without ever being parsed.
+  const STATE_EVENT_TYPES = new Set(['full_state', 'update_terminal', 'remove_terminal', 'new_call', 'update_call', 'sds_message', 'rf_call_started', 'rf_call_ended']);
+
+  // ── Monitor supervision ───────────────────────────────────────────────────
+  // The monitor emits a heartbeat every TETRA_HEARTBEAT_INTERVAL (5 s) with its
+  // processing lag and a checkpoint of state we cannot rebuild from events
+  // (private calls, Brew circuits, open calls, event ids, journal cursor). No
+  // heartbeat for MONITOR_STALL_MS means it is wedged, not just slow: it is
+  // killed and restarted like a crash. A restarted monitor is seeded over stdin
+  // with our terminals/histories plus the last checkpoint, and resumes reading
+  // the journal after that cursor instead of rebuilding from scratch.
+  const MONITOR_STALL_MS = parseInt(process.env.MONITOR_STALL_MS || '20000', 10);
+  const monitorStatus = {
+    pid: null as number | null,
+    startedAt: 0,
+    restarts: 0,
+    stallKills: 0,
+    seeded: false,
+    lastHeartbeatAt: 0,
+    heartbeat: null as any,
+  };
+  let monitorCheckpoint: any = null;
+
+  function buildMonitorSeed() {
+    if (!monitorCheckpoint && Object.keys(currentState.terminals).length === 0) return null;
+    const terminals: Record<string, any> = {};
+    for (const [id, t] of Object.entries(currentState.terminals)) {
+      // EG classes learned from flowstation are re-sent as hints, not log-derived values.
+      terminals[id] = energySavingByIssi.has(id) ? { ...t, energySaving: null } : t;
+    }
+    return {
+      type: 'seed',
+      terminals,
+      localHistory: currentState.localHistory,
+      externalHistory: currentState.externalHistory,
+      sdsMessages: currentState.sdsMessages,
+      checkpoint: monitorCheckpoint,
+    };
+  }
+
+  setInterval(() => {
+    const proc = pythonProcess;
+    if (!proc || proc.exitCode !== null) return;
+    const since = Math.max(monitorStatus.lastHeartbeatAt, monitorStatus.startedAt);
+    if (Date.now() - since < MONITOR_STALL_MS) return;
+    console.warn(`Python monitor stalled (no heartbeat for ${Math.round((Date.now() - since) / 1000)}s), killing pid ${proc.pid}`);
+    monitorStatus.stallKills++;
+    monitorStatus.lastHeartbeatAt = Date.now();
+    proc.kill('SIGTERM');
+    setTimeout(() => { if (proc.exitCode === null) proc.kill('SIGKILL'); }, 2000).unref();
+  }, 1000).unref();
+
+  app.get('/api/monitor/status', (_req, res) => {
+    const now = Date.now();
+    res.json({
+      running: !!pythonProcess,
+      pid: monitorStatus.pid,
+      uptimeMs: monitorStatus.startedAt ? now - monitorStatus.startedAt : null,
+      restarts: monitorStatus.restarts,
+      stallKills: monitorStatus.stallKills,
+      seeded: monitorStatus.seeded,
+      lastHeartbeatAgoMs: monitorStatus.lastHeartbeatAt ? now - monitorStatus.lastHeartbeatAt : null,
+      lagMs: monitorStatus.heartbeat?.lagMs ?? null,
+      idleMs: monitorStatus.heartbeat?.idleMs ?? null,
+      lines: monitorStatus.heartbeat?.lines ?? 0,
+    });
+  });
+
+  // Prometheus scrape target. tetra_monitor_* comes from the monitor's last
+  // heartbeat (running totals, so at most TETRA_HEARTBEAT_INTERVAL old);
+  // tetra_relay_* is this process.
+  const loopLag = startLoopLagProbe();
+
+  // ── Latency tracing ───────────────────────────────────────────────────────
+  // Monitor events end in "trace": {log, parse, emit} (epoch ms, see
+  // tetra_monitor.TRACE). The gaps feed one StageLatency each; broadcast copies
+  // get "relay" appended so browsers can time the last hop themselves.
+  const TRACE_RE = /"trace": ?\{(?:"log": ?([\d.]+), ?"parse": ?([\d.]+), ?)?"emit": ?([\d.]+)\}\}$/;
+  const latency = Object.fromEntries(LATENCY_STAGES.map(st => [st, new StageLatency()])) as Record<LatencyStage, StageLatency>;
+
+  function observeTrace(line: string): boolean {
+    const m = TRACE_RE.exec(line.length > 160 ? line.slice(-160) : line);
+    if (!m) return false;
+    const emitted = parseFloat(m[3]);
+    if (m[1] !== undefined) {
+      latency.journal_to_parse.observe((parseFloat(m[2]) - parseFloat(m[1])) / 1000);
+      latency.parse_to_emit.observe((emitted - parseFloat(m[2])) / 1000);
+    }
+    latency.emit_to_relay.observe((Date.now() - emitted) / 1000);
+    return true;
+  }
+
+  app.get('/api/trace/latency', (_req, res) => {
+    res.json({ stages: Object.fromEntries(LATENCY_STAGES.map(st => [st, latency[st].summary()])) });
+  });
+
+  app.get('/metrics', (_req, res) => {
+    const m = new Exposition();
+    const hb = monitorStatus.heartbeat;
+    const mm = hb?.metrics;
+    m.gauge('tetra_monitor_up', 'Whether the Python monitor process is running.', pythonProcess ? 1 : 0);
+    m.counter('tetra_monitor_restarts_total', 'Monitor restarts by the relay.', monitorStatus.restarts);
+    m.counter('tetra_monitor_stall_kills_total', 'Monitors killed for missing heartbeats.', monitorStatus.stallKills);
+    m.gauge('tetra_monitor_heartbeat_age_seconds', 'Time since the last monitor heartbeat.',
+      monitorStatus.lastHeartbeatAt ? (Date.now() - monitorStatus.lastHeartbeatAt) / 1000 : null);
+    m.gauge('tetra_monitor_lag_seconds', 'Journal timestamp to processing delay of the last line.',
+      hb?.lagMs != null ? hb.lagMs / 1000 : null);
+    for (const [station, st] of Object.entries<any>(mm?.stations ?? {})) {
+      m.counter('tetra_monitor_lines_read_total', 'Log lines read by the monitor.', st.lines, { station });
+      m.counter('tetra_monitor_lines_matched_total', 'Log lines that produced at least one event.', st.matched, { station });
+      m.gauge('tetra_monitor_terminals', 'Terminals tracked by the monitor.', st.terminals, { station });
+    }
+    for (const [type, n] of Object.entries<any>(mm?.events ?? {})) {
+      m.counter('tetra_monitor_events_total', 'Events emitted by the monitor, by type.', n, { type });
+    }
+    m.counter('tetra_monitor_callsign_cache_hits_total', 'Callsign lookups answered from the cache.', mm?.callsignHits);
+    m.counter('tetra_monitor_callsign_cache_misses_total', 'Callsign lookups not in the cache.', mm?.callsignMisses);
+    m.counter('tetra_monitor_records_joined_total', 'Multi-line debug records assembled whole.', mm?.recordsJoined);
+    m.counter('tetra_monitor_records_cut_total', 'Multi-line debug records passed on incomplete.', mm?.recordsCut);
+    m.counter('tetra_monitor_lines_truncated_total', 'Log messages cut to TETRA_LINE_MAX characters before parsing.', mm?.linesTruncated);
+    if (mm?.radioid) {
+      m.histogram('tetra_monitor_radioid_lookup_seconds', 'radioid.net callsign lookup latency.',
+        mm.radioid.le, mm.radioid.counts, mm.radioid.sum);
+    }
+    m.gauge('tetra_monitor_emit_buffer_bytes', 'Events buffered in the monitor waiting for its stdout pipe.', mm?.emitBufferBytes);
+    m.counter('tetra_monitor_capture_dropped_lines_total', 'Lines the input capture could not keep up with.', mm?.captureDropped);
+
+    eventsBroadcastByType.forEach((n, type) => {
+      m.counter('tetra_relay_events_total', 'Events broadcast to WebSocket clients, by type.', n, { type });
+    });
+    let queued = 0;
+    let buffered = 0;
+    channels.forEach((ch, ws) => { queued += ch.queue.length; buffered += ws.bufferedAmount; });
+    m.gauge('tetra_relay_ws_clients', 'Connected WebSocket clients.', channels.size);
+    m.gauge('tetra_relay_ws_queue_depth', 'Events queued for WebSocket clients, all clients.', queued);
+    m.gauge('tetra_relay_ws_buffered_bytes', 'Bytes buffered in WebSocket sockets, all clients.', buffered);
+    m.counter('tetra_relay_ws_frames_sent_total', 'WebSocket frames sent.', wsTotals.frames);
+    m.counter('tetra_relay_ws_sent_bytes_total', 'JSON bytes handed to WebSocket clients (before compression).', wsTotals.bytes);
+    m.counter('tetra_relay_ws_urgent_frames_total', 'Urgent frames sent ahead of the client queues.', wsTotals.urgent);
+    m.histogram('tetra_relay_event_loop_lag_seconds', 'Relay event-loop lag, sampled every 500 ms.',
+      loopLag.histogram.buckets, loopLag.histogram.counts, loopLag.histogram.sum);
+    m.gauge('tetra_relay_event_loop_lag_last_seconds', 'Most recent relay event-loop lag sample.', loopLag.lastSeconds());
+    for (const st of LATENCY_STAGES) {
+      const h = latency[st].histogram;
+      m.histogram('tetra_latency_seconds', 'Event latency per stage, journal to browser.', h.buckets, h.counts, h.sum, { stage: st });
+    }
+    m.gauge('tetra_relay_resident_memory_bytes', 'Relay resident set size.', process.memoryUsage().rss);
+    res.type('text/plain; version=0.0.4').send(m.text());
+  });
+
+  // full_state is not relayed as-is: flowstation-registered radios are merged
+  // into its terminals and each client gets a snapshot scoped to its topics.
+  // Anything still queued predates it.
+  function applyFullState(event: any) {
+    updateStateFromEvent(event);
+    invalidateSnapshot('full_state');
+    channels.forEach(ch => { ch.queue = []; ch.resync = true; });
+    drainChannels();
+  }
+
+  // The monitor sends full_state as full_state_begin / full_state_chunk... /
+  // full_state_end (tetra_monitor.emit_state_chunks). The begin sections are
+  // held until the end; each chunk's terminals go straight into
+  // currentState.terminals, so the table is never held twice. At the end,
+  // terminals the sequence did not list are dropped and the sections applied
+  // like a single full_state. A sequence cut short by a monitor restart is
+  // superseded at the next begin: its terminals stay until that one ends.
+  let pendingFullState: any = null;
+  let fullStateIds = new Set<string>();
+
+  function applyFullStatePart(type: string, line: string) {
+    let payload: any;
+    try { payload = JSON.parse(line).payload ?? {}; } catch { return; }
+    if (type === 'full_state_begin') {
+      const { terminalCount: _count, ...sections } = payload;
+      pendingFullState = sections;
+      fullStateIds = new Set();
+    } else if (pendingFullState && type === 'full_state_chunk') {
+      for (const [id, t] of Object.entries(payload.terminals ?? {})) {
+        currentState.terminals[id] = t;
+        fullStateIds.add(id);
+      }
+    } else if (pendingFullState) {
+      for (const id of Object.keys(currentState.terminals)) {
+        if (!fullStateIds.has(id)) delete currentState.terminals[id];
+      }
+      const event = { type: 'full_state', payload: { ...pendingFullState, terminals: currentState.terminals } };
+      pendingFullState = null;
+      fullStateIds = new Set();
+      applyFullState(event);
+    }
+  }
+
+  function handlePythonLine(line: string) {
+    const type = EVENT_TYPE_RE.exec(line)?.[1];
+    if (!type) return;
+    const traced = observeTrace(line);
+    if (type === 'heartbeat') {
+      try {
+        const hb = JSON.parse(line).payload;
+        monitorStatus.heartbeat = hb;
+        monitorStatus.lastHeartbeatAt = Date.now();
+        if (hb?.checkpoint) monitorCheckpoint = hb.checkpoint;
+      } catch { /* ignore */ }
+      return;
+    }
+    if (type === 'resumed') {
+      console.log(`Python monitor resumed from relay state: ${line}`);
+      return;
+    }
+    if (type === 'activity_heatmap') {
+      try {
+        const payload = JSON.parse(line).payload;
+        heatmapRequests.get(payload?.id)?.(payload);
+        heatmapRequests.delete(payload?.id);
+      } catch { /* ignore */ }
+      return;
+    }
+    if (type === 'status') {
+      try { monitorStations = JSON.parse(line).payload?.stations ?? []; } catch { /* ignore */ }
+    }
+    if (type === 'airtime_stats') {
+      airtimeStatsRaw = line;
+    } else if (type === 'full_state_begin' || type === 'full_state_chunk' || type === 'full_state_end') {
+      applyFullStatePart(type, line);
+      return;
+    } else if (STATE_EVENT_TYPES.has(type)) {
+      let event: any;
+      try { event = JSON.parse(line); } catch { return; }
+      if (type === 'full_state') {
+        applyFullState(event);
+        return;
+      }
+      updateStateFromEvent(event);
+      if (type === 'remove_terminal' && currentState.terminals[String(event.payload?.id)]) return;
+    }
+    broadcast(traced ? `${line.slice(0, -2)}, "relay": ${Date.now()}}}` : line);
+  }
+
   function startPython() {
     console.log("Spawning Python TETRA monitor...");
+    const seed = buildMonitorSeed();
+    // A seeded monitor continues the previous event ids, so history rows keep their session.
+    if (!seed) historyStore.newSession();
     pythonProcess = spawn('python3', [scriptPath], {
-      env: { ...process.env, PYTHONUNBUFFERED: "1" },
+      env: { ...process.env, PYTHONUNBUFFERED: "1", TETRA_SEED: seed ? "1" : "0" },
       stdio: ['pipe', 'pipe', 'pipe']
     });
+    pythonProcess.stdin?.on('error', () => { /* monitor exited; restart handles it */ });
+    if (monitorStatus.startedAt) monitorStatus.restarts++;
+    monitorStatus.pid = pythonProcess.pid ?? null;
+    monitorStatus.startedAt = Date.now();
+    monitorStatus.lastHeartbeatAt = 0;
+    monitorStatus.seeded = !!seed;
+    if (seed) sendToPython(seed);
+    // A fresh process knows nothing about the flowstation EG classes yet.
+    energySavingByIssi.forEach((mode, issi) => { if (mode != null) sendEnergySaving(issi, mode); });
 
     let buffer = '';
 
@@ -4940,17 +5733,7 @@ ${restartLine}
       buffer = lines.pop() || '';
 
       for (const line of lines) {
-        if (!line.trim()) continue;
-        try {
-          const event = JSON.parse(line);
-          // IMPORTANT: updateStateFromEvent mutates event.payload (e.g. enriches
-          // energySaving from our flowstation map). Serialise AFTER the mutation
-          // so broadcast carries the enriched data, not the raw Python output.
-          updateStateFromEvent(event);
-          broadcast(JSON.stringify(event));
-        } catch (e) {
-          // Not valid JSON, skip
-        }
+        if (line.trim()) handlePythonLine(line);
       }
     });
 
@@ -4976,5 +5759,10 @@ ${restartLine}
 
   startPython();
 
+  telemetry.onSample((sample) => {
+    if (channels.size) broadcast(JSON.stringify({ type: 'system_stats', payload: sample }));
+  });
+  telemetry.start();
+
   return httpServer;
 }
@@ -0,0 +1,248 @@
+import { execFile } from "child_process";
+import { promises as fsp } from "fs";
+import * as os from "os";
+
+// ── Background system telemetry ──────────────────────────────────────────────
+// One sampler reads CPU, memory, temperature and supply voltage every
+// TELEMETRY_INTERVAL_MS (async, so a slow vcgencmd never blocks the event loop)
+// and merges in relay-side numbers (monitor lag, event rates). Samples go into
+// fixed-size rings: raw samples for the last hour and per-minute averages for
+// the last 24 h. /api/system/stats serves the latest sample from memory and
+// /api/system/history downsamples the rings, so open dashboards cost nothing
+// beyond a JSON response.
+
+const INTERVAL_MS = parseInt(process.env.TELEMETRY_INTERVAL_MS || "5000", 10);
+const RAW_CAPACITY = Math.ceil(3600_000 / INTERVAL_MS);
+const MINUTE_CAPACITY = 24 * 60;
+
+export interface TelemetrySample {
+  ts: number;
+  cpuLoad: number | null;     // 1-min load average as % of cores (what the dashboard has always shown)
+  cpuUtil: number | null;     // busy % across all cores since the previous sample
+  cpuTemp: number | null;
+  memUsed: number | null;
+  voltage: number | null;
+  monitorLagMs: number | null;
+  monitorLinesPerSec: number | null;
+  eventsPerSec: number | null;
+  wsClients: number | null;
+}
+
+type Metric = Exclude<keyof TelemetrySample, "ts">;
+const METRICS: Metric[] = ["cpuLoad", "cpuUtil", "cpuTemp", "memUsed", "voltage", "monitorLagMs", "monitorLinesPerSec", "eventsPerSec", "wsClients"];
+
+export interface RelayCounters {
+  monitorLagMs: number | null;
+  monitorLines: number | null;  // cumulative lines processed by the monitor
+  events: number;               // cumulative events broadcast by the relay
+  wsClients: number;
+}
+
+class Ring<T> {
+  private buf: T[] = [];
+  private start = 0;
+
+  constructor(readonly capacity: number) {}
+
+  push(v: T) {
+    if (this.buf.length < this.capacity) {
+      this.buf.push(v);
+    } else {
+      this.buf[this.start] = v;
+      this.start = (this.start + 1) % this.capacity;
+    }
+  }
+
+  last(): T | undefined {
+    if (!this.buf.length) return undefined;
+    return this.buf[(this.start + this.buf.length - 1) % this.buf.length];
+  }
+
+  toArray(): T[] {
+    return this.buf.slice(this.start).concat(this.buf.slice(0, this.start));
+  }
+}
+
+function execText(cmd: string, args: string[]): Promise<string> {
+  return new Promise((resolve, reject) => {
+    execFile(cmd, args, { timeout: 2000 }, (err, stdout) => err ? reject(err) : resolve(stdout.toString()));
+  });
+}
+
+async function readNumber(p: string): Promise<number | null> {
+  try {
+    const n = parseInt((await fsp.readFile(p, "utf-8")).trim(), 10);
+    return Number.isFinite(n) ? n : null;
+  } catch {
+    return null;
+  }
+}
+
+async function readCpuTemp(): Promise<number | null> {
+  const milli = await readNumber("/sys/class/thermal/thermal_zone0/temp");
+  return milli === null ? null : Math.round(milli / 1000 * 10) / 10;
+}
+
+async function readMemUsed(): Promise<number | null> {
+  try {
+    const memInfo = await fsp.readFile("/proc/meminfo", "utf-8");
+    const total = parseInt(memInfo.match(/MemTotal:\s+(\d+)/)?.[1] || "0", 10);
+    const avail = parseInt(memInfo.match(/MemAvailable:\s+(\d+)/)?.[1] || "0", 10);
+    return total > 0 ? Math.round(((total - avail) / total) * 100) : null;
+  } catch {
+    return null;
+  }
+}
+
+let vcgencmdMissing = false;
+
+async function readVoltage(): Promise<number | null> {
+  // 1) Pi 5 PMIC: vcgencmd pmic_read_adc EXT5V_V → "EXT5V_V 5.0670V"
+  if (!vcgencmdMissing) {
+    try {
+      const m = (await execText("vcgencmd", ["pmic_read_adc", "EXT5V_V"])).match(/([\d.]+)V/);
+      if (m) {
+        const v = parseFloat(m[1]);
+        if (v > 1) return Math.round(v * 100) / 100;
+      }
+    } catch (err: any) {
+      if (err?.code === "ENOENT") vcgencmdMissing = true;
+    }
+  }
+
+  // 2) Kernel power supply subsystem (values in µV, only accept > 1V supply rails)
+  const preferredSources = ["rpi_supply", "ac", "usb", "BAT0", "BAT1"];
+  let dirs: string[] = [];
+  try { dirs = await fsp.readdir("/sys/class/power_supply"); } catch {}
+  const sources = preferredSources.concat(dirs.filter(d => !preferredSources.includes(d)));
+  for (const src of sources) {
+    const micro = await readNumber(`/sys/class/power_supply/${src}/voltage_now`);
+    if (micro !== null && micro / 1_000_000 > 1) return Math.round(micro / 10_000) / 100;
+  }
+  return null;
+}
+
+function cpuTimes() {
+  let idle = 0, total = 0;
+  for (const c of os.cpus()) {
+    const t = c.times;
+    idle += t.idle;
+    total += t.user + t.nice + t.sys + t.idle + t.irq;
+  }
+  return { idle, total };
+}
+
+function cpuLoadPct(): number | null {
+  try {
+    return Math.min(100, Math.round((os.loadavg()[0] / os.cpus().length) * 100));
+  } catch {
+    return null;
+  }
+}
+
+function average(samples: TelemetrySample[], ts: number): TelemetrySample {
+  const out: any = { ts };
+  for (const m of METRICS) {
+    let sum = 0, n = 0;
+    for (const s of samples) {
+      const v = s[m];
+      if (v !== null) { sum += v; n++; }
+    }
+    out[m] = n ? Math.round((sum / n) * 10) / 10 : null;
+  }
+  return out;
+}
+
+export class TelemetrySampler {
+  private raw = new Ring<TelemetrySample>(RAW_CAPACITY);
+  private minutes = new Ring<TelemetrySample>(MINUTE_CAPACITY);
+  private minuteBucket: TelemetrySample[] = [];
+  private prevCpu = cpuTimes();
+  private prevCounters: { ts: number; events: number; lines: number | null } | null = null;
+  private listeners: Array<(s: TelemetrySample) => void> = [];
+  private running = false;
+
+  constructor(private counters: () => RelayCounters) {}
+
+  start() {
+    const loop = async () => {
+      if (!this.running) {
+        this.running = true;
+        try { await this.sample(); } catch { /* keep sampling */ }
+        this.running = false;
+      }
+    };
+    loop();
+    setInterval(loop, INTERVAL_MS).unref();
+  }
+
+  onSample(fn: (s: TelemetrySample) => void) {
+    this.listeners.push(fn);
+  }
+
+  latest(): TelemetrySample | undefined {
+    return this.raw.last();
+  }
+
+  // Samples of the last rangeSec seconds averaged down to at most `points` entries.
+  history(rangeSec: number, points: number): { intervalMs: number; samples: TelemetrySample[] } {
+    const since = Date.now() - rangeSec * 1000;
+    const source = rangeSec * 1000 <= RAW_CAPACITY * INTERVAL_MS ? this.raw : this.minutes;
+    const samples = source.toArray().filter(s => s.ts >= since);
+    const per = Math.max(1, Math.ceil(samples.length / Math.max(1, points)));
+    const baseMs = source === this.raw ? INTERVAL_MS : 60_000;
+    if (per === 1) return { intervalMs: baseMs, samples };
+    const out: TelemetrySample[] = [];
+    for (let i = 0; i < samples.length; i += per) {
+      const chunk = samples.slice(i, i + per);
+      out.push(average(chunk, chunk[chunk.length - 1].ts));
+    }
+    return { intervalMs: baseMs * per, samples: out };
+  }
+
+  private async sample() {
+    const [cpuTemp, memUsed, voltage] = await Promise.all([readCpuTemp(), readMemUsed(), readVoltage()]);
+    const now = Date.now();
+
+    const cpu = cpuTimes();
+    const dTotal = cpu.total - this.prevCpu.total;
+    const cpuUtil = dTotal > 0 ? Math.round((1 - (cpu.idle - this.prevCpu.idle) / dTotal) * 1000) / 10 : null;
+    this.prevCpu = cpu;
+
+    const c = this.counters();
+    let eventsPerSec: number | null = null;
+    let monitorLinesPerSec: number | null = null;
+    const prev = this.prevCounters;
+    if (prev && now > prev.ts) {
+      const secs = (now - prev.ts) / 1000;
+      eventsPerSec = Math.round(((c.events - prev.events) / secs) * 10) / 10;
+      if (c.monitorLines !== null && prev.lines !== null && c.monitorLines >= prev.lines) {
+        monitorLinesPerSec = Math.round(((c.monitorLines - prev.lines) / secs) * 10) / 10;
+      }
+    }
+    this.prevCounters = { ts: now, events: c.events, lines: c.monitorLines };
+
+    const s: TelemetrySample = {
+      ts: now,
+      cpuLoad: cpuLoadPct(),
+      cpuUtil,
+      cpuTemp,
+      memUsed,
+      voltage,
+      monitorLagMs: c.monitorLagMs,
+      monitorLinesPerSec,
+      eventsPerSec,
+      wsClients: c.wsClients,
+    };
+    this.raw.push(s);
+
+    const first = this.minuteBucket[0];
+    if (first && Math.floor(first.ts / 60_000) !== Math.floor(now / 60_000)) {
+      this.minutes.push(average(this.minuteBucket, Math.floor(first.ts / 60_000) * 60_000));
+      this.minuteBucket = [];
+    }
+    this.minuteBucket.push(s);
+
+    for (const fn of this.listeners) fn(s);
+  }
+}
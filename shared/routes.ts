@@ -19,6 +19,10 @@ export const api = {
       method: 'GET' as const,
       path: '/api/system/stats' as const,
     },
+    history: {
+      method: 'GET' as const,
+      path: '/api/system/history' as const,
+    },
     shutdown: {
       method: 'POST' as const,
       path: '/api/system/shutdown' as const,
@@ -40,6 +44,30 @@ export const api = {
       path: '/api/system/verify-password' as const,
     },
   },
+  stats: {
+    airtime: {
+      method: 'GET' as const,
+      path: '/api/stats/airtime' as const,
+    },
+    heatmap: {
+      method: 'GET' as const,
+      path: '/api/stats/heatmap' as const,
+    },
+    stations: {
+      method: 'GET' as const,
+      path: '/api/stats/stations' as const,
+    },
+  },
+  history: {
+    calls: {
+      method: 'GET' as const,
+      path: '/api/history/calls' as const,
+    },
+    sds: {
+      method: 'GET' as const,
+      path: '/api/history/sds' as const,
+    },
+  },
 };
 
 export function buildUrl(path: string, params?: Record<string, string | number>): string {
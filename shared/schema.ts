@@ -1,5 +1,5 @@
 
-import { pgTable, text, serial } from "drizzle-orm/pg-core";
+import { pgTable, text, serial, bigserial, bigint, integer, index } from "drizzle-orm/pg-core";
 import { createInsertSchema } from "drizzle-zod";
 import { z } from "zod";
 
@@ -9,6 +9,40 @@ export const settings = pgTable("settings", {
   value: text("value").notNull(),
 });
 
+// Persistent traffic history (server/history.ts). `key` is `<session>:<event id>`
+// because Python event ids restart with every monitor process; `seq` is the
+// pagination cursor. The SQLite fallback creates the same tables.
+export const callHistory = pgTable("call_history", {
+  seq: bigserial("seq", { mode: "number" }).primaryKey(),
+  key: text("key").notNull().unique(),
+  tsMs: bigint("ts_ms", { mode: "number" }).notNull(),
+  sourceIssi: text("source_issi").notNull(),
+  target: text("target").notNull(),
+  callType: text("call_type").notNull(),
+  isLocal: integer("is_local").notNull(),
+  payload: text("payload").notNull(),
+}, (t) => [
+  index("call_history_ts_idx").on(t.tsMs),
+  index("call_history_source_idx").on(t.sourceIssi, t.seq),
+  index("call_history_target_idx").on(t.target, t.seq),
+  index("call_history_type_idx").on(t.callType, t.seq),
+]);
+
+export const sdsHistory = pgTable("sds_history", {
+  seq: bigserial("seq", { mode: "number" }).primaryKey(),
+  key: text("key").notNull().unique(),
+  tsMs: bigint("ts_ms", { mode: "number" }).notNull(),
+  srcIssi: text("src_issi").notNull(),
+  dstIssi: text("dst_issi").notNull(),
+  messageType: text("message_type").notNull(),
+  payload: text("payload").notNull(),
+}, (t) => [
+  index("sds_history_ts_idx").on(t.tsMs),
+  index("sds_history_src_idx").on(t.srcIssi, t.seq),
+  index("sds_history_dst_idx").on(t.dstIssi, t.seq),
+  index("sds_history_type_idx").on(t.messageType, t.seq),
+]);
+
 export type TerminalStatus = "Online" | "Offline" | "External";
 
 export interface Terminal {
@@ -34,6 +68,9 @@ export interface CallLog {
   display: string;
   isLocal: boolean;
   callType?: "group" | "private";
+  startTs?: number;
+  endTs?: number | null;
+  duration?: number | null;
 }
 
 export interface MonitorState {
@@ -43,9 +80,34 @@ export interface MonitorState {
 }
 
 // WebSocket event types (matching Python output)
-export type WsEventType = "full_state" | "update_terminal" | "new_call" | "status";
+export type WsEventType = "full_state" | "full_state_begin" | "full_state_chunk" | "full_state_end" | "update_terminal" | "remove_terminal" | "new_call" | "status";
+
+// End-to-end latency tracing. The monitor stamps every event with "trace" and
+// the relay adds "relay" as it broadcasts it; all epoch milliseconds.
+export interface EventTrace {
+  log?: number;    // journal __REALTIME_TIMESTAMP of the source line (absent for timer events)
+  parse?: number;  // monitor started applying that line
+  emit: number;    // monitor wrote the event to stdout
+  relay?: number;  // relay broadcast it
+}
 
 export interface WsMessage<T = unknown> {
   type: WsEventType;
+  // Set on urgent events (status SDS from the monitor); the relay sends these ahead of any queue.
+  priority?: "high";
   payload: T;
+  trace?: EventTrace;
+}
+
+export const LATENCY_STAGES = ["journal_to_parse", "parse_to_emit", "emit_to_relay", "relay_to_browser"] as const;
+export type LatencyStage = typeof LATENCY_STAGES[number];
+// Histogram bucket bounds (seconds) shared by the relay and the browsers' trace_report.
+export const LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+export interface LatencySummary {
+  count: number;          // since the relay started
+  p50Ms: number | null;   // over the most recent samples
+  p95Ms: number | null;
+  p99Ms: number | null;
+  maxMs: number | null;
 }
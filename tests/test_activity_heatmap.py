@@ -0,0 +1,114 @@
+"""
+ActivityHeatmap row recycling: once a kind is full, new keys take over the rows
+of keys not heard for a week, then of the least active ones; local terminals
+keep theirs, and the file keeps recycled rows under the right keys.
+
+    python -m pytest tests/        (or python -m unittest discover tests)
+"""
+import os
+import sys
+import statistics
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tetra_monitor  # noqa: E402
+
+T0 = 1_760_000_000.0
+DAY = 86400
+
+
+class SmallHeatmap(tetra_monitor.ActivityHeatmap):
+    KINDS = dict(tetra_monitor.ActivityHeatmap.KINDS, issi=((60,), 3))
+
+
+class HeatmapRecyclingTest(unittest.TestCase):
+    def setUp(self):
+        self.hm = SmallHeatmap()
+
+    def call(self, now, issi, local=False, duration=30):
+        self.hm.call_started(now, "91", issi, local=local)
+        self.hm.call_ended(now + duration, "91", issi, duration, 1)
+
+    def test_least_active_row_is_recycled(self):
+        for issi, calls in (("3000001", 3), ("3000002", 1), ("3000003", 2)):
+            for k in range(calls):
+                self.call(T0 + k * 60, issi)
+        self.call(T0 + DAY, "3000004")
+        self.assertEqual(set(self.hm.rows["issi"]), {"3000001", "3000003", "3000004"})
+        self.assertEqual(self.hm.recycled, 1)
+        self.assertEqual(self.hm.overflow, 0)
+        view = self.hm.view(issis=["3000004"])
+        self.assertEqual(sum(view["issis"]["3000004"]["calls"]), 1)
+        self.assertEqual(sum(view["issis"]["3000004"]["airtime"]), 30)
+
+    def test_key_not_heard_for_a_week_goes_first(self):
+        for k in range(5):
+            self.call(T0 + k * 60, "3000001")
+        self.call(T0 + 6 * DAY, "3000002")
+        self.call(T0 + 6 * DAY, "3000003")
+        self.call(T0 + 8 * DAY, "3000004")
+        self.assertNotIn("3000001", self.hm.rows["issi"])
+        self.assertIn("3000004", self.hm.rows["issi"])
+
+    def test_local_terminals_keep_their_rows(self):
+        self.call(T0, "2145001", local=True)
+        self.call(T0, "2145002", local=True)
+        self.call(T0 + 60, "3000001")
+        for k in range(20):
+            self.call(T0 + 8 * DAY + k * 60, str(3000002 + k))
+        self.assertIn("2145001", self.hm.rows["issi"])
+        self.assertIn("2145002", self.hm.rows["issi"])
+        self.call(T0 + 9 * DAY, "2145003", local=True)
+        self.assertEqual(set(self.hm.rows["issi"]), {"2145001", "2145002", "2145003"})
+        self.call(T0 + 9 * DAY, "3000100")
+        self.assertNotIn("3000100", self.hm.rows["issi"])
+        self.assertGreater(self.hm.overflow, 0)
+
+    def test_recycled_rows_survive_save_and_load(self):
+        for issi in ("3000001", "3000002", "3000003"):
+            self.call(T0, issi, duration=10)
+        self.call(T0 + 60, "3000003", duration=20)
+        self.call(T0 + 120, "3000004", duration=40)
+        with tempfile.TemporaryDirectory() as tmp:
+            self.hm.open(os.path.join(tmp, "heatmap.bin"))
+            self.hm.close()
+            loaded = SmallHeatmap()
+            loaded.open(self.hm.path)
+        self.assertEqual(loaded.rows, self.hm.rows)
+        self.assertEqual(loaded.activity, self.hm.activity)
+        self.assertEqual(loaded.heard, self.hm.heard)
+        self.assertEqual(list(loaded.lru["issi"]), list(self.hm.lru["issi"]))
+        before = self.hm.view(issis=list(self.hm.rows["issi"]))["issis"]
+        self.assertEqual(loaded.view(issis=list(loaded.rows["issi"]))["issis"], before)
+        self.assertEqual(sum(before["3000004"]["airtime"]), 40)
+
+
+class HeatmapRecyclingCostTest(unittest.TestCase):
+    def test_new_key_on_full_kind_costs_about_a_known_key(self):
+        hm = tetra_monitor.ActivityHeatmap()
+        limit = hm.KINDS["issi"][1]
+        for k in range(limit):
+            for n in range(2):
+                hm.call_started(T0 + k + n, "91", str(3000000 + k))
+
+        def cost(issis, at):
+            samples = []
+            for k, issi in enumerate(issis):
+                started = time.perf_counter()
+                hm.call_started(at + k, "91", issi)
+                samples.append(time.perf_counter() - started)
+            return statistics.median(samples)
+
+        known = cost([str(3000000 + k) for k in range(0, limit, 16)], T0 + 10 * 3600)
+        new = cost([str(4000000 + k) for k in range(limit // 16)], T0 + 20 * 3600)
+        self.assertEqual(hm.recycled, limit // 16)
+        self.assertEqual(len(hm.rows["issi"]), limit)
+        # Scanning the rows for the fewest calls made a new key ~20x dearer.
+        self.assertLess(new, 5 * known)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Call expiry on a simulated clock: calls that keep sending voice frames must
+outlive TETRA_CALL_TIMEOUT whoever talked last, and end once the frames stop.
+
+    python -m pytest tests/        (or python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tetra_monitor  # noqa: E402
+
+T0 = 1_760_000_000.0
+
+
+class CallExpiryTest(unittest.TestCase):
+    def setUp(self):
+        self.now = T0
+        patches = [
+            mock.patch.object(tetra_monitor.time, "time", lambda: self.now),
+            mock.patch.object(tetra_monitor, "emit", lambda event_type, payload, urgent=False: None),
+            mock.patch.object(tetra_monitor, "HAS_REQUESTS", False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.mon = tetra_monitor.StationHub([None]).primary
+
+    def line(self, msg):
+        self.mon.process_line({"MESSAGE": msg, "__REALTIME_TIMESTAMP": int(self.now * 1_000_000)})
+
+    def run_for(self, seconds, every=2.0, frames=()):
+        """Advance the clock, sending one voice frame per uuid every `every` seconds."""
+        end = self.now + seconds
+        while self.now < end:
+            self.now += every
+            for uuid in frames:
+                self.line(f"BrewEntity: voice frame #1 uuid={uuid} len=36 bytes ts=2")
+            self.mon.expire(self.now)
+
+    def start_circuit(self):
+        self.line("CMCE: accepting Brew setup request uuid=circ-7 call_id=7 src=3020760 dst=2145007 duplex=true")
+        self.assertIn("7", self.mon.private_calls)
+
+    def test_circuit_call_outlives_timeout_while_voice_flows(self):
+        self.start_circuit()
+        self.run_for(tetra_monitor.CALL_TIMEOUT + 20, frames=["circ-7"])
+        self.assertIn("7", self.mon.private_calls)
+        self.assertIn("PRIV:7", self.mon.open_calls)
+        self.run_for(tetra_monitor.CALL_TIMEOUT + 5)
+        self.assertNotIn("7", self.mon.private_calls)
+        self.assertNotIn("PRIV:7", self.mon.open_calls)
+
+    def test_circuit_call_alongside_group_call(self):
+        self.line("BrewWorker: GROUP_TX uuid=grp-1 src=2147639 dst=91")
+        self.start_circuit()
+        self.run_for(tetra_monitor.CALL_TIMEOUT + 20, frames=["circ-7", "grp-1"])
+        self.assertIn("7", self.mon.private_calls)
+        self.assertIn("TG:91", self.mon.open_calls)
+
+    def test_group_call_of_earlier_talker_outlives_timeout(self):
+        self.line("BrewWorker: GROUP_TX uuid=grp-1 src=2147639 dst=91")
+        self.line("BrewWorker: GROUP_TX uuid=grp-2 src=2357111 dst=214")  # now last_active
+        self.run_for(tetra_monitor.CALL_TIMEOUT + 20, frames=["grp-1"])
+        self.assertIn("TG:91", self.mon.open_calls)
+        self.assertNotIn("TG:214", self.mon.open_calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
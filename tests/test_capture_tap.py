@@ -0,0 +1,55 @@
+"""
+CaptureTap rotation keeps the newest files of one station and never touches
+another station's, even one whose name starts with this one's.
+
+    python -m pytest tests/        (or python -m unittest discover tests)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tetra_monitor  # noqa: E402
+
+
+class CaptureRotationTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.tap = tetra_monitor.CaptureTap(self.dir, max_bytes=1 << 20, keep=2)
+        self.addCleanup(self.tap.close)
+
+    def touch(self, *names):
+        for name in names:
+            open(os.path.join(self.dir, name), "wb").close()
+
+    def test_rotation_keeps_newest_files_of_its_own_station_only(self):
+        self.touch("capture-a-20260101-000000-0001.jsonl.gz",
+                   "capture-a-20260102-000000-0002.jsonl.gz",
+                   "capture-a-b-20260101-000000-0001.jsonl.gz",
+                   "capture-a-b-20260102-000000-0002.jsonl.gz",
+                   "capture-a-notes.txt")
+        path = self.tap._rotate("a", None)[2]
+        self.assertEqual(sorted(os.listdir(self.dir)), sorted([
+            "capture-a-20260102-000000-0002.jsonl.gz",
+            os.path.basename(path),
+            "capture-a-b-20260101-000000-0001.jsonl.gz",
+            "capture-a-b-20260102-000000-0002.jsonl.gz",
+            "capture-a-notes.txt",
+        ]))
+
+    def test_capture_files_is_at_least_one(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for value in ("0", "-3"):
+            out = subprocess.run([sys.executable, "-c", "import tetra_monitor; print(tetra_monitor.CAPTURE_FILES)"],
+                                 cwd=root, env=dict(os.environ, TETRA_CAPTURE_FILES=value),
+                                 check=True, stdout=subprocess.PIPE, text=True).stdout
+            self.assertEqual(out.strip(), "1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+RecordAssembler: pretty-printed ({:#?}) PDUs spread over many journal lines are
+joined back into the one-line form the parser matches, per source (_PID), and
+cut off at RECORD_MAX_LINES or RECORD_TIMEOUT. The USdsData payloads they carry
+queue for their "U-SDS-DATA from ISSI" line, at most USDS_PENDING_MAX of them
+for USDS_PENDING_TIMEOUT seconds.
+
+    python -m pytest tests/        (or python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tetra_monitor  # noqa: E402
+
+T0 = 1_760_000_000.0
+
+
+def usds_pdu(issi, text):
+    """The lines bluestation logs for one uplink text SDS."""
+    data = [130, 4, 1, 1] + [ord(c) for c in text]
+    return (["cmce: <- USdsData {",
+             "    calling_party_address_ssi: Some(",
+             f"        {issi},",
+             "    ),",
+             "    user_defined_data: Type4(",
+             f"        {len(data) * 8},",
+             "        ["]
+            + [f"            {b}," for b in data]
+            + ["        ],",
+               "    ),",
+               "}"])
+
+
+def usds_joined(issi, text):
+    data = ", ".join(str(b) for b in [130, 4, 1, 1] + [ord(c) for c in text])
+    return (f"cmce: <- USdsData {{ calling_party_address_ssi: Some({issi}), "
+            f"user_defined_data: Type4({(len(text) + 4) * 8}, [{data}]) }}")
+
+
+class Counted(unittest.TestCase):
+    def counted(self):
+        """Joined and cut records since the last call."""
+        now = (tetra_monitor.counters.records_joined, tetra_monitor.counters.records_cut)
+        delta = (now[0] - self.seen[0], now[1] - self.seen[1])
+        self.seen = now
+        return delta
+
+    def setUp(self):
+        self.seen = (0, 0)
+        self.counted()
+
+
+class RecordAssemblerTest(Counted):
+    def setUp(self):
+        super().setUp()
+        self.asm = tetra_monitor.RecordAssembler()
+        self.n = 0
+
+    def feed(self, msg, pid="100", now=T0):
+        self.n += 1
+        return self.asm.feed((msg, now, f"s=test;i={self.n:x}", None, pid), now)
+
+    def test_pretty_printed_pdu_is_one_line(self):
+        lines = usds_pdu(2145001, "HELLO")
+        out = [r for line in lines for r in self.feed(line)]
+        self.assertEqual(len(out), 1)
+        msg, ts, cursor, ctx, pid = out[0]
+        self.assertEqual(msg, usds_joined(2145001, "HELLO"))
+        self.assertEqual((ts, cursor, pid), (T0, f"s=test;i={len(lines):x}", "100"))
+        self.assertEqual(self.counted(), (1, 0))
+        self.assertEqual(self.asm.open, {})
+
+    def test_sources_interleave(self):
+        a, b = usds_pdu(2145001, "FROM A"), usds_pdu(2145002, "FROM B")
+        out = []
+        for k in range(max(len(a), len(b))):
+            if k < len(a):
+                out += self.feed(a[k], pid="100")
+            if k < len(b):
+                out += self.feed(b[k], pid="200")
+            if k == 3:
+                out += self.feed("cmce: unrelated line", pid="300")
+        self.assertEqual([r[0] for r in out], ["cmce: unrelated line",
+                                               usds_joined(2145001, "FROM A"),
+                                               usds_joined(2145002, "FROM B")])
+        self.assertEqual([r[4] for r in out], ["300", "100", "200"])
+        self.assertEqual(self.counted(), (2, 0))
+
+    def test_other_line_from_same_source_cuts_record(self):
+        lines = usds_pdu(2145001, "HELLO")
+        out = [r for line in lines[:5] for r in self.feed(line)]
+        self.assertEqual(out, [])
+        out = self.feed("cmce: next line")
+        self.assertEqual([r[0] for r in out], [
+            "cmce: <- USdsData { calling_party_address_ssi: Some(2145001), user_defined_data: Type4(",
+            "cmce: next line",
+        ])
+        self.assertEqual(self.counted(), (0, 1))
+
+    def test_cut_at_max_lines(self):
+        with mock.patch.object(tetra_monitor, "LINE_MAX", 1 << 20):
+            out = self.feed("cmce: {")
+            for k in range(tetra_monitor.RECORD_MAX_LINES + 9):
+                out += self.feed(f"    field_{k}: {k},")
+        self.assertEqual(self.counted(), (0, 1))
+        self.assertEqual(len(out), 1 + 10)  # the cut record, then the rest line by line
+        self.assertTrue(out[0][0].startswith("cmce: { field_0: 0, field_1: 1,"))
+        self.assertEqual(out[0][0].count("field_"), tetra_monitor.RECORD_MAX_LINES - 1)
+        self.assertEqual(out[1][0], f"    field_{tetra_monitor.RECORD_MAX_LINES - 1}: {tetra_monitor.RECORD_MAX_LINES - 1},")
+
+    def test_cut_after_record_timeout(self):
+        lines = usds_pdu(2145001, "HELLO")
+        self.feed(lines[0], now=T0)
+        self.feed(lines[1], now=T0 + 1)
+        self.assertEqual(self.asm.expire(T0 + tetra_monitor.RECORD_TIMEOUT), [])
+        (msg, *_), = self.asm.expire(T0 + tetra_monitor.RECORD_TIMEOUT + 0.1)
+        self.assertEqual(msg, "cmce: <- USdsData { calling_party_address_ssi: Some(")
+        self.assertEqual(self.counted(), (0, 1))
+
+    def test_record_timeout_is_configurable(self):
+        with mock.patch.object(tetra_monitor, "RECORD_TIMEOUT", 10.0):
+            self.feed("cmce: <- USdsData {", now=T0)
+            self.assertEqual(self.asm.expire(T0 + 9), [])
+            self.assertEqual(len(self.asm.expire(T0 + 10.5)), 1)
+
+
+class UsdsQueueTest(Counted):
+    def setUp(self):
+        super().setUp()
+        self.now = T0
+        patches = [
+            mock.patch.object(tetra_monitor.time, "time", lambda: self.now),
+            mock.patch.object(tetra_monitor, "emit", lambda event_type, payload, urgent=False: None),
+            mock.patch.object(tetra_monitor, "HAS_REQUESTS", False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.mon = tetra_monitor.StationHub([None]).primary
+
+    def line(self, msg, pid="100"):
+        self.mon.process_line({"MESSAGE": msg, "__REALTIME_TIMESTAMP": int(self.now * 1_000_000), "_PID": pid})
+
+    def pdu(self, issi, text):
+        for line in usds_pdu(issi, text):
+            self.line(line)
+
+    def content(self, src):
+        pending = self.mon.sds_content_pending.pop(src, None)
+        return pending and pending["content"]
+
+    def test_payloads_wait_for_their_issi_line_in_order(self):
+        for k in range(tetra_monitor.USDS_PENDING_MAX + 1):
+            self.pdu(2145001, f"MSG{k:02}")
+        self.assertEqual(self.counted(), (tetra_monitor.USDS_PENDING_MAX + 1, 0))
+        self.assertEqual(len(self.mon.pending_usds), tetra_monitor.USDS_PENDING_MAX)
+        for k in range(1, tetra_monitor.USDS_PENDING_MAX + 1):  # MSG00 was pushed out
+            self.line(f"SDS: U-SDS-DATA from ISSI {3000000 + k} to ISSI 2145002", pid="200")
+            self.assertEqual(self.content(str(3000000 + k)), f"MSG{k:02}")
+        self.line("SDS: U-SDS-DATA from ISSI 3000099 to ISSI 2145002", pid="200")
+        self.assertIsNone(self.content("3000099"))
+
+    def test_payload_expires_after_timeout(self):
+        self.pdu(2145001, "STALE")
+        self.now += tetra_monitor.USDS_PENDING_TIMEOUT + 1
+        self.pdu(2145001, "FRESH")
+        self.line("SDS: U-SDS-DATA from ISSI 3000001 to ISSI 2145002")
+        self.assertEqual(self.content("3000001"), "FRESH")
+        self.assertEqual(len(self.mon.pending_usds), 0)
+
+    def test_interrupted_pdu_is_parsed_as_far_as_it_got(self):
+        lines = usds_pdu(2145001, "LATE")
+        for line in lines[:4]:
+            self.line(line)
+        self.now += tetra_monitor.RECORD_TIMEOUT + 1
+        self.mon.expire(self.now)
+        self.assertEqual(self.counted(), (0, 1))
+        self.assertEqual(self.mon.assembler.open, {})
+        self.assertEqual(len(self.mon.pending_usds), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Restart from a stale checkpoint: the new process re-reads the journal from the
+last heartbeat's cursor, so lines the relay has already seen are processed
+again. Their calls and SDS must not reach the relay a second time.
+
+    python -m pytest tests/        (or python -m unittest discover tests)
+"""
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tetra_monitor  # noqa: E402
+
+T0 = 1_760_000_000.0
+
+
+class Relay:
+    """The history part of server/routes.ts updateStateFromEvent."""
+
+    def __init__(self):
+        self.terminals = {}
+        self.history = []  # local and external, newest first
+        self.sds = []
+        self.events = []
+
+    def __call__(self, event_type, payload, urgent=False):
+        payload = json.loads(json.dumps(payload))
+        self.events.append((event_type, payload))
+        if event_type == "update_terminal":
+            self.terminals[payload["id"]] = payload
+        elif event_type == "new_call":
+            self.history.insert(0, payload)
+        elif event_type == "update_call":
+            self.history = [payload if e["id"] == payload["id"] else e for e in self.history]
+        elif event_type == "sds_message":
+            ids = [m["id"] for m in self.sds]
+            if payload["id"] in ids:
+                self.sds[ids.index(payload["id"])] = payload
+            else:
+                self.sds.insert(0, payload)
+
+    def seed(self, checkpoint):
+        return {
+            "terminals": self.terminals,
+            "localHistory": [e for e in self.history if e["isLocal"]],
+            "externalHistory": [e for e in self.history if not e["isLocal"]],
+            "sdsMessages": self.sds,
+            "checkpoint": checkpoint,
+        }
+
+
+class RestartSeedTest(unittest.TestCase):
+    def setUp(self):
+        self.now = T0
+        self.relay = Relay()
+        patches = [
+            mock.patch.object(tetra_monitor.time, "time", lambda: self.now),
+            mock.patch.object(tetra_monitor, "emit", self.relay),
+            mock.patch.object(tetra_monitor, "HAS_REQUESTS", False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.seq = 0
+
+    def feed(self, hub, at, msg):
+        self.now = T0 + at
+        hub.primary.process_line({"MESSAGE": msg, "__REALTIME_TIMESTAMP": int(self.now * 1_000_000),
+                                  "__CURSOR": f"s=test;i={at:x}"})
+
+    def test_stale_checkpoint_emits_no_duplicates(self):
+        lines = [
+            (0, "BrewWorker: GROUP_TX uuid=grp-1 src=2147639 dst=91"),
+            (10, "BrewEntity: GROUP_IDLE gssi=91"),
+            (20, "BrewWorker: GROUP_TX uuid=grp-2 src=2357111 dst=214"),
+            (25, "SDS: U-STATUS from ISSI 2145001 to ISSI 2145002, status=32768"),
+        ]
+        first = tetra_monitor.StationHub([None])
+        self.feed(first, *lines[0])
+        stale = first.checkpoint()  # last heartbeat, then the process dies after three more lines
+        for at, msg in lines[1:]:
+            self.feed(first, at, msg)
+        self.assertEqual(len(self.relay.history), 2)
+        self.assertEqual(len(self.relay.sds), 1)
+
+        second = tetra_monitor.StationHub([None])
+        second.apply_seed(json.loads(json.dumps(self.relay.seed(stale))))
+        self.relay.events.clear()
+        for at, msg in lines[1:]:  # the journal is re-read from the stale cursor
+            self.feed(second, at, msg)
+        self.assertEqual([t for t, _ in self.relay.events if t in ("new_call", "sds_message")], [])
+        self.feed(second, 40, "BrewEntity: GROUP_IDLE gssi=214")
+        self.feed(second, 50, "BrewWorker: GROUP_TX uuid=grp-3 src=2147639 dst=91")
+
+        calls = self.relay.history
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(len({e["id"] for e in calls}), 3)
+        self.assertEqual(len({(e["sourceId"], e["targetTg"], e["startTs"]) for e in calls}), 3)
+        tg214 = [e for e in calls if e["targetTg"] == "214"]
+        self.assertEqual(len(tg214), 1)
+        self.assertEqual(tg214[0]["endTs"], int((T0 + 40) * 1000))
+        self.assertEqual(calls[0]["startTs"], int((T0 + 50) * 1000))
+        self.assertEqual(len(self.relay.sds), 1)
+        self.assertEqual(len(second.primary.hist_local + second.primary.hist_ext), 3)
+        self.assertEqual(len(second.primary.sds_messages), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
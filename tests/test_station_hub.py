@@ -0,0 +1,126 @@
+"""
+StationHub with several stations: a radio heard by more than one station
+reaches the relay as one merged terminal, is only removed once no station has
+it, and a restart seed is handed back to each station's monitor.
+
+    python -m pytest tests/        (or python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tetra_monitor  # noqa: E402
+
+T0 = 1_760_000_000.0
+
+
+class StationHubTest(unittest.TestCase):
+    def setUp(self):
+        self.now = T0
+        self.events = []
+        patches = [
+            mock.patch.object(tetra_monitor.time, "time", lambda: self.now),
+            mock.patch.object(tetra_monitor, "emit",
+                              lambda event_type, payload, urgent=False: self.events.append((event_type, dict(payload)))),
+            mock.patch.object(tetra_monitor, "HAS_REQUESTS", False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.hub = tetra_monitor.StationHub(["north", "south"])
+
+    def line(self, station, msg):
+        self.hub.monitors[station].process_line({"MESSAGE": msg, "__REALTIME_TIMESTAMP": int(self.now * 1_000_000)})
+
+    def terminal_events(self):
+        out = [(t, p) for t, p in self.events if t in ("update_terminal", "remove_terminal")]
+        self.events.clear()
+        return out
+
+    def test_same_issi_is_one_merged_terminal(self):
+        self.line("north", "BrewWorker: GROUP_TX uuid=grp-1 src=2147639 dst=91")
+        self.now += 5
+        self.line("south", "BrewWorker: GROUP_TX uuid=grp-2 src=2147639 dst=91")
+        events = self.terminal_events()
+        self.assertEqual({p["id"] for _, p in events}, {"2147639"})
+        self.assertEqual(events[-1][1]["station"], "south")  # both on air: the freshest view
+        self.assertEqual(events[-1][1]["stations"], ["north", "south"])
+        self.assertTrue(events[-1][1]["isActive"])
+
+        self.now += 10
+        self.line("south", "BrewEntity: GROUP_IDLE gssi=91")
+        (event_type, merged), = self.terminal_events()
+        # North still has it on air, so its view is the one shown.
+        self.assertEqual(event_type, "update_terminal")
+        self.assertEqual(merged["station"], "north")
+        self.assertEqual(merged["activity"], "TX")
+        self.assertEqual(merged["stations"], ["north", "south"])
+        self.assertTrue(merged["isActive"])
+
+        self.line("north", "BrewEntity: GROUP_IDLE gssi=91")
+        self.assertIsNone(self.terminal_events()[-1][1]["activity"])
+
+    def test_terminal_is_removed_once_no_station_has_it(self):
+        self.line("north", "BrewWorker: GROUP_TX uuid=grp-1 src=2147639 dst=91")
+        self.line("south", "BrewWorker: GROUP_TX uuid=grp-2 src=2147639 dst=91")
+        self.terminal_events()
+
+        self.hub.monitors["north"]._remove_terminal("2147639")
+        (event_type, merged), = self.terminal_events()
+        self.assertEqual(event_type, "update_terminal")
+        self.assertEqual(merged["station"], "south")
+        self.assertEqual(merged["stations"], ["south"])
+
+        self.hub.monitors["south"]._remove_terminal("2147639")
+        self.assertEqual(self.terminal_events(), [("remove_terminal", {"id": "2147639"})])
+        self.assertNotIn("2147639", self.hub.station_terminals)
+        self.assertNotIn("2147639", self.hub.merged_terminals)
+
+    def test_seed_is_split_per_station(self):
+        def terminal(issi, station, stations):
+            return {"id": issi, "status": "External", "selectedTg": "TG 91", "groups": ["91"],
+                    "isLocal": False, "station": station, "stations": stations}
+
+        def call(entry_id, station, is_local):
+            return {"id": entry_id, "sourceId": "2147639", "targetTg": "91", "isLocal": is_local,
+                    "startTs": int(T0 * 1000) - 60_000, "endTs": int(T0 * 1000) - 50_000, "station": station}
+
+        seed = {
+            "terminals": {
+                "2147639": terminal("2147639", "north", ["north", "south"]),
+                "2357111": terminal("2357111", "south", ["south"]),
+            },
+            "localHistory": [call("12", "south", True)],
+            "externalHistory": [call("11", "north", False)],
+            "sdsMessages": [{"id": "14", "srcIssi": "2145001", "dstIssi": "2145002", "timestamp": "08:00:00",
+                             "messageType": "STATUS", "station": "north"}],
+            "checkpoint": {
+                "eventCounter": 9,
+                "stations": {"north": {"journalCursor": "s=n;i=1"}, "south": {"journalCursor": "s=s;i=2"}},
+            },
+        }
+        self.hub.apply_seed(seed)
+        north, south = self.hub.monitors["north"], self.hub.monitors["south"]
+        self.assertEqual(set(north.terminals), {"2147639"})
+        self.assertEqual(set(south.terminals), {"2147639", "2357111"})
+        self.assertEqual([e["id"] for e in north.hist_ext], ["11"])
+        self.assertEqual((north.hist_local, south.hist_ext), ([], []))
+        self.assertEqual([e["id"] for e in south.hist_local], ["12"])
+        self.assertEqual([m["id"] for m in north.sds_messages], ["14"])
+        self.assertEqual(south.sds_messages, [])
+        self.assertEqual((north.journal_cursor, south.journal_cursor), ("s=n;i=1", "s=s;i=2"))
+        self.assertEqual(self.hub.event_counter, 14)
+
+        # The seeded views merge with fresh ones: south hearing it again keeps north listed.
+        self.line("south", "BrewWorker: GROUP_TX uuid=grp-5 src=2147639 dst=91")
+        merged = [p for t, p in self.terminal_events() if p["id"] == "2147639"][-1]
+        self.assertEqual(merged["station"], "south")
+        self.assertEqual(merged["stations"], ["north", "south"])
+        self.assertEqual(self.hub.next_id(), "16")  # 15 went to the new call
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+StdoutWriter ordering: urgent lines go out ahead of buffered events, but never
+ahead of a buffered full_state sequence that would overwrite them on the relay.
+
+    python -m pytest tests/        (or python -m unittest discover tests)
+"""
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tetra_monitor  # noqa: E402
+
+
+class StdoutWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.rfd, wfd = os.pipe()
+        self.addCleanup(os.close, self.rfd)
+        self.addCleanup(os.close, wfd)
+        self.writer = tetra_monitor.StdoutWriter(self.loop, wfd)
+        for p in (mock.patch.object(tetra_monitor, "_writer", self.writer),
+                  mock.patch.object(tetra_monitor, "TRACE", False)):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def sent(self):
+        """Event types written to the pipe so far."""
+        self.writer.flush()
+        data = os.read(self.rfd, 1 << 20).decode()
+        return [json.loads(line)["type"] for line in data.splitlines()]
+
+    def test_urgent_goes_ahead_of_buffered_events(self):
+        tetra_monitor.emit("update_terminal", {"id": "2145001"})
+        tetra_monitor.emit("sds_message", {"id": 1}, urgent=True)
+        self.assertEqual(self.sent(), ["sds_message", "update_terminal"])
+
+    def test_urgent_never_overtakes_full_state(self):
+        tetra_monitor.emit("update_terminal", {"id": "2145001"})
+        terminals = ((str(2145000 + i), {"id": str(2145000 + i)}) for i in range(3))
+        tetra_monitor.emit_state_chunks({"sdsMessages": []}, terminals, 3)
+        tetra_monitor.emit("update_call", {"id": "TG:91"})
+        tetra_monitor.emit("sds_message", {"id": 1}, urgent=True)
+        self.assertEqual(self.sent(), [
+            "update_terminal", "full_state_begin", "full_state_chunk", "full_state_end",
+            "sds_message", "update_call",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
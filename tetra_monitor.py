@@ -4,7 +4,9 @@ TETRA Monitor - Backend processor.
 Processes TETRA logs from journalctl (or runs in demo mode)
 and outputs JSON events to stdout for the Node.js relay server.
 """
+import abc
 import json
+import asyncio
 import subprocess
 import time
 import sys
@@ -12,6 +14,15 @@ import re
 import os
 import select
 import random
+import signal
+import threading
+import heapq
+import gzip
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, deque
+from itertools import accumulate
 from datetime import datetime
 
 try:
@@ -23,14 +34,224 @@ except ImportError:
 JOURNAL_CMD = ["journalctl", "-f", "-o", "json"]
 MAX_HISTORY = 50
 RADIOID_API = "https://radioid.net/api/dmr/user/?id="
+STATS_INTERVAL = float(os.environ.get("TETRA_STATS_INTERVAL", "10"))
+# name -> (span seconds, bucket count); bucket width = span / count
+STATS_WINDOWS = {"1m": (60, 12), "1h": (3600, 60), "24h": (86400, 96)}
+STATS_TOP_ISSI = 50
+# Weekly activity heatmaps (ActivityHeatmap): TG x minute-of-week, ISSI x
+# hour-of-week and timeslot x minute-of-week, local time, weeks start Monday.
+# Saved to HEATMAP_FILE every HEATMAP_SAVE_INTERVAL seconds ("" disables).
+# Past HEATMAP_MAX_TGS / HEATMAP_MAX_ISSIS rows a new key takes over the row of
+# one not heard for a week, else of the one with the fewest calls; rows of
+# local terminals are never taken over.
+HEATMAP_FILE = os.environ.get("TETRA_HEATMAP_FILE", "activity_heatmap.bin")
+HEATMAP_SAVE_INTERVAL = float(os.environ.get("TETRA_HEATMAP_SAVE_INTERVAL", "300"))
+HEATMAP_MAX_TGS = 256
+HEATMAP_MAX_ISSIS = 4096
+WEEK_MINUTES = 7 * 24 * 60
+HEARTBEAT_INTERVAL = float(os.environ.get("TETRA_HEARTBEAT_INTERVAL", "5"))
+SEED_TIMEOUT = 3.0
+# Expiry (TimerWheel): activity with no sign of life for CALL_TIMEOUT seconds is
+# treated as a lost call-end line; Online terminals silent for IDLE_TIMEOUT go
+# Offline. 0 disables either.
+CALL_TIMEOUT = float(os.environ.get("TETRA_CALL_TIMEOUT", "180"))
+IDLE_TIMEOUT = float(os.environ.get("TETRA_IDLE_TIMEOUT", "3600"))
+# Terminal table bound: External (network-heard) terminals idle for EXTERNAL_TTL
+# seconds are removed, and above MAX_TERMINALS the longest-idle External ones go
+# first. Local and active terminals are never evicted. 0 disables either.
+MAX_TERMINALS = int(os.environ.get("TETRA_MAX_TERMINALS", "2000"))
+EXTERNAL_TTL = float(os.environ.get("TETRA_EXTERNAL_TTL", "86400"))
+# Longest message parsed, in characters (after ANSI stripping, and for joined
+# multi-line records); the rest of a longer one is dropped and counted.
+LINE_MAX = int(os.environ.get("TETRA_LINE_MAX", "4096"))
+# Multi-line debug records (RecordAssembler): a line ending in an opening
+# bracket starts a record that takes the indented lines after it until the
+# brackets balance; cut off after RECORD_MAX_LINES lines, LINE_MAX characters
+# or RECORD_TIMEOUT seconds, with at most RECORD_MAX_SOURCES records open at once.
+RECORD_MAX_LINES = 1024
+RECORD_TIMEOUT = float(os.environ.get("TETRA_RECORD_TIMEOUT", "2"))
+RECORD_MAX_SOURCES = 16
+# USdsData payloads waiting for their "U-SDS-DATA from ISSI" line.
+USDS_PENDING_MAX = 16
+USDS_PENDING_TIMEOUT = 5.0
+# full_state goes out as begin / chunks of at most this many terminals / end.
+FULL_STATE_CHUNK = int(os.environ.get("TETRA_FULL_STATE_CHUNK", "200"))
+# Raw input capture (CaptureTap): rotating .jsonl.gz files of every line read,
+# or only lines containing one of the comma-separated TETRA_CAPTURE_TRIGGER tokens.
+CAPTURE_DIR = os.environ.get("TETRA_CAPTURE_DIR", "")
+CAPTURE_MAX_BYTES = int(float(os.environ.get("TETRA_CAPTURE_MAX_MB", "16")) * 1024 * 1024)
+CAPTURE_FILES = max(1, int(os.environ.get("TETRA_CAPTURE_FILES", "8")))  # per station, the file being written included
+CAPTURE_TRIGGER = [t for t in os.environ.get("TETRA_CAPTURE_TRIGGER", "").split(",") if t]
+CAPTURE_QUEUE_LINES = 50000
+CAPTURE_FLUSH_INTERVAL = 5.0
+
+RADIOID_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0)  # seconds; fetch_callsign gives up at 4 s
+# Latency tracing: every event carries "trace" = {log, parse, emit} in epoch ms:
+# the journal timestamp of the line it came from, when the monitor started
+# applying that line (both absent for events raised by timers), and when it was
+# written out. The relay adds "relay" and turns the gaps into per-stage histograms.
+# The trace is spliced onto the serialised event as text, its line part
+# formatted once per line: about 0.3 us per event instead of ~9 us for a
+# nested dict through json.dumps.
+TRACE = os.environ.get("TETRA_TRACE", "1") != "0"
+TRACE_TIMER_HEAD = ', "trace": {"emit": '
+
+_writer = None  # StdoutWriter while the asyncio loop runs
+_trace_line = None  # (journal ts, apply start) of the line being applied
+_trace_head = None  # its formatted trace prefix, once an event of that line needs it
+
+
+class Counters:
+    """
+    Process-wide counters, sent as running totals in every heartbeat; the
+    relay turns them into Prometheus metrics on /metrics. They restart from
+    zero with the monitor, which Prometheus counters handle by design.
+    """
+
+    def __init__(self):
+        self.events = Counter()  # events emitted, by type
+        self.callsign_hits = 0
+        self.callsign_misses = 0
+        self.radioid_counts = [0] * (len(RADIOID_BUCKETS) + 1)  # per bucket, the last one is +Inf
+        self.radioid_seconds = 0.0
+        self.records_joined = 0      # multi-line records assembled complete
+        self.records_cut = 0         # ... passed on incomplete (timeout, size, interrupted)
+        self.lines_truncated = 0     # messages cut to LINE_MAX
+
+    def observe_radioid(self, seconds):
+        self.radioid_counts[bisect_left(RADIOID_BUCKETS, seconds)] += 1
+        self.radioid_seconds += seconds
+
+    def snapshot(self):
+        return {
+            "events": dict(self.events),
+            "callsignHits": self.callsign_hits,
+            "callsignMisses": self.callsign_misses,
+            "recordsJoined": self.records_joined,
+            "recordsCut": self.records_cut,
+            "linesTruncated": self.lines_truncated,
+            "radioid": {"le": list(RADIOID_BUCKETS), "counts": list(self.radioid_counts),
+                        "sum": round(self.radioid_seconds, 3)},
+            "emitBufferBytes": len(_writer.buf) if _writer is not None else 0,
+        }
+
+
+counters = Counters()
 
-def emit(event_type, payload):
-    """Send a JSON event to stdout for the Node.js server to pick up."""
-    msg = json.dumps({"type": event_type, "payload": payload})
+
+def emit(event_type, payload, urgent=False):
+    """
+    Send a JSON event to stdout for the Node.js server to pick up. Urgent
+    events (status SDS: emergencies travel as U-STATUS) carry "priority":
+    "high" right after the type, go out ahead of everything still buffered
+    and are written at once; the relay keeps them ahead of its client queues.
+    """
+    counters.events[event_type] += 1
+    event = {"type": event_type}
+    if urgent:
+        event["priority"] = "high"
+    event["payload"] = payload
+    msg = json.dumps(event)
+    if TRACE:
+        global _trace_head
+        if _trace_line is None:
+            head = TRACE_TIMER_HEAD
+        else:
+            head = _trace_head
+            if head is None:
+                head = _trace_head = ', "trace": {"log": %.2f, "parse": %.2f, "emit": ' % (
+                    _trace_line[0] * 1000, _trace_line[1] * 1000)
+        msg = f"{msg[:-1]}{head}{time.time() * 1000:.2f}}}}}"
+    if _writer is not None:
+        _writer.write(msg + "\n", urgent)
+        return
     sys.stdout.write(msg + "\n")
     sys.stdout.flush()
 
 
+def emit_state_chunks(sections, terminals, count):
+    """
+    full_state in pieces: full_state_begin with every section except the
+    terminals (and their terminalCount), full_state_chunk events of at most
+    FULL_STATE_CHUNK terminals, then full_state_end. terminals is an iterable
+    of (id, dict), so the table is never built or serialised as one line.
+    The sequence is fenced: an urgent event emitted after it is a change the
+    relay must apply on top of it, not one the snapshot then overwrites.
+    """
+    emit("full_state_begin", dict(sections, terminalCount=count))
+    chunk = {}
+    for tid, t in terminals:
+        chunk[tid] = t
+        if len(chunk) >= FULL_STATE_CHUNK:
+            emit("full_state_chunk", {"terminals": chunk})
+            chunk = {}
+    if chunk:
+        emit("full_state_chunk", {"terminals": chunk})
+    emit("full_state_end", {"terminalCount": count})
+    if _writer is not None:
+        _writer.fence()
+
+
+def fetch_callsign(issi):
+    """radioid.net lookup (blocking); "" when unknown or unreachable."""
+    try:
+        response = requests.get(f"{RADIOID_API}{issi}", timeout=4.0)
+        if response.status_code == 200:
+            data = response.json()
+            if isinstance(data, dict):
+                if "callsign" in data:
+                    return str(data["callsign"] or "").upper()
+                if "results" in data and len(data["results"]) > 0:
+                    return str(data["results"][0].get("callsign", "") or "").upper()
+    except Exception:
+        pass
+    return ""
+
+
+class CommandReader:
+    """
+    Line reader for commands the Node.js relay writes to our stdin
+    (one JSON object per line). Reads whatever is available without
+    blocking on partial lines; stops watching once stdin reaches EOF.
+    """
+
+    def __init__(self, stream=None):
+        stream = stream or sys.stdin
+        try:
+            self.fd = stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            self.fd = None
+        self._buf = b""
+
+    def poll(self, timeout):
+        """Wait up to timeout seconds for commands; returns the decoded ones."""
+        if self.fd is None:
+            if timeout > 0:
+                time.sleep(timeout)
+            return []
+        r, _, _ = select.select([self.fd], [], [], timeout)
+        if not r:
+            return []
+        return self.read_ready()
+
+    def read_ready(self):
+        chunk = os.read(self.fd, 65536)
+        if not chunk:
+            self.fd = None
+            return []
+        self._buf += chunk
+        *lines, self._buf = self._buf.split(b"\n")
+        cmds = []
+        for raw in lines:
+            try:
+                cmd = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(cmd, dict):
+                cmds.append(cmd)
+        return cmds
+
+
 def _unpack_gsm7(data: bytes) -> str:
     """Unpack 7-bit GSM packed bytes into a string."""
     bits = 0
@@ -228,8 +449,823 @@ def _try_decode_lip_pdu_bytes(byte_list: list) -> dict | None:
         return result
 
 
-class TetraMonitor:
+# ── Line decoding ────────────────────────────────────────────────────────────
+# The stateless front half of TetraMonitor.process_line. A decoded line is a
+# (msg, ts, cursor, context_ssi) tuple; msg is None for lines the prefilter
+# proved irrelevant.
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+SSI_ADDR_RE = re.compile(r"received_address:\s*TetraAddress\s*\{\s*ssi:\s*(\d+),\s*ssi_type:\s*Ssi")
+SSI_RE = re.compile(r"\bssi:\s*(?:Some\()?(\d+)\)?,\s*ssi_type:\s*Ssi")
+# Every branch of TetraMonitor.apply_record needs one of these substrings; they
+# are matched against msg.lower(), which is far cheaper than re.IGNORECASE on an
+# alternation. Adding a pattern there means adding its anchor here.
+RELEVANT_RE = re.compile(
+    r"energy.saving|msrssiupdate|group_tx|call from issi|setup request|release|"
+    r"voice frame|ts_assigned|speaker change|group_idle|d-tx ceased|network call ended|"
+    r"u-disconnect|ulocationupdatedemand|affiliate|uattachdetachgroupidentity|itsidetach|"
+    r"deregister|sdsdata|u-sds-data|lat(?:itude)?[=:]|sds_report|short_transfer|sending sds|"
+    r"sds transfer|u-status"
+)
+
+
+def extract_ssi(msg):
+    if "ssi_type" not in msg:  # both patterns end in it; runs on every line
+        return None
+    m = SSI_ADDR_RE.search(msg)
+    if m:
+        return m.group(1)
+    m = SSI_RE.search(msg)
+    if m:
+        return m.group(1)
+    return None
+
+
+def decode_line(line, prefilter=False):
+    """
+    JSON export line (or decoded dict) -> (msg, ts, cursor, context_ssi, origin);
+    raises on bad input. origin (_PID) tells RecordAssembler whose record a
+    continuation line belongs to; the prefilter keeps anything that may be one.
+    """
+    data = line if isinstance(line, dict) else json.loads(line)
+    msg_raw = data.get("MESSAGE", "")
+    msg = "".join(chr(x) for x in msg_raw) if isinstance(msg_raw, list) else msg_raw
+    msg = ANSI_RE.sub("", msg)
+    if len(msg) > LINE_MAX:
+        msg = msg[:LINE_MAX]
+        counters.lines_truncated += 1
+    ts = int(data.get("__REALTIME_TIMESTAMP", time.time() * 1000000)) / 1000000
+    context_ssi = extract_ssi(msg)
+    if (prefilter and not RELEVANT_RE.search(msg.lower())
+            and msg[:1] not in RECORD_CONTINUES and not msg.rstrip().endswith(RECORD_OPENS)):
+        msg = None
+    return msg, ts, data.get("__CURSOR"), context_ssi, data.get("_PID")
+
+
+RECORD_OPENS = ("{", "(", "[")
+RECORD_CONTINUES = frozenset(" \t}])")
+# Pretty-printed Debug joined with spaces -> the compact {:?} form the parser expects.
+# A whitespace run is only tried from its first character, not from each one.
+_COMPACT = [
+    (re.compile(r"(?:,\s*|(?<![\s,])\s+)?\]"), "]"),
+    (re.compile(r"(?:,\s*|(?<![\s,])\s+)?\)"), ")"),
+    (re.compile(r",\s*\}"), " }"),
+    (re.compile(r"([\[(])\s+"), r"\1"),
+]
+
+
+def _bracket_depth(msg):
+    return (msg.count("{") + msg.count("(") + msg.count("[")
+            - msg.count("}") - msg.count(")") - msg.count("]"))
+
+
+class RecordAssembler:
+    """
+    Input stage in front of TetraMonitor. bluestation's pretty-printed ({:#?})
+    PDUs reach the journal one line per entry; each is joined back into one
+    compact line per source (origin), so the parser sees every record once
+    and whole instead of rescanning fragments. A line ending in an opening
+    bracket starts a record; lines that are indented or start with a closing
+    bracket continue it until the brackets balance. Any other line from the
+    same source, RECORD_MAX_LINES lines, LINE_MAX characters or RECORD_TIMEOUT
+    seconds cut it off, and it is passed on as far as it got.
+    """
+
+    def __init__(self):
+        self.open = {}  # origin -> [started (wall time), depth, lines, first record, last cursor, chars]
+
+    def feed(self, record, now):
+        """Records ready for the parser after this decoded line, in order; usually just the line."""
+        msg, _ts, cursor, _ctx, origin = record
+        out = []
+        if self.open:
+            out.extend(self.expire(now))
+            rec = self.open.get(origin)
+            if rec is not None:
+                if msg and msg[0] in RECORD_CONTINUES:
+                    rec[1] += _bracket_depth(msg)
+                    rec[2].append(msg)
+                    rec[4] = cursor
+                    rec[5] += len(msg)
+                    if rec[1] <= 0 or len(rec[2]) >= RECORD_MAX_LINES or rec[5] >= LINE_MAX:
+                        out.append(self._finish(origin, complete=rec[1] <= 0))
+                    return out
+                out.append(self._finish(origin, complete=False))
+        if msg and msg.rstrip().endswith(RECORD_OPENS):
+            depth = _bracket_depth(msg)
+            if depth > 0:
+                if len(self.open) >= RECORD_MAX_SOURCES:
+                    out.append(self._finish(next(iter(self.open)), complete=False))
+                self.open[origin] = [now, depth, [msg], record, cursor, len(msg)]
+                return out
+        out.append(record)
+        return out
+
+    def expire(self, now):
+        """Records open longer than RECORD_TIMEOUT, cut off."""
+        late = [origin for origin, rec in self.open.items() if now - rec[0] > RECORD_TIMEOUT]
+        return [self._finish(origin, complete=False) for origin in late]
+
+    def _finish(self, origin, complete):
+        _started, _depth, lines, first, cursor, _chars = self.open.pop(origin)
+        msg = " ".join([lines[0].rstrip()] + [line.strip() for line in lines[1:]])
+        if len(msg) > LINE_MAX:
+            msg = msg[:LINE_MAX]
+            counters.lines_truncated += 1
+        for pattern, repl in _COMPACT:
+            msg = pattern.sub(repl, msg)
+        if complete:
+            counters.records_joined += 1
+        else:
+            counters.records_cut += 1
+        return msg, first[1], cursor, extract_ssi(msg) or first[3], origin
+
+
+# ── Long-PDU scanners ────────────────────────────────────────────────────────
+# Matching for the families whose lines can carry whole PDU dumps. A pattern
+# like "A.*?B.*?C" is retried from every A and, inside that, from every B; on
+# a long line full of near misses that is quadratic or worse (one 8 kB
+# "SDS: LIP" line took 15 s). Here each field is searched once, forward from
+# the end of the one before, so a line costs about one pass per field, and
+# bracketed lists are [^\[\]]* so an unclosed one stops at the next opener.
+# bench/adversarial.py holds all of it to a per-line budget.
+
+GROUP_TX_RE = re.compile(r"GROUP_TX\s")
+SRC_DST_RE = re.compile(r"src=(\d+)\s+dst=(\d+)")
+CALL_FROM_RE = re.compile(r"call from ISSI\s*(\d+)", re.I)
+TO_GSSI_RE = re.compile(r"to GSSI\s*(\d+)", re.I)
+VOICE_FRAME_RE = re.compile(r"voice frame\s+#\d+")
+VOICE_TS_RE = re.compile(r"\bts=(\d+)")
+UUID_RE = re.compile(r"\buuid=(\S+)")
+DEAFF_RE = re.compile(r"(?:subscriber deaffiliate|BrewEntity:\s+deaffiliate)\s+issi=(\d+)\s", re.I)
+GROUPS_RE = re.compile(r"groups=\[([^\[\]]*)\]", re.I)
+UDISCONNECT_RE = re.compile(r"<-\s*U-DISCONNECT\s+UDisconnect\s*\{")
+RELEASE_RE = re.compile(r"D-?Release", re.I)
+CALL_ID_RE = re.compile(r"call_identifier:\s*(\d+)", re.I)
+USDS_RE = re.compile(r"<-\s+USdsData\s*\{")
+DSDS_RE = re.compile(r"D-SDS-DATA\s+DSdsData\s*\{")
+CALLING_SSI_RE = re.compile(r"calling_party_address_ssi:\s*Some\((\d+)\)")
+USER_DATA_RE = re.compile(r"user_defined_data:\s*Type(\d)\(\d+,\s*\[([^\[\]]+)\]\)")
+PDU_ISSI_RE = re.compile(r"issi:\s*(\d+)")
+ENERGY_MODE_RE = re.compile(r"energy_saving_mode:\s*(StayAlive|Eg\d)")
+ENERGY_NEAR = 400  # most characters between the ISSI and the mode of one PDU
+
+# LIP text forms, in order of preference (see lip_candidates): "SDS: LIP from
+# ISSI X: lat=Y lon=Z", "LipPdu { issi: X, latitude: Y, ... }" and its
+# Location* cousins, and "location ... X, lat=Y, lon=Z".
+LIP_TEXT_RE = re.compile(r"(?:SDS[:\s]+LIP|LIP report|LIP data)[:\s]", re.I)
+LIP_TEXT_ISSI_RE = re.compile(r"(\d{4,})")
+LIP_TEXT_FIELDS = [re.compile(p, re.I) for p in (
+    r"lat=([\d.+\-]+)", r"lon=([\d.+\-]+)", r"speed=([\d.]+)", r"heading=([\d.]+)")]
+LIP_BLOCKS = [
+    (re.compile(r"LipPdu\s*\{", re.I), re.compile(r"(?:issi|source_issi):\s*(\d{4,})", re.I)),
+    (re.compile(r"Location(?:Report|Pdu|Info)?\s*\{", re.I), re.compile(r"(?:issi|source):\s*(\d{4,})", re.I)),
+]
+LIP_BLOCK_FIELDS = [re.compile(p, re.I) for p in (
+    r"lat(?:itude)?:\s*([\d.+\-]+)", r"lon(?:gitude)?:\s*([\d.+\-]+)",
+    r"speed:\s*([\d.]+)", r"(?:heading|direction):\s*([\d.]+)")]
+LIP_KEYWORD_RE = re.compile(r"location|position|gps|lip", re.I)
+LIP_TAIL_RE = re.compile(
+    r"(?<!\d)(\d{4,})[,\s]+lat(?:itude)?=([\d.+\-]+)[,\s]+lon(?:gitude)?=([\d.+\-]+)"
+    r"(?:[,\s]+speed=([\d.]+))?(?:[,\s]+(?:heading|direction)=([\d.]+))?", re.I)
+# keyword -> ISSI is [^:]*[:\s]+ plus an optional prefix. Possessive, so that it
+# costs one pass: either everything up to the first colon and then a run of
+# colons and blanks, or no colon at all and a blank last.
+LIP_GAP_RE = re.compile(r"(?:[^:]*+[:\s]++|[^:]*\s)(?:source(?:_issi)?=|from[:\s]+)?", re.I)
+
+
+def scan_fields(msg, head, *fields):
+    """
+    Groups of the first head match and then of each field, each searched from
+    the end of the one before; None when one is missing. Same result as
+    re.search(head + ".*?" + field ...) without its backtracking: if the
+    first head (or field) has nothing after it, no later one can.
+    """
+    m = head.search(msg)
+    if not m:
+        return None
+    groups = list(m.groups())
+    for field in fields:
+        m = field.search(msg, m.end())
+        if not m:
+            return None
+        groups.extend(m.groups())
+    return groups
+
+
+def blocks(msg, head):
+    """
+    (start, end) from each head match to the next "}" (or the end of msg), as
+    "head[^}]*field" sees it. A head inside a block already returned is
+    skipped, since anything after it lies in that block too.
+    """
+    pos = 0
+    while True:
+        m = head.search(msg, pos)
+        if not m:
+            return
+        end = msg.find("}", m.end())
+        end = len(msg) if end < 0 else end
+        yield m.end(), end
+        pos = end
+
+
+def block_field(msg, head, field):
+    for start, end in blocks(msg, head):
+        m = field.search(msg, start, end)
+        if m:
+            return m
+    return None
+
+
+def scan_energy_saving(msg):
+    """(issi, mode) from a PDU dump naming both within ENERGY_NEAR characters, the ISSI first if possible."""
+    modes = list(ENERGY_MODE_RE.finditer(msg))
+    if not modes:
+        return None
+    issis = list(PDU_ISSI_RE.finditer(msg))
+    mode_at = [m.start() for m in modes]
+    for issi in issis:
+        i = bisect_left(mode_at, issi.end())
+        if i < len(modes) and mode_at[i] - issi.end() <= ENERGY_NEAR:
+            return issi.group(1), modes[i].group(1)
+    issi_at = [issi.start() for issi in issis]
+    for mode in modes:
+        i = bisect_left(issi_at, mode.end())
+        if i < len(issis) and issi_at[i] - mode.end() <= ENERGY_NEAR:
+            return issis[i].group(1), mode.group(1)
+    return None
+
+
+def _lip_fields(msg, issi, end, fields):
+    lat_re, lon_re, speed_re, heading_re = fields
+    lat = lat_re.search(msg, issi.end(), end)
+    lon = lat and lon_re.search(msg, lat.end(), end)
+    if not lon:
+        return None
+    speed = speed_re.search(msg, lon.end(), end)
+    heading = heading_re.search(msg, (speed or lon).end(), end)
+    return (issi.group(1), lat.group(1), lon.group(1),
+            speed.group(1) if speed else None, heading.group(1) if heading else None)
+
+
+def lip_candidates(msg):
+    """(issi, lat, lon, speed, heading) strings, speed and heading possibly None, per LIP text form found."""
+    head = LIP_TEXT_RE.search(msg)
+    issi = head and LIP_TEXT_ISSI_RE.search(msg, head.end())
+    found = issi and _lip_fields(msg, issi, len(msg), LIP_TEXT_FIELDS)
+    if found:
+        yield found
+    for head_re, issi_re in LIP_BLOCKS:
+        for start, end in blocks(msg, head_re):
+            issi = issi_re.search(msg, start, end)
+            found = issi and _lip_fields(msg, issi, end, LIP_BLOCK_FIELDS)
+            if found:
+                yield found
+                break
+    keywords = None
+    for tail in LIP_TAIL_RE.finditer(msg):
+        start = tail.start()
+        if not start or not (msg[start - 1] in ":=" or msg[start - 1].isspace()):
+            continue  # a separator or "source=" comes right before the ISSI
+        if keywords is None:
+            keywords = [m.end() for m in LIP_KEYWORD_RE.finditer(msg)]
+        # Only the last keyword before the ISSI: an earlier one fits whenever it does.
+        i = bisect_right(keywords, start) - 1
+        if i >= 0 and LIP_GAP_RE.fullmatch(msg, keywords[i], start):
+            yield tail.groups()
+            return
+
+
+class RollingWindow:
+    """
+    Sliding-window sums of (airtime, calls) per key over a fixed span.
+
+    The span is split into a ring of buckets; each bucket only holds the keys
+    that were touched while it was current, and running totals are kept per
+    key. Adding is O(1); when a bucket falls out of the window its own keys are
+    subtracted from the totals, so expiry costs are paid once per recorded
+    event and history is never rescanned.
+    """
+
+    def __init__(self, span, buckets):
+        self.span = span
+        self.width = span / buckets
+        self.ring = [None] * buckets
+        self.head = None
+        self.totals = {}
+
+    def _advance(self, now):
+        b = int(now // self.width)
+        if self.head is None:
+            self.head = b
+            return
+        if b <= self.head:
+            return
+        n = len(self.ring)
+        for step in range(1, min(b - self.head, n) + 1):
+            idx = (self.head + step) % n
+            bucket = self.ring[idx]
+            if bucket:
+                for key, (airtime, calls) in bucket.items():
+                    t = self.totals[key]
+                    t[0] -= airtime
+                    t[1] -= calls
+                    if t[1] <= 0 and t[0] <= 1e-6:
+                        del self.totals[key]
+            self.ring[idx] = None
+        self.head = b
+
+    def add(self, now, key, airtime=0.0, calls=0):
+        self._advance(now)
+        idx = self.head % len(self.ring)
+        bucket = self.ring[idx]
+        if bucket is None:
+            bucket = self.ring[idx] = {}
+        v = bucket.get(key)
+        if v is None:
+            v = bucket[key] = [0.0, 0]
+        v[0] += airtime
+        v[1] += calls
+        t = self.totals.get(key)
+        if t is None:
+            t = self.totals[key] = [0.0, 0]
+        t[0] += airtime
+        t[1] += calls
+
+    def items(self, now):
+        self._advance(now)
+        return self.totals.items()
+
+
+class AirtimeStats:
+    """Rolling per-TG / per-ISSI airtime and call counts plus timeslot occupancy."""
+
+    def __init__(self, windows=None):
+        self.windows = {name: RollingWindow(span, buckets)
+                        for name, (span, buckets) in (windows or STATS_WINDOWS).items()}
+
+    def call_started(self, now, tg, issi):
+        for w in self.windows.values():
+            if tg is not None:
+                w.add(now, ("tg", str(tg)), calls=1)
+            w.add(now, ("issi", str(issi)), calls=1)
+
+    def call_ended(self, now, tg, issi, duration, time_slot):
+        if duration <= 0:
+            return
+        for w in self.windows.values():
+            if tg is not None:
+                w.add(now, ("tg", str(tg)), airtime=duration)
+            w.add(now, ("issi", str(issi)), airtime=duration)
+            if time_slot is not None:
+                w.add(now, ("ts", str(time_slot)), airtime=duration)
+
+    def snapshot(self, now):
+        out = {}
+        for name, w in self.windows.items():
+            tgs, issis, slots = {}, [], {}
+            for (kind, key), (airtime, calls) in w.items(now):
+                if kind == "tg":
+                    tgs[key] = {"airtime": round(airtime, 1), "calls": calls}
+                elif kind == "issi":
+                    issis.append((airtime, calls, key))
+                else:
+                    slots[key] = {"airtime": round(airtime, 1),
+                                  "occupancy": round(min(airtime / w.span, 1.0), 4)}
+            issis.sort(reverse=True)
+            out[name] = {
+                "span": w.span,
+                "talkgroups": tgs,
+                "issis": {k: {"airtime": round(a, 1), "calls": c} for a, c, k in issis[:STATS_TOP_ISSI]},
+                "timeslots": slots,
+            }
+        return out
+
+
+def minute_of_week(ts):
+    t = time.localtime(ts)
+    return t.tm_wday * 1440 + t.tm_hour * 60 + t.tm_min
+
+
+def _fold(row, res):
+    """Sum each run of res columns (slice sums; res=1 is a plain copy)."""
+    if res == 1:
+        return row.tolist()
+    return [sum(row[i:i + res]) for i in range(0, len(row), res)]
+
+
+class ActivityHeatmap:
+    """
+    Week-long activity matrices, cumulative across weeks: call starts and
+    airtime per TG and per ISSI, airtime per timeslot. Each kind keeps one flat
+    array.array per resolution (minutes per column) with a row per key, so
+    recording a call is a few indexed adds (airtime is split over the minutes
+    the call covered) and a view folds rows of the coarsest matrix that fits
+    with slice sums. observed counts how often each minute of the week has
+    passed while the monitor ran, which turns sums into averages and airtime
+    into occupancy. A full kind recycles rows (_recycle); pinned keys (local
+    terminals) keep theirs. Unpinned keys are kept least recently heard first
+    (lru) and in buckets by call count, with a heap of the counts, so finding
+    the row to recycle is O(log n) however many rows there are.
+    """
+
+    # kind -> (resolutions in minutes per column, max rows)
+    KINDS = {"tg": ((1, 60), HEATMAP_MAX_TGS), "issi": ((60,), HEATMAP_MAX_ISSIS), "ts": ((1, 60), 8)}
+
     def __init__(self):
+        self.rows = {kind: {} for kind in self.KINDS}
+        self.heard = {kind: {} for kind in self.KINDS}  # key -> minute last heard
+        self.activity = {kind: [] for kind in self.KINDS}  # call starts per row, all weeks
+        self.pinned = set()
+        self.lru = {kind: OrderedDict() for kind in self.KINDS}  # unpinned keys, least recently heard first
+        self.buckets = {kind: {} for kind in self.KINDS}  # call count -> unpinned keys, least recently heard first
+        self.counts = {kind: [] for kind in self.KINDS}  # heap of bucket counts (stale ones popped lazily)
+        self.calls = {(kind, per): array("I") for kind, (pers, _) in self.KINDS.items() for per in pers}
+        self.airtime = {key: array("f") for key in self.calls}
+        self.observed = array("I", bytes(4 * WEEK_MINUTES))
+        self.since = None
+        self.last_minute = None
+        self.overflow = 0
+        self.recycled = 0
+        self.path = None
+        self.dirty = False
+        self._saving = None
+
+    def _row(self, kind, key):
+        rows = self.rows[kind]
+        r = rows.get(key)
+        if r is None:
+            pers, limit = self.KINDS[kind]
+            if len(rows) >= limit:
+                r = self._recycle(kind)
+                if r is None:
+                    self.overflow += 1
+                    return None
+                rows[key] = r
+            else:
+                r = rows[key] = len(rows)
+                self.activity[kind].append(0)
+                for per in pers:
+                    zeros = bytes(4 * (WEEK_MINUTES // per))
+                    self.calls[kind, per].frombytes(zeros)
+                    self.airtime[kind, per].frombytes(zeros)
+        self._heard(kind, key, self.activity[kind][r])
+        return r
+
+    def _heard(self, kind, key, count):
+        """Mark key as the most recently heard; a newly pinned key leaves the recycling order."""
+        self.heard[kind][key] = self.last_minute
+        lru = self.lru[kind]
+        if key in self.pinned:
+            if key in lru:
+                del lru[key]
+                self._rebucket(kind, key, count, None)
+        elif key in lru:
+            lru.move_to_end(key)
+            self.buckets[kind][count].move_to_end(key)
+        else:
+            lru[key] = None
+            self._rebucket(kind, key, None, count)
+
+    def _rebucket(self, kind, key, old, new):
+        """Move an unpinned key from count bucket old to new (None: none) as its most recently heard."""
+        buckets = self.buckets[kind]
+        if old is not None:
+            bucket = buckets[old]
+            del bucket[key]
+            if not bucket:
+                del buckets[old]
+        if new is not None:
+            bucket = buckets.get(new)
+            if bucket is None:
+                bucket = buckets[new] = OrderedDict()
+                counts = self.counts[kind]
+                heapq.heappush(counts, new)
+                if len(counts) > 2 * len(buckets) + 8:  # mostly counts whose buckets emptied
+                    counts[:] = sorted(buckets)
+            bucket[key] = None
+
+    def _recycle(self, kind):
+        """
+        Free the row of the least recently heard unpinned key if that was a
+        week or more ago, else of the unpinned key with the fewest call starts
+        (least recently heard among equals). Returns the cleared row, or None
+        when every row is pinned.
+        """
+        lru, buckets, counts = self.lru[kind], self.buckets[kind], self.counts[kind]
+        victim = next(iter(lru), None)
+        if victim is None:
+            return None
+        if self.last_minute - self.heard[kind][victim] < WEEK_MINUTES:
+            while counts[0] not in buckets:
+                heapq.heappop(counts)
+            victim = next(iter(buckets[counts[0]]))
+        r = self.rows[kind].pop(victim)
+        del lru[victim]
+        del self.heard[kind][victim]
+        self._rebucket(kind, victim, self.activity[kind][r], None)
+        self.activity[kind][r] = 0
+        for per in self.KINDS[kind][0]:
+            cols = WEEK_MINUTES // per
+            for matrix in (self.calls[kind, per], self.airtime[kind, per]):
+                matrix[r * cols:(r + 1) * cols] = array(matrix.typecode, bytes(4 * cols))
+        self.recycled += 1
+        return r
+
+    def _targets(self, kind, key):
+        r = self._row(kind, key)
+        if r is None:
+            return []
+        return [(kind, per, r * (WEEK_MINUTES // per)) for per in self.KINDS[kind][0]]
+
+    def advance(self, now):
+        """Count the minutes of the week that passed since the last call."""
+        minute = int(now // 60)
+        if self.last_minute is None:
+            self.since = self.since or now
+            self.last_minute = minute
+            self.observed[minute_of_week(now)] += 1
+            return
+        delta = minute - self.last_minute
+        if delta <= 0:
+            return
+        self.last_minute = minute
+        weeks, rest = divmod(delta, WEEK_MINUTES)
+        if weeks:
+            self.observed = array("I", (v + weeks for v in self.observed))
+        col = minute_of_week(now)
+        for k in range(rest):
+            self.observed[(col - k) % WEEK_MINUTES] += 1
+
+    def call_started(self, now, tg, issi, local=False):
+        self.advance(now)
+        col = minute_of_week(now)
+        if local:
+            self.pinned.add(str(issi))
+        for kind, key in (("issi", str(issi)), ("tg", None if tg is None else str(tg))):
+            r = None if key is None else self._row(kind, key)
+            if r is None:
+                continue
+            count = self.activity[kind][r]
+            self.activity[kind][r] = count + 1
+            if key in self.lru[kind]:
+                self._rebucket(kind, key, count, count + 1)
+            for per in self.KINDS[kind][0]:
+                self.calls[kind, per][r * (WEEK_MINUTES // per) + col // per] += 1
+        self.dirty = True
+
+    def call_ended(self, now, tg, issi, duration, time_slot):
+        if duration <= 0:
+            return
+        self.advance(now)
+        targets = self._targets("issi", str(issi))
+        if tg is not None:
+            targets += self._targets("tg", str(tg))
+        if time_slot is not None:
+            targets += self._targets("ts", str(time_slot))
+        targets = [(self.airtime[kind, per], base, per) for kind, per, base in targets]
+        # Split the call at minute boundaries; a stuck call counts for one week at most.
+        start = now - min(duration, WEEK_MINUTES * 60)
+        col = minute_of_week(start)
+        left = now - start
+        piece = min(60 - start % 60, left)
+        while left > 0:
+            for matrix, base, per in targets:
+                matrix[base + col // per] += piece
+            left -= piece
+            col = (col + 1) % WEEK_MINUTES
+            piece = min(60, left)
+        self.dirty = True
+
+    def view(self, res=60, tgs=None, issis=None, top=STATS_TOP_ISSI):
+        """
+        Folded matrices for a heatmap: res minutes per column (a divisor of a
+        week, otherwise 60). ISSI rows are hourly: they are folded the same
+        way when res is a multiple of 60 and served per hour otherwise.
+        Airtime is in seconds; "minutes" is how many monitored minutes each
+        column holds, and timeslot occupancy is airtime over that time.
+        """
+        if res < 1 or WEEK_MINUTES % res:
+            res = 60
+        issi_res = res if res % 60 == 0 else 60
+        minutes = _fold(self.observed, res)
+
+        def rows(kind, keys, res):
+            per = max(p for p in self.KINDS[kind][0] if res % p == 0)
+            cols = WEEK_MINUTES // per
+            calls, airtime = self.calls[kind, per], self.airtime[kind, per]
+            out = {}
+            for key in keys:
+                r = self.rows[kind].get(key)
+                if r is not None:
+                    out[key] = {"calls": _fold(calls[r * cols:(r + 1) * cols], res // per),
+                                "airtime": [round(v) for v in _fold(airtime[r * cols:(r + 1) * cols], res // per)]}
+            return out
+
+        if issis is None:
+            cols, air = WEEK_MINUTES // 60, self.airtime["issi", 60]
+            total = {key: sum(air[r * cols:(r + 1) * cols]) for key, r in self.rows["issi"].items()}
+            issis = sorted(total, key=total.get, reverse=True)[:top]
+        slots = rows("ts", self.rows["ts"], res)
+        for slot in slots.values():
+            slot["occupancy"] = [round(min(a / (60 * m), 1.0), 3) if m else 0 for a, m in zip(slot.pop("airtime"), minutes)]
+            del slot["calls"]
+        return {
+            "since": int(self.since * 1000) if self.since else None,
+            "res": res,
+            "issiRes": issi_res,
+            "minutes": minutes,
+            "talkgroups": rows("tg", self.rows["tg"] if tgs is None else tgs, res),
+            "issis": rows("issi", issis, issi_res),
+            "timeslots": slots,
+            "overflow": self.overflow,
+            "recycled": self.recycled,
+        }
+
+    def _named(self):
+        named = [("observed", self.observed)]
+        for kind, per in self.calls:
+            named += [(f"{kind}{per}Calls", self.calls[kind, per]), (f"{kind}{per}Airtime", self.airtime[kind, per])]
+        return named
+
+    # File: one JSON header line, then the raw arrays in the order it lists them.
+    def open(self, path):
+        """Load path if it exists and save there from now on; a bad file is reported and replaced."""
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"heatmap: ignoring {path}: {e}", file=sys.stderr)
+            return
+        try:
+            arrays, pos = {}, 0
+            for name, code, count in header["arrays"]:
+                a = array(code)
+                a.frombytes(data[pos:pos + count * a.itemsize])
+                pos += count * a.itemsize
+                if len(a) != count:
+                    raise ValueError(f"{name} truncated")
+                if header["byteorder"] != sys.byteorder:
+                    a.byteswap()
+                arrays[name] = a
+            rows = header["rows"]
+            if len(arrays["observed"]) != WEEK_MINUTES:
+                raise ValueError("observed is not one week")
+            for kind, per in self.calls:
+                for name in (f"{kind}{per}Calls", f"{kind}{per}Airtime"):
+                    if len(arrays[name]) != len(rows[kind]) * (WEEK_MINUTES // per):
+                        raise ValueError(f"{name} does not match its rows")
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"heatmap: ignoring {path}: {e}", file=sys.stderr)
+            return
+        self.observed = arrays["observed"]
+        for kind, per in self.calls:
+            self.calls[kind, per] = arrays[f"{kind}{per}Calls"]
+            self.airtime[kind, per] = arrays[f"{kind}{per}Airtime"]
+        self.since = header.get("since")
+        self.overflow = header.get("overflow", 0)
+        self.recycled = header.get("recycled", 0)
+        self.pinned = set(header.get("pinned", ()))
+        heard = header.get("heard", {})
+        last_minute = self.last_minute
+        for kind, pers in self.KINDS.items():
+            self.rows[kind] = {key: r for r, key in enumerate(rows[kind])}
+            cols, calls = WEEK_MINUTES // pers[0][0], self.calls[kind, pers[0][0]]
+            self.activity[kind] = [sum(calls[r * cols:(r + 1) * cols]) for r in range(len(rows[kind]))]
+            self.heard[kind], self.lru[kind], self.buckets[kind], self.counts[kind] = {}, OrderedDict(), {}, []
+            # Files without last-heard minutes (version 1) count every key as heard at `since`.
+            minutes = heard.get(kind) or [int((self.since or 0) // 60)] * len(rows[kind])
+            for minute, r, key in sorted(zip(minutes, range(len(minutes)), rows[kind])):
+                self.last_minute = minute
+                self._heard(kind, key, self.activity[kind][r])
+        self.last_minute = last_minute
+
+    def save(self):
+        """Write the matrices to self.path from a background thread (skipped while one is still writing)."""
+        if not self.path or not self.dirty or (self._saving and self._saving.is_alive()):
+            return
+        self.dirty = False
+        named = self._named()
+        keys = {kind: sorted(rows, key=rows.get) for kind, rows in self.rows.items()}
+        header = {"version": 2, "byteorder": sys.byteorder, "since": self.since, "overflow": self.overflow,
+                  "recycled": self.recycled, "pinned": sorted(self.pinned), "rows": keys,
+                  "heard": {kind: [self.heard[kind][key] for key in keys[kind]] for kind in keys},
+                  "arrays": [[name, a.typecode, len(a)] for name, a in named]}
+        blobs = [json.dumps(header).encode() + b"\n"] + [a.tobytes() for _, a in named]
+        self._saving = threading.Thread(target=self._write, args=(self.path, blobs), name="heatmap", daemon=True)
+        self._saving.start()
+
+    def close(self):
+        """Final save, waiting for it (and for one already running) to finish."""
+        if self._saving:
+            self._saving.join(timeout=5)
+        self.save()
+        if self._saving:
+            self._saving.join(timeout=5)
+
+    @staticmethod
+    def _write(path, blobs):
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                for blob in blobs:
+                    f.write(blob)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"heatmap: cannot save {path}: {e}", file=sys.stderr)
+
+
+class TimerWheel:
+    """
+    Two-level hashed timing wheel of deadlines keyed by any hashable.
+
+    Time is cut into `resolution`-second ticks. A deadline less than one lap
+    (len(fine) ticks) ahead sits in fine slot tick % len(fine); one further out
+    sits in the coarse slot of its lap, and when that lap begins its keys move
+    down to the fine slots, once each. A fine slot therefore only ever holds
+    the keys due at its tick. Arming, re-arming and cancelling are O(1) and a
+    tick costs the keys it expires plus its share of one lap's move-down, so
+    the idle (1 h) and eviction (24 h) timers of thousands of terminals are not
+    rescanned lap after lap. Deadlines more than len(coarse) laps ahead (about
+    three days at 1 s ticks) are looked at again once per coarse revolution.
+    """
+
+    def __init__(self, now, resolution=1.0, slots=512):
+        self.resolution = resolution
+        self.fine = [set() for _ in range(slots)]
+        self.coarse = [set() for _ in range(slots)]
+        self.deadlines = {}  # key -> (tick, the slot set holding it)
+        self.tick = int(now // resolution)
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def _place(self, key, tick):
+        lap = len(self.fine)
+        if tick - self.tick < lap:
+            slot = self.fine[tick % lap]
+        else:
+            slot = self.coarse[(tick // lap) % len(self.coarse)]
+        slot.add(key)
+        self.deadlines[key] = (tick, slot)
+
+    def schedule(self, key, when):
+        """(Re-)arm key to expire at `when`; a deadline already past fires on the next advance."""
+        self.cancel(key)
+        self._place(key, max(int(when // self.resolution), self.tick + 1))
+
+    def cancel(self, key):
+        entry = self.deadlines.pop(key, None)
+        if entry is not None:
+            entry[1].discard(key)
+
+    def advance(self, now):
+        """Move to `now` and return the keys that expired, oldest tick first."""
+        target = int(now // self.resolution)
+        lap = len(self.fine)
+        if target - self.tick >= lap:
+            return self._jump(target)
+        expired = []
+        for t in range(self.tick + 1, target + 1):
+            if t % lap == 0:
+                # A new lap: its keys move down; later laps' keys stay put.
+                self.tick = t
+                period = t // lap
+                slot = self.coarse[period % len(self.coarse)]
+                for key in [k for k in slot if self.deadlines[k][0] // lap == period]:
+                    slot.discard(key)
+                    self._place(key, self.deadlines[key][0])
+            slot = self.fine[t % lap]
+            if slot:
+                expired.extend(slot)
+                for key in slot:
+                    del self.deadlines[key]
+                slot.clear()
+        self.tick = max(self.tick, target)
+        return expired
+
+    def _jump(self, target):
+        """After a stall of a lap or more: expire what is due and re-place the rest, one pass."""
+        due = sorted((tick, key) for key, (tick, _slot) in self.deadlines.items() if tick <= target)
+        for slot in self.fine + self.coarse:
+            slot.clear()
+        pending = [(key, tick) for key, (tick, _slot) in self.deadlines.items() if tick > target]
+        self.deadlines = {}
+        self.tick = target
+        for key, tick in pending:
+            self._place(key, tick)
+        return [key for _tick, key in due]
+
+
+class TetraMonitor:
+    def __init__(self, station=None, hub=None):
+        self.station = station             # tag added to every payload when several stations are monitored
+        self.hub = hub
         self.terminals = {}
         self.hist_local = []
         self.hist_ext = []
@@ -242,40 +1278,195 @@ class TetraMonitor:
         self.sds_pending_ack = {}          # (dst, src) -> timestamp, for delivery-report filtering
         self.sds_content_pending = {}      # src_issi -> {type, content, ts} for text/LIP correlation
         self.sds_entry_ts = {}             # entry_id -> float ts; used for retroactive text attachment
-        self._pending_usds_bytes = None    # bytes from USdsData line; correlated on next U-SDS-DATA line
+        self.pending_usds = deque(maxlen=USDS_PENDING_MAX)  # (wall time, bytes) of USdsData records, oldest first
+        self.assembler = RecordAssembler()
         self.private_calls = {}            # call_id -> {src, dst} for P2P individual call tracking
         self.brew_circuits = {}            # uuid -> call_id for network-initiated private calls
+        self.group_streams = {}            # uuid -> gssi of the Brew GROUP_TX stream (latest per TG)
+        self.open_calls = {}               # "TG:<gssi>" / "PRIV:<call_id>" -> history entry still on air
+        self.replay = {}                   # call/SDS key -> seeded entry a re-read journal line may start again
+        self.energy_saving_hints = {}      # issi -> "EgN" class reported by the relay (flowstation :8080 WS)
+        self.stats = hub.stats if hub else AirtimeStats()
+        self.heatmap = hub.heatmap if hub else ActivityHeatmap()
+        self.lines_processed = 0
+        self.lines_matched = 0             # lines that produced at least one event
+        self.events_emitted = 0
+        self.last_lag = None               # seconds between journal timestamp and processing of the last line
+        self.last_line_at = None
+        self.journal_cursor = None         # __CURSOR of the last journal entry processed
+        self.timers = TimerWheel(time.time())  # ("call", tg key) / ("brew", uuid) / ("idle"|"evict", issi)
+        self.seen_at = OrderedDict()       # issi -> wall time last heard, least recently heard first
+        self._table_grew = False
 
     def get_callsign(self, issi):
         if not issi or int(issi) < 1000:
             return ""
         if issi in self.callsign_cache:
+            counters.callsign_hits += 1
             return self.callsign_cache[issi]
+        counters.callsign_misses += 1
         if not HAS_REQUESTS:
             self.callsign_cache[issi] = ""
             return ""
-        try:
-            response = requests.get(f"{RADIOID_API}{issi}", timeout=4.0)
-            if response.status_code == 200:
-                data = response.json()
-                call = ""
-                if isinstance(data, dict):
-                    if "callsign" in data:
-                        call = data["callsign"]
-                    elif "results" in data and len(data["results"]) > 0:
-                        call = data["results"][0].get("callsign", "")
-                if call:
-                    self.callsign_cache[issi] = str(call).upper()
-                    return self.callsign_cache[issi]
-        except Exception:
-            pass
-        self.callsign_cache[issi] = ""
-        return ""
+        if self.hub and self.hub.resolver:
+            # Async loop: resolve in the background, update_terminal follows.
+            self.hub.resolver.lookup(issi)
+            return ""
+        started = time.monotonic()
+        self.callsign_cache[issi] = fetch_callsign(issi)
+        counters.observe_radioid(time.monotonic() - started)
+        return self.callsign_cache[issi]
 
     def _next_id(self):
+        if self.hub:
+            return self.hub.next_id()
         self.event_counter += 1
         return str(self.event_counter)
 
+    def _emit(self, event_type, payload, urgent=False):
+        self.events_emitted += 1
+        if self.station:
+            payload["station"] = self.station
+        if self.hub:
+            self.hub.on_event(event_type, payload, urgent)
+        else:
+            emit(event_type, payload, urgent)
+
+    def _open_call(self, key, entry, ts, tg=None):
+        """Track a history entry as on air from ts; closes whatever was open under key."""
+        self._close_call(key, ts)
+        entry["startTs"] = int(ts * 1000)
+        entry["endTs"] = None
+        entry["duration"] = None
+        self.open_calls[key] = entry
+        self.stats.call_started(ts, tg, entry["sourceId"])
+        self.heatmap.call_started(ts, tg, entry["sourceId"], local=entry.get("isLocal", False))
+
+    def _close_call(self, key, ts):
+        """Stamp end time and duration on the open entry for key and emit update_call."""
+        entry = self.open_calls.pop(key, None)
+        if entry is None:
+            return
+        end_ms = max(int(ts * 1000), entry["startTs"])
+        entry["endTs"] = end_ms
+        entry["duration"] = round((end_ms - entry["startTs"]) / 1000, 1)
+        tg = None if entry.get("callType") == "private" else entry.get("targetTg")
+        self.stats.call_ended(ts, tg, entry["sourceId"], entry["duration"], entry.get("timeSlot"))
+        self.heatmap.call_ended(ts, tg, entry["sourceId"], entry["duration"], entry.get("timeSlot"))
+        self._emit("update_call", entry)
+
+    def _start_call(self, key, entry, ts, is_local, tg=None):
+        """
+        Add a new call's entry to the history and open it under key. Returns
+        False when a line re-read after a restart starts a call the seed
+        already holds: that entry is reopened instead, keeping the id the relay
+        knows it by, and there is nothing to announce with new_call.
+        """
+        seeded = self.replay.pop(("call", entry["sourceId"], entry["targetTg"], int(ts * 1000)), None)
+        if seeded is not None:
+            self._open_call(key, seeded, ts, tg=tg)
+            return False
+        self._add_history(entry, is_local)
+        self._open_call(key, entry, ts, tg=tg)
+        return True
+
+    def _add_sds(self, entry, urgent=False):
+        """Keep entry in the SDS history and emit it, unless it is a seeded SDS re-read after a restart."""
+        if self.replay.pop(("sds", entry["srcIssi"], entry["dstIssi"], entry["timestamp"], entry["messageType"]), None):
+            return
+        self.sds_messages.insert(0, entry)
+        self.sds_messages = self.sds_messages[:MAX_HISTORY]
+        self._emit("sds_message", entry, urgent)
+
+    def _add_history(self, entry, is_local):
+        if is_local:
+            self.hist_local.insert(0, entry)
+            self.hist_local = self.hist_local[:MAX_HISTORY]
+        else:
+            self.hist_ext.insert(0, entry)
+            self.hist_ext = self.hist_ext[:MAX_HISTORY]
+
+    def _group_call_entry(self, s_issi, d_gssi, timestamp):
+        call = self.get_callsign(s_issi)
+        display_name = f"{s_issi} ({call})" if call else s_issi
+        return {
+            "id": self._next_id(),
+            "timestamp": timestamp,
+            "sourceId": s_issi,
+            "sourceCallsign": call,
+            "targetTg": d_gssi,
+            "display": f"[{timestamp}] {display_name} -> TG {d_gssi}",
+            "isLocal": self.terminals[s_issi]["is_local"],
+            "activity": "TX",
+            "timeSlot": self.terminals[s_issi].get("time_slot", None),
+        }
+
+    def checkpoint(self):
+        """
+        Internal state the relay cannot rebuild from the events it has seen.
+        Sent back to a fresh process (with the relay's terminals and histories)
+        in the "seed" command after a restart.
+        """
+        return {
+            "journalCursor": self.journal_cursor,
+            "lastActive": self.last_active,
+            "privateCalls": self.private_calls,
+            "brewCircuits": self.brew_circuits,
+            "groupStreams": self.group_streams,
+            "openCalls": {key: entry["id"] for key, entry in self.open_calls.items()},
+        }
+
+    def apply_seed(self, seed, cp):
+        """Resume from the state the relay held for the previous process (cp = our checkpoint)."""
+        for tid, d in (seed.get("terminals") or {}).items():
+            self.terminals[tid] = {
+                "selected": d.get("selectedTg", "---"),
+                "groups": list(d.get("groups") or []),
+                "status": d.get("status", "Offline"),
+                "is_local": bool(d.get("isLocal")),
+                "last_seen": d.get("lastSeen", ""),
+                "activity": d.get("activity"),
+                "activity_tg": d.get("activityTg"),
+                "time_slot": d.get("timeSlot"),
+                "rssi_dbfs": d.get("rssiDbfs"),
+                "energy_saving": d.get("energySaving"),
+            }
+            if d.get("callsign"):
+                self.callsign_cache[tid] = d["callsign"]
+        self.hist_local = list(seed.get("localHistory") or [])[:MAX_HISTORY]
+        self.hist_ext = list(seed.get("externalHistory") or [])[:MAX_HISTORY]
+        self.sds_messages = list(seed.get("sdsMessages") or [])[:MAX_HISTORY]
+
+        self.journal_cursor = cp.get("journalCursor")
+        self.last_active = cp.get("lastActive")
+        self.private_calls = dict(cp.get("privateCalls") or {})
+        self.brew_circuits = dict(cp.get("brewCircuits") or {})
+        self.group_streams = dict(cp.get("groupStreams") or {})
+        by_id = {e.get("id"): e for e in self.hist_local + self.hist_ext}
+        for key, entry_id in (cp.get("openCalls") or {}).items():
+            entry = by_id.get(entry_id)
+            if entry is not None and entry.get("endTs") is None:
+                self.open_calls[key] = entry
+        # The journal is re-read from the checkpoint's cursor, which can be a
+        # heartbeat (or a stall timeout) behind the relay: calls and SDS those
+        # lines start again are matched to the seed's entries, not re-sent.
+        self.replay = {("call", e.get("sourceId"), e.get("targetTg"), e.get("startTs")): e
+                       for e in self.hist_local + self.hist_ext if e.get("startTs") is not None}
+        self.replay.update((("sds", e.get("srcIssi"), e.get("dstIssi"), e.get("timestamp"), e.get("messageType")), e)
+                           for e in self.sds_messages)
+        # Restart the expiry clocks for whatever the seed says is live.
+        now = time.time()
+        for tid, t in self.terminals.items():
+            self.seen_at[tid] = now
+            if not t["is_local"]:
+                self._arm(("evict", tid), EXTERNAL_TTL)
+            if t["status"] == "Online":
+                self._arm(("idle", tid), IDLE_TIMEOUT)
+            if t.get("activity_tg") is not None:
+                self._arm(("call", str(t["activity_tg"])), CALL_TIMEOUT)
+        for uuid in self.brew_circuits:
+            self._arm(("brew", uuid), CALL_TIMEOUT)
+
     def _attach_content_to_pending_entry(self, src_issi: str, ctype: str, cvalue) -> bool:
         """
         Retroactively attach text/LIP content to the most recent SDS entry for this
@@ -298,7 +1489,7 @@ class TetraMonitor:
                 elif ctype == "lip":
                     entry["lipData"] = cvalue
                 self.sds_content_pending.pop(src_issi, None)
-                emit("sds_message", entry)
+                self._emit("sds_message", entry)
                 return True
         return False
 
@@ -317,16 +1508,38 @@ class TetraMonitor:
             "activityTg": t.get("activity_tg", None),
             "timeSlot": t.get("time_slot", None),
             "rssiDbfs": t.get("rssi_dbfs", None),
-            "energySaving": t.get("energy_saving", None),
+            "energySaving": self._energy_saving(tid, t),
         }
 
+    def _energy_saving(self, tid, t):
+        # Our own log-derived value wins; otherwise fall back to the EG class the
+        # relay learned from the flowstation dashboard (never downgraded to null).
+        es = t.get("energy_saving", None)
+        return es if es is not None else self.energy_saving_hints.get(tid)
+
+    def handle_command(self, cmd):
+        """Apply a command sent by the relay over stdin."""
+        ctype = cmd.get("type")
+        if ctype == "energy_saving":
+            issi = str(cmd.get("issi", ""))
+            mode = cmd.get("mode")
+            t = self.terminals.get(issi)
+            before = self._energy_saving(issi, t) if t else None
+            if mode:
+                self.energy_saving_hints[issi] = mode
+            else:
+                self.energy_saving_hints.pop(issi, None)
+            if t and self._energy_saving(issi, t) != before:
+                self._emit("update_terminal", self._terminal_to_dict(issi))
+
     def _set_activity(self, s_issi, d_gssi, time_slot=None):
         """Set TX on source, RX on all terminals listening on same TG."""
+        self._arm(("call", str(d_gssi)), CALL_TIMEOUT)
         self.terminals[s_issi]["activity"] = "TX"
         self.terminals[s_issi]["activity_tg"] = d_gssi
         if time_slot is not None:
             self.terminals[s_issi]["time_slot"] = time_slot
-        emit("update_terminal", self._terminal_to_dict(s_issi))
+        self._emit("update_terminal", self._terminal_to_dict(s_issi))
 
         for tid, t in self.terminals.items():
             if tid == s_issi:
@@ -341,27 +1554,50 @@ class TetraMonitor:
                 t["activity_tg"] = d_gssi
                 if time_slot is not None:
                     t["time_slot"] = time_slot
-                emit("update_terminal", self._terminal_to_dict(tid))
+                self._emit("update_terminal", self._terminal_to_dict(tid))
+
+    def _voice_alive(self, uuid):
+        """
+        A voice frame of this Brew stream: restart the timer of the call it
+        carries, whoever talked last. False if the stream belongs to no call
+        on air (local P2P frames, say); the caller then falls back to last_active.
+        """
+        call_id = self.brew_circuits.get(uuid)
+        if call_id is not None and call_id in self.private_calls:
+            self._arm(("call", f"PRIV_{call_id}"), CALL_TIMEOUT)
+            return True
+        gssi = self.group_streams.get(uuid)
+        if gssi is not None and f"TG:{gssi}" in self.open_calls:
+            self._arm(("call", str(gssi)), CALL_TIMEOUT)
+            return True
+        return False
 
-    def _update_time_slot(self, voice_ts):
-        """Update time slot on active terminals (same TG as last_active) and most recent history entry."""
+    def _update_time_slot(self, voice_ts, arm=True):
+        """
+        Update time slot on active terminals (same TG as last_active) and most
+        recent history entry; with arm, last_active's call also counts as alive.
+        """
         if not self.last_active or self.last_active not in self.terminals:
             return
         t = self.terminals[self.last_active]
-        if not t.get("activity") or t.get("time_slot") == voice_ts:
+        if not t.get("activity"):
+            return
+        if arm and t.get("activity_tg") is not None:
+            self._arm(("call", str(t["activity_tg"])), CALL_TIMEOUT)  # voice on air: call still alive
+        if t.get("time_slot") == voice_ts:
             return
         active_tg = t.get("activity_tg")
         t["time_slot"] = voice_ts
-        emit("update_terminal", self._terminal_to_dict(self.last_active))
+        self._emit("update_terminal", self._terminal_to_dict(self.last_active))
         for tid, tt in self.terminals.items():
             if tid != self.last_active and tt.get("activity") == "RX" and str(tt.get("activity_tg")) == str(active_tg):
                 if tt.get("time_slot") != voice_ts:
                     tt["time_slot"] = voice_ts
-                    emit("update_terminal", self._terminal_to_dict(tid))
+                    self._emit("update_terminal", self._terminal_to_dict(tid))
         for hist in [self.hist_local, self.hist_ext]:
             if hist and hist[0].get("sourceId") == self.last_active and hist[0].get("timeSlot") != voice_ts:
                 hist[0]["timeSlot"] = voice_ts
-                emit("update_call", hist[0])
+                self._emit("update_call", hist[0])
 
     def _clear_activity(self, tg=None):
         """Clear TX/RX activity states. If tg is given, only clear terminals on that TG."""
@@ -372,7 +1608,7 @@ class TetraMonitor:
                 t["activity"] = None
                 t["activity_tg"] = None
                 t["time_slot"] = None
-                emit("update_terminal", self._terminal_to_dict(tid))
+                self._emit("update_terminal", self._terminal_to_dict(tid))
 
     def _restore_selected(self, issi, orig_selected):
         """After a private call ends, restore the terminal's selected TG."""
@@ -397,37 +1633,110 @@ class TetraMonitor:
                 self.terminals[issi]["activity_tg"] = None
                 self.terminals[issi]["time_slot"] = None
                 self._restore_selected(issi, pc.get(orig_key))
-                emit("update_terminal", self._terminal_to_dict(issi))
+                self._emit("update_terminal", self._terminal_to_dict(issi))
+
+    def _arm(self, key, timeout):
+        if timeout:
+            self.timers.schedule(key, time.time() + timeout)
+
+    def _touch(self, issi, timestamp):
+        """The terminal was heard: stamp last_seen and restart its idle and eviction timers."""
+        self.terminals[issi]["last_seen"] = timestamp
+        if issi not in self.seen_at:
+            self._table_grew = True
+        self.seen_at[issi] = time.time()
+        self.seen_at.move_to_end(issi)
+        self._arm(("idle", issi), IDLE_TIMEOUT)
+        self._arm(("evict", issi), EXTERNAL_TTL)
+
+    def _evictable(self, issi):
+        """External, idle and not part of anything on air."""
+        t = self.terminals.get(issi)
+        if t is None or t["is_local"] or t.get("activity") or issi == self.last_active:
+            return False
+        if any(issi in (pc["src"], pc["dst"]) for pc in self.private_calls.values()):
+            return False
+        return not any(e.get("sourceId") == issi for e in self.open_calls.values())
+
+    def _remove_terminal(self, issi):
+        del self.terminals[issi]
+        self.seen_at.pop(issi, None)
+        self.callsign_cache.pop(issi, None)
+        self.timers.cancel(("idle", issi))
+        self.timers.cancel(("evict", issi))
+        self._emit("remove_terminal", {"id": issi})
+
+    def _enforce_cap(self):
+        """Drop the least recently heard evictable terminals until the table fits MAX_TERMINALS."""
+        excess = len(self.terminals) - MAX_TERMINALS
+        victims = []
+        for issi in self.seen_at:
+            if len(victims) >= excess:
+                break
+            if self._evictable(issi):
+                victims.append(issi)
+        for issi in victims:
+            self._remove_terminal(issi)
+
+    def expire(self, now):
+        """Fire due timers; each emits what the missed log line would have."""
+        if self.assembler.open:
+            for record in self.assembler.expire(now):
+                self._parse_record(record)
+        for kind, key in self.timers.advance(now):
+            if kind == "call":
+                self._expire_call(key, now)
+            elif kind == "brew" and key in self.brew_circuits:
+                if self.brew_circuits[key] in self.private_calls:
+                    self._arm(("brew", key), CALL_TIMEOUT)  # the call's own timer decides
+                else:
+                    del self.brew_circuits[key]
+            elif kind == "idle":
+                t = self.terminals.get(key)
+                if t is None or t["status"] != "Online":
+                    continue
+                if t.get("activity"):
+                    self._arm(("idle", key), IDLE_TIMEOUT)
+                    continue
+                t["status"] = "Offline"
+                self._emit("update_terminal", self._terminal_to_dict(key))
+            elif kind == "evict" and key in self.terminals:
+                if self._evictable(key):
+                    self._remove_terminal(key)
+                elif not self.terminals[key]["is_local"]:
+                    self._arm(("evict", key), EXTERNAL_TTL)  # busy now; look again later
+        if self._table_grew:
+            if MAX_TERMINALS and len(self.terminals) > MAX_TERMINALS:
+                self._enforce_cap()
+            # Still over: everything old is on air right now, look again next tick.
+            self._table_grew = bool(MAX_TERMINALS) and len(self.terminals) > MAX_TERMINALS
+
+    def _expire_call(self, tg_key, now):
+        """No call-end line for CALL_TIMEOUT seconds: end the call as GROUP_IDLE / a release would."""
+        last_alive = now - CALL_TIMEOUT
+        if tg_key.startswith("PRIV_"):
+            call_id = tg_key[len("PRIV_"):]
+            self._close_call(f"PRIV:{call_id}", last_alive)
+            pc = self.private_calls.pop(call_id, None)
+            if pc:
+                self._end_private_call(pc)
+            else:
+                self._clear_activity(tg=tg_key)
+            self.brew_circuits = {u: c for u, c in self.brew_circuits.items() if c != call_id}
+        else:
+            self._close_call(f"TG:{tg_key}", last_alive)
+            self._clear_activity(tg=tg_key)
 
     def emit_full_state(self):
-        terminals = {}
-        for tid in self.terminals:
-            terminals[tid] = self._terminal_to_dict(tid)
-        emit("full_state", {
-            "terminals": terminals,
+        emit_state_chunks({
             "localHistory": self.hist_local[-MAX_HISTORY:],
             "externalHistory": self.hist_ext[-MAX_HISTORY:],
             "sdsMessages": self.sds_messages[-MAX_HISTORY:],
-        })
-
-    def _extract_ssi(self, msg):
-        m = re.search(
-            r"received_address:\s*TetraAddress\s*\{\s*ssi:\s*(\d+),\s*ssi_type:\s*Ssi",
-            msg
-        )
-        if m:
-            return m.group(1)
-        m = re.search(
-            r"\bssi:\s*(?:Some\()?(\d+)\)?,\s*ssi_type:\s*Ssi",
-            msg
-        )
-        if m:
-            return m.group(1)
-        return None
+        }, ((tid, self._terminal_to_dict(tid)) for tid in self.terminals), len(self.terminals))
 
     def _extract_gssi_list(self, msg):
         groups = []
-        for m in re.finditer(r"GroupIdentityUplink\s*\{([^}]+)\}", msg):
+        for m in re.finditer(r"GroupIdentityUplink\s*\{([^{}]+)\}", msg):
             block = m.group(1)
             g = re.search(r"\bgssi:\s*Some\((\d+)\)", block)
             if g:
@@ -436,17 +1745,42 @@ class TetraMonitor:
         return groups
 
     def process_line(self, line):
+        """Handle one journal entry (JSON export line, or an already-decoded dict)."""
         try:
-            data = json.loads(line)
-            msg_raw = data.get("MESSAGE", "")
-            msg = "".join(chr(x) for x in msg_raw) if isinstance(msg_raw, list) else msg_raw
-            msg = re.sub(r'\x1b\[[0-9;]*m', '', msg)
-            ts = int(data.get("__REALTIME_TIMESTAMP", time.time() * 1000000)) / 1000000
-            timestamp = datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+            record = decode_line(line, prefilter=True)
+        except Exception:
+            return
+        self.apply_record(record)
 
-            context_ssi = self._extract_ssi(msg)
-            if context_ssi:
-                self.last_context_id = context_ssi
+    def apply_record(self, record):
+        """Apply one decode_line() result to the monitor state; records must arrive in log order."""
+        now = time.time()
+        self.lines_processed += 1
+        self.last_line_at = now
+        self.last_lag = max(0.0, now - record[1])
+        for whole in self.assembler.feed(record, now):
+            self._parse_record(whole)
+
+    def _parse_record(self, record):
+        """One complete record (a line, or a multi-line record joined by RecordAssembler)."""
+        global _trace_line, _trace_head
+        emitted = self.events_emitted
+        _trace_line, _trace_head = (record[1], time.time()), None
+        self._apply_record(record)
+        _trace_line = None
+        if self.events_emitted != emitted:
+            self.lines_matched += 1
+
+    def _apply_record(self, record):
+        msg, ts, cursor, context_ssi, _origin = record
+        if cursor is not None:
+            self.journal_cursor = cursor
+        if context_ssi:
+            self.last_context_id = context_ssi
+        if msg is None:
+            return
+        try:
+            timestamp = datetime.fromtimestamp(ts).strftime("%H:%M:%S")
 
             # 0a. Energy saving mode (Flowstation): EG1/EG2/EG3 detection.
             # Patterns:
@@ -466,32 +1800,18 @@ class TetraMonitor:
                     prev = self.terminals[es_issi].get("energy_saving", None)
                     if prev != new_val:
                         self.terminals[es_issi]["energy_saving"] = new_val
-                        self.terminals[es_issi]["last_seen"] = timestamp
-                        emit("update_terminal", self._terminal_to_dict(es_issi))
+                        self._touch(es_issi, timestamp)
+                        self._emit("update_terminal", self._terminal_to_dict(es_issi))
                 return
             # PDU debug fallback: same-line co-occurrence of issi + energy_saving_mode
             if "energy_saving_mode" in msg:
-                pdu_es = re.search(
-                    r"issi:\s*(\d+)[\s\S]{0,400}?energy_saving_mode:\s*(StayAlive|Eg\d)",
-                    msg
-                )
-                if not pdu_es:
-                    pdu_es = re.search(
-                        r"energy_saving_mode:\s*(StayAlive|Eg\d)[\s\S]{0,400}?issi:\s*(\d+)",
-                        msg
-                    )
-                    if pdu_es:
-                        pdu_mode, pdu_issi = pdu_es.group(1), pdu_es.group(2)
-                    else:
-                        pdu_mode = pdu_issi = None
-                else:
-                    pdu_issi, pdu_mode = pdu_es.group(1), pdu_es.group(2)
+                pdu_issi, pdu_mode = scan_energy_saving(msg) or (None, None)
                 if pdu_issi and pdu_mode and pdu_issi in self.terminals:
                     new_val = None if pdu_mode.lower() == "stayalive" else pdu_mode.capitalize()
                     prev = self.terminals[pdu_issi].get("energy_saving", None)
                     if prev != new_val:
                         self.terminals[pdu_issi]["energy_saving"] = new_val
-                        emit("update_terminal", self._terminal_to_dict(pdu_issi))
+                        self._emit("update_terminal", self._terminal_to_dict(pdu_issi))
 
             # 0. RSSI updates: MsRssiUpdate { issi: NNN, rssi_dbfs: -12.34 }
             # Logged by bluestation/flowstation when terminal registers and on >=3dB changes.
@@ -503,16 +1823,16 @@ class TetraMonitor:
                 r_issi, r_dbfs = rssi_match.group(1), float(rssi_match.group(2))
                 if r_issi in self.terminals:
                     self.terminals[r_issi]["rssi_dbfs"] = r_dbfs
-                    self.terminals[r_issi]["last_seen"] = timestamp
-                    emit("update_terminal", self._terminal_to_dict(r_issi))
+                    self._touch(r_issi, timestamp)
+                    self._emit("update_terminal", self._terminal_to_dict(r_issi))
                 return
 
             # 1. CALLS (GROUP_TX from BrewWorker)
-            call_match = re.search(r"GROUP_TX\s+.*?src=(\d+)\s+dst=(\d+)", msg)
+            call_match = scan_fields(msg, GROUP_TX_RE, SRC_DST_RE)
             if not call_match:
-                call_match = re.search(r"call from ISSI\s*(\d+).*?to GSSI\s*(\d+)", msg, re.I)
+                call_match = scan_fields(msg, CALL_FROM_RE, TO_GSSI_RE)
             if call_match:
-                s_issi, d_gssi = call_match.groups()
+                s_issi, d_gssi = call_match
                 self.last_active = s_issi
                 if s_issi not in self.terminals:
                     self.terminals[s_issi] = {
@@ -524,37 +1844,26 @@ class TetraMonitor:
                         "activity": None,
                         "activity_tg": None,
                     }
+                    self._touch(s_issi, timestamp)
                 else:
                     self.terminals[s_issi]["selected"] = f"TG {d_gssi}"
-                    self.terminals[s_issi]["last_seen"] = timestamp
+                    self._touch(s_issi, timestamp)
                     if d_gssi not in self.terminals[s_issi]["groups"]:
                         self.terminals[s_issi]["groups"].append(d_gssi)
 
-                call = self.get_callsign(s_issi)
-                display_name = f"{s_issi} ({call})" if call else s_issi
-                call_ts = self.terminals[s_issi].get("time_slot", None)
-                entry = {
-                    "id": self._next_id(),
-                    "timestamp": timestamp,
-                    "sourceId": s_issi,
-                    "sourceCallsign": call,
-                    "targetTg": d_gssi,
-                    "display": f"[{timestamp}] {display_name} -> TG {d_gssi}",
-                    "isLocal": self.terminals[s_issi]["is_local"],
-                    "activity": "TX",
-                    "timeSlot": call_ts,
-                }
+                uuid = UUID_RE.search(msg)
+                if uuid:
+                    # One stream per TG: a new one supersedes whatever was left of the last.
+                    self.group_streams = {u: g for u, g in self.group_streams.items() if g != d_gssi}
+                    self.group_streams[uuid.group(1)] = d_gssi
 
-                if self.terminals[s_issi]["is_local"]:
-                    self.hist_local.insert(0, entry)
-                    self.hist_local = self.hist_local[:MAX_HISTORY]
-                else:
-                    self.hist_ext.insert(0, entry)
-                    self.hist_ext = self.hist_ext[:MAX_HISTORY]
+                entry = self._group_call_entry(s_issi, d_gssi, timestamp)
+                fresh = self._start_call(f"TG:{d_gssi}", entry, ts, self.terminals[s_issi]["is_local"], tg=d_gssi)
 
                 self._clear_activity(tg=d_gssi)
                 self._set_activity(s_issi, d_gssi)
-                emit("new_call", entry)
+                if fresh:
+                    self._emit("new_call", entry)
                 return
 
             # 1a. PRIVATE CALL (P2P individual call — rx_u_setup_p2p)
@@ -586,9 +1895,10 @@ class TetraMonitor:
                         "activity": None,
                         "activity_tg": None,
                     }
+                    self._touch(s_issi, timestamp)
                 else:
                     self.terminals[s_issi]["selected"] = f"PRIV → {d_issi}"
-                    self.terminals[s_issi]["last_seen"] = timestamp
+                    self._touch(s_issi, timestamp)
 
                 # Register dst terminal if not known
                 if d_issi not in self.terminals:
@@ -601,8 +1911,9 @@ class TetraMonitor:
                         "activity": None,
                         "activity_tg": None,
                     }
+                    self._touch(d_issi, timestamp)
                 else:
-                    self.terminals[d_issi]["last_seen"] = timestamp
+                    self._touch(d_issi, timestamp)
 
                 call = self.get_callsign(s_issi)
                 dst_call = self.get_callsign(d_issi)
@@ -624,24 +1935,21 @@ class TetraMonitor:
                     "callType": "private",
                 }
 
-                if self.terminals[s_issi]["is_local"]:
-                    self.hist_local.insert(0, entry)
-                    self.hist_local = self.hist_local[:MAX_HISTORY]
-                else:
-                    self.hist_ext.insert(0, entry)
-                    self.hist_ext = self.hist_ext[:MAX_HISTORY]
+                fresh = self._start_call(f"PRIV:{call_id}", entry, ts, self.terminals[s_issi]["is_local"])
 
                 # src=TX, dst=RX, scoped to unique private call key
                 priv_tg_key = f"PRIV_{call_id}"
+                self._arm(("call", priv_tg_key), CALL_TIMEOUT)
                 self.terminals[s_issi]["activity"] = "TX"
                 self.terminals[s_issi]["activity_tg"] = priv_tg_key
-                emit("update_terminal", self._terminal_to_dict(s_issi))
+                self._emit("update_terminal", self._terminal_to_dict(s_issi))
 
                 self.terminals[d_issi]["activity"] = "RX"
                 self.terminals[d_issi]["activity_tg"] = priv_tg_key
-                emit("update_terminal", self._terminal_to_dict(d_issi))
+                self._emit("update_terminal", self._terminal_to_dict(d_issi))
 
-                emit("new_call", entry)
+                if fresh:
+                    self._emit("new_call", entry)
                 return
 
             # 1b. NETWORK-INITIATED PRIVATE CALL (Brew Circuit from external BS/TetraLink)
@@ -660,9 +1968,11 @@ class TetraMonitor:
                     _uuid, _src, _dst = brew_p2p_match.group(1), brew_p2p_match.group(2), brew_p2p_match.group(3)
                     brew_p2p_match = None  # handled below via uuid tracking only
                     self.brew_circuits[_uuid] = None  # placeholder until call_id known
+                    self._arm(("brew", _uuid), CALL_TIMEOUT)
             if brew_p2p_match:
                 uuid, call_id, s_issi, d_issi = brew_p2p_match.groups()
                 self.brew_circuits[uuid] = call_id
+                self._arm(("brew", uuid), CALL_TIMEOUT)
 
                 # Save original selected before overwriting
                 orig_src_sel = self.terminals[s_issi].get("selected") if s_issi in self.terminals else None
@@ -684,9 +1994,10 @@ class TetraMonitor:
                         "activity": None,
                         "activity_tg": None,
                     }
+                    self._touch(s_issi, timestamp)
                 else:
                     self.terminals[s_issi]["selected"] = f"PRIV → {d_issi}"
-                    self.terminals[s_issi]["last_seen"] = timestamp
+                    self._touch(s_issi, timestamp)
 
                 # Register dst terminal (local or external on our BS — receiver)
                 if d_issi not in self.terminals:
@@ -699,9 +2010,10 @@ class TetraMonitor:
                         "activity": None,
                         "activity_tg": None,
                     }
+                    self._touch(d_issi, timestamp)
                 else:
                     self.terminals[d_issi]["selected"] = f"PRIV ← {s_issi}"
-                    self.terminals[d_issi]["last_seen"] = timestamp
+                    self._touch(d_issi, timestamp)
 
                 call = self.get_callsign(s_issi)
                 dst_call = self.get_callsign(d_issi)
@@ -723,35 +2035,34 @@ class TetraMonitor:
                     "callType": "private",
                 }
 
-                if self.terminals[d_issi]["is_local"]:
-                    self.hist_local.insert(0, entry)
-                    self.hist_local = self.hist_local[:MAX_HISTORY]
-                else:
-                    self.hist_ext.insert(0, entry)
-                    self.hist_ext = self.hist_ext[:MAX_HISTORY]
+                fresh = self._start_call(f"PRIV:{call_id}", entry, ts, self.terminals[d_issi]["is_local"])
 
                 priv_tg_key = f"PRIV_{call_id}"
+                self._arm(("call", priv_tg_key), CALL_TIMEOUT)
                 self.terminals[s_issi]["activity"] = "TX"
                 self.terminals[s_issi]["activity_tg"] = priv_tg_key
-                emit("update_terminal", self._terminal_to_dict(s_issi))
+                self._emit("update_terminal", self._terminal_to_dict(s_issi))
 
                 self.terminals[d_issi]["activity"] = "RX"
                 self.terminals[d_issi]["activity_tg"] = priv_tg_key
-                emit("update_terminal", self._terminal_to_dict(d_issi))
+                self._emit("update_terminal", self._terminal_to_dict(d_issi))
 
-                emit("new_call", entry)
+                if fresh:
+                    self._emit("new_call", entry)
                 return
 
             # 1c. VOICE FRAME (BrewEntity: voice frame ... ts=N)
-            voice_match = re.search(r"voice frame\s+#\d+.*?\bts=(\d+)", msg)
+            voice_match = scan_fields(msg, VOICE_FRAME_RE, VOICE_TS_RE)
             if voice_match:
-                voice_ts = int(voice_match.group(1))
-                self._update_time_slot(voice_ts)
+                uuid = UUID_RE.search(msg)
+                known = bool(uuid) and self._voice_alive(uuid.group(1))
+                voice_ts = int(voice_match[0])
+                self._update_time_slot(voice_ts, arm=not known)
                 return
 
             # 1d. ts_assigned from ChanAllocElement (only during active call)
             if self.last_active and self.last_active in self.terminals and self.terminals[self.last_active].get("activity"):
-                ts_assigned = re.search(r"ts_assigned:\s*\[([^\]]+)\]", msg)
+                ts_assigned = re.search(r"ts_assigned:\s*\[([^\[\]]+)\]", msg)
                 if ts_assigned:
                     slots = [s.strip().lower() == "true" for s in ts_assigned.group(1).split(",")]
                     for idx, val in enumerate(slots):
@@ -768,8 +2079,17 @@ class TetraMonitor:
                 gssi, new_speaker = speaker_match.groups()
                 self._clear_activity(tg=gssi)
                 if new_speaker in self.terminals:
-                    self.terminals[new_speaker]["last_seen"] = timestamp
+                    self._touch(new_speaker, timestamp)
+                    # A new talker ends the previous talk spurt on this TG and
+                    # starts its own timed history entry.
+                    current = self.open_calls.get(f"TG:{gssi}")
+                    if current is None or current["sourceId"] != new_speaker:
+                        entry = self._group_call_entry(new_speaker, gssi, timestamp)
+                        if self._start_call(f"TG:{gssi}", entry, ts, self.terminals[new_speaker]["is_local"], tg=gssi):
+                            self._emit("new_call", entry)
                     self._set_activity(new_speaker, gssi)
+                else:
+                    self._close_call(f"TG:{gssi}", ts)
                 return
 
             # 3. CALL END (GROUP_IDLE / D-TX CEASED / network call ended)
@@ -778,6 +2098,7 @@ class TetraMonitor:
                 if not gssi_m:
                     gssi_m = re.search(r"\bgssi[:\s=]+(\d+)", msg, re.I)
                 if gssi_m:
+                    self._close_call(f"TG:{gssi_m.group(1)}", ts)
                     self._clear_activity(tg=gssi_m.group(1))
                 else:
                     # GSSI not found — try last_active's TG as fallback.
@@ -787,6 +2108,7 @@ class TetraMonitor:
                     if self.last_active and self.last_active in self.terminals:
                         fallback_tg = self.terminals[self.last_active].get("activity_tg")
                     if fallback_tg is not None:
+                        self._close_call(f"TG:{fallback_tg}", ts)
                         self._clear_activity(tg=fallback_tg)
                     # else: skip — stale activity is better than wiping all calls
                 return
@@ -794,28 +2116,25 @@ class TetraMonitor:
             if "network call ended" in msg:
                 gssi_m = re.search(r"\bgssi=(\d+)", msg)
                 if gssi_m:
+                    self._close_call(f"TG:{gssi_m.group(1)}", ts)
                     self._clear_activity(tg=gssi_m.group(1))
                 else:
                     fallback_tg = None
                     if self.last_active and self.last_active in self.terminals:
                         fallback_tg = self.terminals[self.last_active].get("activity_tg")
                     if fallback_tg is not None:
+                        self._close_call(f"TG:{fallback_tg}", ts)
                         self._clear_activity(tg=fallback_tg)
                 return
 
             # 3b. PRIVATE CALL END (U-DISCONNECT / D-Release / CIRCUIT CALL RELEASE)
-            udisconn_m = re.search(
-                r"<-\s*U-DISCONNECT\s+UDisconnect\s*\{[^}]*call_identifier:\s*(\d+)",
-                msg
-            )
+            udisconn_m = block_field(msg, UDISCONNECT_RE, CALL_ID_RE)
             if not udisconn_m:
                 # Matches both "DRelease" (network log) and "D-RELEASE" (older format)
-                udisconn_m = re.search(
-                    r"D-?Release[^}]*call_identifier:\s*(\d+)",
-                    msg, re.I
-                )
+                udisconn_m = block_field(msg, RELEASE_RE, CALL_ID_RE)
             if udisconn_m:
                 call_id = udisconn_m.group(1)
+                self._close_call(f"PRIV:{call_id}", ts)
                 if call_id in self.private_calls:
                     pc = self.private_calls.pop(call_id)
                     self._end_private_call(pc)
@@ -829,6 +2148,8 @@ class TetraMonitor:
             if circ_release_m:
                 uuid = circ_release_m.group(1)
                 call_id = self.brew_circuits.pop(uuid, None)
+                if call_id:
+                    self._close_call(f"PRIV:{call_id}", ts)
                 if call_id and call_id in self.private_calls:
                     pc = self.private_calls.pop(call_id)
                     self._end_private_call(pc)
@@ -836,7 +2157,7 @@ class TetraMonitor:
 
             # 4. REGISTRATION (ULocationUpdateDemand / ItsiAttach)
             if "ULocationUpdateDemand" in msg:
-                ssi = self._extract_ssi(msg)
+                ssi = extract_ssi(msg)
                 if not ssi:
                     ssi = self.last_context_id
                 if not ssi:
@@ -852,7 +2173,7 @@ class TetraMonitor:
                         self.terminals[ssi]["groups"] = []
                         self.terminals[ssi]["activity"] = None
                         self.terminals[ssi]["activity_tg"] = None
-                        emit("update_terminal", self._terminal_to_dict(ssi))
+                        self._emit("update_terminal", self._terminal_to_dict(ssi))
                     return
 
                 if ssi not in self.terminals:
@@ -867,7 +2188,7 @@ class TetraMonitor:
                     }
                 self.terminals[ssi]["status"] = "Online"
                 self.terminals[ssi]["is_local"] = True
-                self.terminals[ssi]["last_seen"] = timestamp
+                self._touch(ssi, timestamp)
 
                 gssi_entries = self._extract_gssi_list(msg)
                 attach_groups = [g for g, det in gssi_entries if not det]
@@ -887,11 +2208,11 @@ class TetraMonitor:
                             self.terminals[ssi]["groups"].remove(gssi)
                 # (if gssi_entries is empty the terminal sent no group info — keep existing)
 
-                emit("update_terminal", self._terminal_to_dict(ssi))
+                self._emit("update_terminal", self._terminal_to_dict(ssi))
                 return
 
             # 4b. SUBSCRIBER AFFILIATE (scan mode groups)
-            affiliate_match = re.search(r"subscriber affiliate issi=(\d+)\s+groups=\[([^\]]*)\]", msg)
+            affiliate_match = re.search(r"subscriber affiliate issi=(\d+)\s+groups=\[([^\[\]]*)\]", msg)
             if affiliate_match:
                 ssi = affiliate_match.group(1)
                 groups_str = affiliate_match.group(2).strip()
@@ -911,24 +2232,21 @@ class TetraMonitor:
                 self.terminals[ssi]["groups"] = sorted(new_groups)
                 self.terminals[ssi]["status"] = "Online"
                 self.terminals[ssi]["is_local"] = True
-                self.terminals[ssi]["last_seen"] = timestamp
+                self._touch(ssi, timestamp)
                 if new_groups:
                     self.terminals[ssi]["selected"] = f"TG {new_groups[0]}"
 
-                emit("update_terminal", self._terminal_to_dict(ssi))
+                self._emit("update_terminal", self._terminal_to_dict(ssi))
                 return
 
             # 4c. SUBSCRIBER DEAFFILIATE (scan mode disabled — remove those specific groups)
             # bluestation logs two forms:
             #   "CMCE: subscriber deaffiliate issi=X groups=[A, B, C]"
             #   "BrewEntity: deaffiliate issi=X → DEAFFILIATE groups=[A, B, C]"
-            deaff_match = re.search(
-                r"(?:subscriber deaffiliate|BrewEntity:\s+deaffiliate)\s+issi=(\d+)\s.*?groups=\[([^\]]*)\]",
-                msg, re.I
-            )
+            deaff_match = scan_fields(msg, DEAFF_RE, GROUPS_RE)
             if deaff_match:
-                ssi = deaff_match.group(1)
-                groups_str = deaff_match.group(2).strip()
+                ssi = deaff_match[0]
+                groups_str = deaff_match[1].strip()
                 detach_groups = [g.strip() for g in groups_str.split(",") if g.strip()] if groups_str else []
 
                 if ssi in self.terminals and detach_groups:
@@ -938,13 +2256,13 @@ class TetraMonitor:
                             current.remove(g)
                     # Preserve selected TG if it is still in the remaining groups;
                     # if the list is now empty, keep selected so the UI shows it.
-                    self.terminals[ssi]["last_seen"] = timestamp
-                    emit("update_terminal", self._terminal_to_dict(ssi))
+                    self._touch(ssi, timestamp)
+                    self._emit("update_terminal", self._terminal_to_dict(ssi))
                 return
 
             # 5. GROUP ATTACH/DETACH (UAttachDetachGroupIdentity)
             if "UAttachDetachGroupIdentity" in msg:
-                ssi = self._extract_ssi(msg)
+                ssi = extract_ssi(msg)
                 if not ssi:
                     ssi = self.last_context_id
                 if not ssi:
@@ -982,14 +2300,14 @@ class TetraMonitor:
                     self.terminals[ssi]["selected"] = f"TG {to_attach[0]}"
                     self.terminals[ssi]["status"] = "Online"
 
-                self.terminals[ssi]["last_seen"] = timestamp
+                self._touch(ssi, timestamp)
                 self.terminals[ssi]["groups"].sort()
-                emit("update_terminal", self._terminal_to_dict(ssi))
+                self._emit("update_terminal", self._terminal_to_dict(ssi))
                 return
 
             # 6. DEREGISTER (UItsiDetach / explicit deregister)
             if "UItsiDetach" in msg or "ItsiDetach" in msg or "deregister" in msg.lower():
-                ssi = self._extract_ssi(msg)
+                ssi = extract_ssi(msg)
                 if not ssi:
                     m = re.search(r"received_address:\s*TetraAddress\s*\{[^}]*ssi:\s*(\d+)", msg)
                     if not m:
@@ -1004,11 +2322,11 @@ class TetraMonitor:
                     self.terminals[ssi]["groups"] = []
                     self.terminals[ssi]["activity"] = None
                     self.terminals[ssi]["activity_tg"] = None
-                    emit("update_terminal", self._terminal_to_dict(ssi))
+                    self._emit("update_terminal", self._terminal_to_dict(ssi))
                 return
 
             # 7. BrewWorker affiliated groups (BS own groups, informational)
-            brew_groups = re.search(r"affiliated to groups \[([^\]]*)\]", msg)
+            brew_groups = re.search(r"affiliated to groups \[([^\[\]]*)\]", msg)
             if brew_groups:
                 return
 
@@ -1017,14 +2335,12 @@ class TetraMonitor:
             # --- Content lines stored for enriching next BrewEntity SDS entry ---
 
             # USdsData: CMCE layer logs uplink SDS (radio→network) as "<- USdsData { ... }".
-            # The bytes are in user_defined_data; source ISSI comes on the NEXT log line
-            # ("SDS: U-SDS-DATA from ISSI X to ISSI Y"). Buffer bytes here, consume on that line.
-            usds_match = re.search(
-                r"<-\s+USdsData\s*\{.*?user_defined_data:\s*Type(\d)\(\d+,\s*\[([^\]]+)\]\)",
-                msg, re.DOTALL
-            )
+            # The bytes are in user_defined_data; source ISSI comes on a later log line
+            # ("SDS: U-SDS-DATA from ISSI X to ISSI Y"). Queue bytes here, oldest is consumed
+            # by that line, so a second USdsData before it no longer overwrites the first.
+            usds_match = scan_fields(msg, USDS_RE, USER_DATA_RE)
             if usds_match:
-                self._pending_usds_bytes = usds_match.group(2)
+                self.pending_usds.append((time.time(), usds_match[1]))
                 return
 
             # SDS: U-SDS-DATA from ISSI X to ISSI Y — correlates with buffered USdsData bytes above.
@@ -1032,10 +2348,11 @@ class TetraMonitor:
                 r"SDS:\s+U-SDS-DATA\s+from\s+ISSI\s+(\d+)\s+to\s+ISSI\s+(\d+)",
                 msg
             )
-            if u_sds_from and self._pending_usds_bytes:
+            while self.pending_usds and time.time() - self.pending_usds[0][0] > USDS_PENDING_TIMEOUT:
+                self.pending_usds.popleft()
+            if u_sds_from and self.pending_usds:
                 src_i = u_sds_from.group(1)
-                bytes_str = self._pending_usds_bytes
-                self._pending_usds_bytes = None
+                bytes_str = self.pending_usds.popleft()[1]
                 try:
                     byte_list = [int(b.strip()) for b in bytes_str.split(",") if b.strip()]
                     lip_data = _try_decode_lip_pdu_bytes(byte_list)
@@ -1088,15 +2405,9 @@ class TetraMonitor:
             # Format: "-> D-SDS-DATA DSdsData { calling_party_address_ssi: Some(SSSI), ...,
             #           user_defined_data: Type4(N, [b0, b1, ...]) }"
             # The calling_party_address_ssi is the SENDER; bytes may encode text.
-            dsds_match = re.search(
-                r"D-SDS-DATA\s+DSdsData\s*\{.*?calling_party_address_ssi:\s*Some\((\d+)\)"
-                r".*?user_defined_data:\s*Type(\d)\(\d+,\s*\[([^\]]+)\]\)",
-                msg, re.DOTALL
-            )
+            dsds_match = scan_fields(msg, DSDS_RE, CALLING_SSI_RE, USER_DATA_RE)
             if dsds_match:
-                src_i = dsds_match.group(1)
-                sds_type_num = int(dsds_match.group(2))
-                bytes_str = dsds_match.group(3)
+                src_i, _sds_type, bytes_str = dsds_match
                 try:
                     byte_list = [int(b.strip()) for b in bytes_str.split(",") if b.strip()]
                     # Always try LIP first: if byte[0]==0x0A it's a GPS/LIP message
@@ -1119,53 +2430,18 @@ class TetraMonitor:
             # Pattern 2: bluestation Rust debug "LipPdu { issi: X, latitude: Y, longitude: Z }"
             # Pattern 3: generic "lat=Y lon=Z" with a nearby ISSI
             # Pattern 4: "location_report: ... issi=X ... lat=Y lon=Z"
-            _lip_candidates = [
-                re.search(
-                    r"(?:SDS[:\s]+LIP|LIP report|LIP data)[:\s].*?"
-                    r"(?:from\s+(?:ISSI\s+)?)?(\d{4,}).*?"
-                    r"lat=([\d.+\-]+).*?lon=([\d.+\-]+)"
-                    r"(?:.*?speed=([\d.]+))?(?:.*?heading=([\d.]+))?",
-                    msg, re.IGNORECASE
-                ),
-                re.search(
-                    r"LipPdu\s*\{[^}]*?(?:issi|source_issi):\s*(\d{4,})"
-                    r"[^}]*?lat(?:itude)?:\s*([\d.+\-]+)"
-                    r"[^}]*?lon(?:gitude)?:\s*([\d.+\-]+)"
-                    r"(?:[^}]*?speed:\s*([\d.]+))?(?:[^}]*?(?:heading|direction):\s*([\d.]+))?",
-                    msg, re.IGNORECASE
-                ),
-                re.search(
-                    r"Location(?:Report|Pdu|Info)?\s*\{[^}]*?(?:issi|source):\s*(\d{4,})"
-                    r"[^}]*?lat(?:itude)?:\s*([\d.+\-]+)"
-                    r"[^}]*?lon(?:gitude)?:\s*([\d.+\-]+)"
-                    r"(?:[^}]*?speed:\s*([\d.]+))?(?:[^}]*?(?:heading|direction):\s*([\d.]+))?",
-                    msg, re.IGNORECASE
-                ),
-                re.search(
-                    r"(?:location|position|gps|lip)[^:]*[:\s]+(?:source(?:_issi)?=|from[:\s]+)?(\d{4,})"
-                    r"[,\s]+lat(?:itude)?=([\d.+\-]+)[,\s]+lon(?:gitude)?=([\d.+\-]+)"
-                    r"(?:[,\s]+speed=([\d.]+))?(?:[,\s]+(?:heading|direction)=([\d.]+))?",
-                    msg, re.IGNORECASE
-                ),
-            ]
-            for sds_lip_line in _lip_candidates:
-                if not sds_lip_line:
-                    continue
+            for src_i, lat, lon, speed, heading in lip_candidates(msg):
                 try:
-                    src_i = sds_lip_line.group(1)
-                    lip_data: dict = {
-                        "lat": float(sds_lip_line.group(2)),
-                        "lon": float(sds_lip_line.group(3)),
-                    }
-                    if sds_lip_line.lastindex >= 4 and sds_lip_line.group(4) is not None:
-                        lip_data["speed"] = float(sds_lip_line.group(4))
-                    if sds_lip_line.lastindex >= 5 and sds_lip_line.group(5) is not None:
-                        lip_data["heading"] = float(sds_lip_line.group(5))
+                    lip_data: dict = {"lat": float(lat), "lon": float(lon)}
+                    if speed is not None:
+                        lip_data["speed"] = float(speed)
+                    if heading is not None:
+                        lip_data["heading"] = float(heading)
                     if -90 <= lip_data["lat"] <= 90 and -180 <= lip_data["lon"] <= 180:
                         self.sds_content_pending[src_i] = {"type": "lip", "content": lip_data, "ts": time.time()}
                         self._attach_content_to_pending_entry(src_i, "lip", lip_data)
                         return
-                except (ValueError, IndexError):
+                except ValueError:
                     continue
 
             # Delivery report UUID registration: BrewEntity: SDS_REPORT uuid=... status=N -> Brew
@@ -1219,11 +2495,9 @@ class TetraMonitor:
                 self.sds_content_pending = {
                     k: v for k, v in self.sds_content_pending.items() if now - v["ts"] < 10.0
                 }
-                self.sds_messages.insert(0, entry)
-                self.sds_messages = self.sds_messages[:MAX_HISTORY]
                 self.sds_entry_ts[entry["id"]] = now
                 self.sds_entry_ts = {k: v for k, v in self.sds_entry_ts.items() if now - v < 30}
-                emit("sds_message", entry)
+                self._add_sds(entry)
                 return
 
             # Outgoing: BrewEntity: sending SDS uuid=... src=X dst=Y type=N N bits
@@ -1266,11 +2540,9 @@ class TetraMonitor:
                 self.sds_content_pending = {
                     k: v for k, v in self.sds_content_pending.items() if now - v["ts"] < 10.0
                 }
-                self.sds_messages.insert(0, entry)
-                self.sds_messages = self.sds_messages[:MAX_HISTORY]
                 self.sds_entry_ts[entry["id"]] = now
                 self.sds_entry_ts = {k: v for k, v in self.sds_entry_ts.items() if now - v < 30}
-                emit("sds_message", entry)
+                self._add_sds(entry)
                 return
 
             # Incoming: BrewEntity: SDS transfer uuid=... src=X dst=Y N bytes
@@ -1321,11 +2593,9 @@ class TetraMonitor:
                 self.sds_content_pending = {
                     k: v for k, v in self.sds_content_pending.items() if now - v["ts"] < 10.0
                 }
-                self.sds_messages.insert(0, entry)
-                self.sds_messages = self.sds_messages[:MAX_HISTORY]
                 self.sds_entry_ts[entry["id"]] = now
                 self.sds_entry_ts = {k: v for k, v in self.sds_entry_ts.items() if now - v < 30}
-                emit("sds_message", entry)
+                self._add_sds(entry)
                 return
 
             # Status message: SDS: U-STATUS from ISSI X to ISSI Y, status=Z
@@ -1352,17 +2622,475 @@ class TetraMonitor:
                     "size": 0,
                     "sizeUnit": "bits",
                 }
-                self.sds_messages.insert(0, entry)
-                self.sds_messages = self.sds_messages[:MAX_HISTORY]
-                emit("sds_message", entry)
+                self._add_sds(entry, urgent=True)
                 return
 
         except Exception:
             pass
 
 
-def run_demo_mode(mon):
+class LineSource(abc.ABC):
+    """
+    One station's log input, read without blocking. Lines come back as
+    journal-export JSON strings or as dicts with MESSAGE/__REALTIME_TIMESTAMP
+    (plain-text sources), both accepted by TetraMonitor.process_line.
+    """
+
+    selectable = True  # select() on fileno(); otherwise polled every loop
+
+    def __init__(self, station):
+        self.station = station
+        self.fd = None
+        self._buf = b""
+
+    @abc.abstractmethod
+    def start(self, cursor=None):
+        """Open the input; journal sources resume after cursor."""
+
+    @abc.abstractmethod
+    def read_lines(self):
+        """Lines available now ([] if none), or None once the input has ended."""
+
+    def fileno(self):
+        return self.fd
+
+    def _split(self, chunk):
+        self._buf += chunk
+        *lines, self._buf = self._buf.split(b"\n")
+        return [raw.decode("utf-8", "replace") for raw in lines if raw.strip()]
+
+    @staticmethod
+    def _wrap(text):
+        if text.startswith("{"):
+            return text
+        return {"MESSAGE": text, "__REALTIME_TIMESTAMP": int(time.time() * 1000000)}
+
+
+class JournalSource(LineSource):
+    """journalctl -f -o json, optionally for one unit; resumes after a cursor."""
+
+    def __init__(self, station, unit):
+        super().__init__(station)
+        self.unit = unit
+        self.proc = None
+
+    def start(self, cursor=None):
+        cmd = list(JOURNAL_CMD)
+        if self.unit:
+            cmd += ["-u", self.unit]
+        if cursor:
+            # Pick up exactly after the last entry the previous process handled.
+            cmd += ["--after-cursor", cursor]
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+        self.fd = self.proc.stdout.fileno()
+
+    def read_lines(self):
+        chunk = os.read(self.fd, 65536)
+        if not chunk:
+            return None
+        return self._split(chunk)
+
+
+class FileSource(LineSource):
+    """Follows a plain log file from its end (tail -F: reopens after rotation)."""
+
+    selectable = False
+
+    def __init__(self, station, path):
+        super().__init__(station)
+        self.path = path
+        self.file = None
+        self._next_check = 0.0
+
+    def start(self, cursor=None):
+        self._open(seek_end=True)
+
+    def _open(self, seek_end):
+        try:
+            self.file = open(self.path, "rb")
+        except OSError:
+            self.file, self.fd = None, None
+            return
+        if seek_end:
+            self.file.seek(0, os.SEEK_END)
+        self.fd = self.file.fileno()
+
+    def read_lines(self):
+        if self.file is None:
+            now = time.time()
+            if now >= self._next_check:
+                self._next_check = now + 1.0
+                self._open(seek_end=False)
+            return []
+        chunk = self.file.read(65536)
+        if chunk:
+            return [self._wrap(line) for line in self._split(chunk)]
+        now = time.time()
+        if now >= self._next_check:
+            self._next_check = now + 1.0
+            try:
+                st = os.stat(self.path)
+                if st.st_ino != os.fstat(self.fd).st_ino or st.st_size < self.file.tell():
+                    self.file.close()
+                    self._open(seek_end=False)
+            except OSError:
+                pass
+        return []
+
+
+class FifoSource(LineSource):
+    """Reads a named pipe; reopens when the writer goes away."""
+
+    def __init__(self, station, path):
+        super().__init__(station)
+        self.path = path
+
+    def start(self, cursor=None):
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+
+    def read_lines(self):
+        try:
+            chunk = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        if not chunk:
+            os.close(self.fd)
+            self.start()
+            return []
+        return [self._wrap(line) for line in self._split(chunk)]
+
+
+SOURCE_KINDS = {"journal": JournalSource, "file": FileSource, "fifo": FifoSource}
+
+
+def parse_sources(spec):
+    """
+    TETRA_SOURCES="blue=journal:tmo.service,flow=journal:flowstation.service,bs2=file:/var/log/bs2.log"
+    -> one source per station. "name=journal" follows the whole journal.
+    Empty spec -> [] (single unnamed station on the whole journal).
+    """
+    sources = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, target = item.partition("=")
+        kind, _, arg = target.partition(":")
+        cls = SOURCE_KINDS.get(kind.strip())
+        if not name.strip() or cls is None or (cls is not JournalSource and not arg):
+            print(f"Ignoring bad TETRA_SOURCES entry: {item!r}", file=sys.stderr)
+            continue
+        sources.append(cls(name.strip(), arg.strip() or None))
+    return sources
+
+
+class CaptureTap:
+    """
+    Copies raw input lines, exactly as the sources returned them, to rotating
+    gzip files (journal-export JSON, one entry per line, the format
+    bench/traffic.py --input replays). The run loop hands over whole read
+    batches; a background thread serialises, compresses and rotates them.
+    Memory is bounded by CAPTURE_QUEUE_LINES: when the disk cannot keep up,
+    new batches are dropped and counted instead of queued.
+    """
+
+    def __init__(self, directory, max_bytes, keep, trigger=()):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.trigger = tuple(trigger)
+        self.dropped = 0
+        self._queue = deque()
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._closing = False
+        self._files = {}  # station -> (GzipFile, raw file, path)
+        self._seq = 0
+        self._last_drop_log = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+
+    def add(self, station, lines):
+        if self.trigger:
+            lines = [line for line in lines
+                     if any(tok in (line if isinstance(line, str) else line.get("MESSAGE", "")) for tok in self.trigger)]
+        if not lines:
+            return
+        with self._cond:
+            if self._queued + len(lines) > CAPTURE_QUEUE_LINES:
+                self.dropped += len(lines)
+                now = time.time()
+                if now - self._last_drop_log > 60:
+                    self._last_drop_log = now
+                    print(f"capture: queue full, {self.dropped} lines dropped so far", file=sys.stderr)
+                return
+            self._queue.append((station, lines))
+            self._queued += len(lines)
+            self._cond.notify()
+
+    def close(self):
+        """Write out what is queued and close the files (readable even without this, up to the last flush)."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        next_flush = time.time() + CAPTURE_FLUSH_INTERVAL
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    if not self._cond.wait(timeout=max(0.0, next_flush - time.time())):
+                        break
+                batches = list(self._queue)
+                self._queue.clear()
+                self._queued = 0
+                closing = self._closing
+            for station, lines in batches:
+                try:
+                    self._write(station, lines)
+                except OSError as e:
+                    print(f"capture: {e}", file=sys.stderr)
+            if closing or time.time() >= next_flush:
+                next_flush = time.time() + CAPTURE_FLUSH_INTERVAL
+                # A sync flush makes everything so far decompressible even if we are killed.
+                for gz, _, _ in self._files.values():
+                    gz.flush(zlib.Z_SYNC_FLUSH)
+            if closing:
+                for gz, raw, _ in self._files.values():
+                    gz.close()
+                    raw.close()
+                self._files.clear()
+                return
+
+    def _write(self, station, lines):
+        entry = self._files.get(station)
+        if entry is None or entry[1].tell() >= self.max_bytes:
+            entry = self._rotate(station, entry)
+        gz = entry[0]
+        for line in lines:
+            gz.write(((line if isinstance(line, str) else json.dumps(line)) + "\n").encode("utf-8"))
+
+    def _rotate(self, station, entry):
+        if entry is not None:
+            entry[0].close()
+            entry[1].close()
+        self._seq += 1
+        name = f"capture-{station or 'main'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{self._seq:04d}.jsonl.gz"
+        path = os.path.join(self.directory, name)
+        raw = open(path, "wb")
+        entry = self._files[station] = (gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6), raw, path)
+        # Exactly this station's files: station "a" must not rotate away those of "a-b".
+        ours = re.compile(rf"capture-{re.escape(station or 'main')}-\d{{8}}-\d{{6}}-\d{{4,}}\.jsonl\.gz")
+        old = sorted(f for f in os.listdir(self.directory) if ours.fullmatch(f))
+        for stale in old[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.directory, stale))
+            except OSError:
+                pass
+        return entry
+
+
+class StationHub:
+    """
+    One TetraMonitor per station behind a single stdout stream. Event ids,
+    airtime statistics and activity heatmaps are shared. With a single unnamed station events pass
+    straight through; with several, every payload carries its "station" and a
+    radio heard by more than one station is emitted as one merged terminal per
+    ISSI (_merge_terminal), listing every station that currently sees it.
+    """
+
+    def __init__(self, stations):
+        self.stats = AirtimeStats()
+        self.heatmap = ActivityHeatmap()
+        self.event_counter = 0
+        self.monitors = {name: TetraMonitor(station=name, hub=self) for name in stations}
+        self.primary = next(iter(self.monitors.values()))
+        self.multi = len(stations) > 1 or stations[0] is not None
+        self.station_terminals = {}        # issi -> {station: (seen_at, terminal dict)}
+        self.merged_terminals = {}         # issi -> last merged dict emitted
+        self.seeded = False
+        self.resolver = None               # CallsignResolver when running under asyncio
+        self.capture = None                # CaptureTap when TETRA_CAPTURE_DIR is set
+        self._next_stats_emit = time.time() + STATS_INTERVAL
+        self._next_heatmap_save = time.time() + HEATMAP_SAVE_INTERVAL
+        self._next_heartbeat = time.time()
+        self._heartbeat_seq = 0
+
+    @property
+    def station_names(self):
+        return [name for name in self.monitors if name]
+
+    def next_id(self):
+        self.event_counter += 1
+        return str(self.event_counter)
+
+    def on_event(self, event_type, payload, urgent=False):
+        if self.multi and event_type == "update_terminal":
+            merged = self._merge_terminal(payload)
+            if merged is None:
+                return
+            payload = merged
+        elif self.multi and event_type == "remove_terminal":
+            # Only gone once no station has it; otherwise the others' view remains.
+            issi = payload["id"]
+            views = self.station_terminals.get(issi, {})
+            views.pop(payload.get("station"), None)
+            if views:
+                merged = self._remerge(issi)
+                if merged is None:
+                    return
+                event_type, payload = "update_terminal", merged
+            else:
+                self.station_terminals.pop(issi, None)
+                self.merged_terminals.pop(issi, None)
+                payload = {"id": issi}
+        emit(event_type, payload, urgent)
+
+    def _merge_terminal(self, t, now=None):
+        """Fold one station's view of an ISSI into the merged entry; None if unchanged."""
+        issi = t["id"]
+        views = self.station_terminals.setdefault(issi, {})
+        views[t.get("station")] = (time.time() if now is None else now, t)
+        return self._remerge(issi)
+
+    def _remerge(self, issi):
+        views = self.station_terminals[issi]
+        status_rank = {"Online": 2, "External": 1}
+
+        def rank(item):
+            seen_at, v = item[1]
+            return (v.get("activity") is not None, status_rank.get(v.get("status"), 0), bool(v.get("isLocal")), seen_at)
+
+        best_station, (_, best) = max(views.items(), key=rank)
+        merged = dict(best)
+        merged["station"] = best_station
+        merged["stations"] = sorted(st for st, (_, v) in views.items() if v.get("status") != "Offline") or [best_station]
+        merged["isActive"] = any(v.get("isActive") for _, v in views.values())
+        if self.merged_terminals.get(issi) == merged:
+            return None
+        self.merged_terminals[issi] = merged
+        return merged
+
+    def emit_full_state(self):
+        if not self.multi:
+            self.primary.emit_full_state()
+            return
+        ids = {}
+        for mon in self.monitors.values():
+            for tid in mon.terminals:
+                d = mon._terminal_to_dict(tid)
+                d["station"] = mon.station
+                self._merge_terminal(d, now=0)
+                ids[tid] = None
+
+        def newest(lists):
+            merged = [e for lst in lists for e in lst]
+            merged.sort(key=lambda e: int(e["id"]) if str(e.get("id", "")).isdigit() else 0, reverse=True)
+            return merged[:MAX_HISTORY]
+
+        mons = list(self.monitors.values())
+        emit_state_chunks({
+            "localHistory": newest(m.hist_local for m in mons),
+            "externalHistory": newest(m.hist_ext for m in mons),
+            "sdsMessages": newest(m.sds_messages for m in mons),
+            "stations": self.station_names,
+        }, ((tid, self.merged_terminals[tid]) for tid in ids), len(ids))
+
+    def handle_command(self, cmd):
+        if cmd.get("type") == "seed":
+            self.apply_seed(cmd)
+            return
+        if cmd.get("type") == "heatmap":
+            self.emit_heatmap(cmd)
+            return
+        for mon in self.monitors.values():
+            mon.handle_command(cmd)
+
+    def emit_heatmap(self, cmd):
+        """Answer the relay's {"type":"heatmap","id",...} with activity_heatmap for the same id."""
+        self.heatmap.advance(time.time())
+        try:
+            res = int(cmd.get("res") or 60)
+            top = int(cmd.get("top") or STATS_TOP_ISSI)
+        except (TypeError, ValueError):
+            res, top = 60, STATS_TOP_ISSI
+        keys = lambda name: [str(k) for k in cmd[name]] if isinstance(cmd.get(name), list) else None
+        view = self.heatmap.view(res, tgs=keys("tg"), issis=keys("issi"), top=top)
+        emit("activity_heatmap", {"id": cmd.get("id"), **view})
+
+    def checkpoint(self):
+        if not self.multi:
+            return {"eventCounter": self.event_counter, **self.primary.checkpoint()}
+        return {
+            "eventCounter": self.event_counter,
+            "stations": {name: mon.checkpoint() for name, mon in self.monitors.items()},
+        }
+
+    def apply_seed(self, seed):
+        cp = seed.get("checkpoint") or {}
+        if not self.multi:
+            self.primary.apply_seed(seed, cp)
+        else:
+            for name, mon in self.monitors.items():
+                mine = lambda e: e.get("station") == name
+                mon.apply_seed({
+                    "terminals": {tid: t for tid, t in (seed.get("terminals") or {}).items()
+                                  if name in (t.get("stations") or [t.get("station")])},
+                    "localHistory": list(filter(mine, seed.get("localHistory") or [])),
+                    "externalHistory": list(filter(mine, seed.get("externalHistory") or [])),
+                    "sdsMessages": list(filter(mine, seed.get("sdsMessages") or [])),
+                }, (cp.get("stations") or {}).get(name) or {})
+            for issi, t in (seed.get("terminals") or {}).items():
+                self.merged_terminals[issi] = t
+                for st in t.get("stations") or [t.get("station")]:
+                    self.station_terminals.setdefault(issi, {})[st] = (0, dict(t, station=st))
+        ids = [int(e["id"])
+               for key in ("localHistory", "externalHistory", "sdsMessages")
+               for e in seed.get(key) or [] if str(e.get("id", "")).isdigit()]
+        self.event_counter = max([cp.get("eventCounter") or 0] + ids)
+        self.seeded = True
+
+    def tick(self, now=None):
+        """Periodic housekeeping, called from the run loops between lines."""
+        now = time.time() if now is None else now
+        for mon in self.monitors.values():
+            mon.expire(now)
+        if now >= self._next_stats_emit:
+            self._next_stats_emit = now + STATS_INTERVAL
+            emit("airtime_stats", self.stats.snapshot(now))
+        self.heatmap.advance(now)
+        if now >= self._next_heatmap_save:
+            self._next_heatmap_save = now + HEATMAP_SAVE_INTERVAL
+            self.heatmap.save()
+        if now >= self._next_heartbeat:
+            self._next_heartbeat = now + HEARTBEAT_INTERVAL
+            self._heartbeat_seq += 1
+            mons = self.monitors.values()
+            lags = [m.last_lag for m in mons if m.last_lag is not None]
+            seen = [m.last_line_at for m in mons if m.last_line_at is not None]
+            emit("heartbeat", {
+                "seq": self._heartbeat_seq,
+                "ts": int(now * 1000),
+                "lines": sum(m.lines_processed for m in mons),
+                "lagMs": int(max(lags) * 1000) if lags else None,
+                "idleMs": int((now - max(seen)) * 1000) if seen else None,
+                "checkpoint": self.checkpoint(),
+                "metrics": self.metrics(),
+            })
+
+    def metrics(self):
+        """Counters for the relay's /metrics, per station where they are per station."""
+        m = counters.snapshot()
+        m["stations"] = {name or "main": {"lines": mon.lines_processed, "matched": mon.lines_matched,
+                                          "terminals": len(mon.terminals)}
+                         for name, mon in self.monitors.items()}
+        if self.capture:
+            m["captureDropped"] = self.capture.dropped
+        return m
+
+
+def run_demo_mode(hub, commands):
     """Simulate TETRA traffic for demo/testing."""
+    mon = hub.primary
     demo_terminals = [
         {"issi": "2145007", "call": "EA5GVK", "local": True},
         {"issi": "3020760", "call": "VO1TR", "local": False},
@@ -1395,12 +3123,16 @@ def run_demo_mode(mon):
     mon.terminals["2145007"]["selected"] = "---"
     mon.terminals["2145007"]["groups"] = []
 
-    mon.emit_full_state()
+    hub.emit_full_state()
 
     used_slots = set()
 
     while True:
-        time.sleep(random.uniform(2.0, 5.0))
+        deadline = time.time() + random.uniform(2.0, 5.0)
+        while (remaining := deadline - time.time()) > 0:
+            for cmd in commands.poll(remaining):
+                hub.handle_command(cmd)
+        hub.tick()
 
         concurrent = random.random() < 0.35
         num_calls = 2 if concurrent else 1
@@ -1410,6 +3142,10 @@ def run_demo_mode(mon):
             available_slots = [1, 2, 3, 4]
         used_slots.clear()
 
+        # Every demo cycle starts fresh: end whatever is still on air.
+        now = time.time()
+        for key in list(mon.open_calls):
+            mon._close_call(key, now)
         mon._clear_activity()
 
         external = [d for d in demo_terminals if not d["local"]]
@@ -1557,40 +3293,557 @@ def run_demo_mode(mon):
                 mon.process_line(status_line)
 
 
-def run_journal_mode(mon):
-    """Read real TETRA logs from journalctl."""
-    proc = subprocess.Popen(JOURNAL_CMD, stdout=subprocess.PIPE, text=True, bufsize=1)
-    mon.emit_full_state()
+# ── Synthetic traffic ────────────────────────────────────────────────────────
+# run_demo_mode grown into a load generator: bluestation/flowstation log lines
+# for N terminals, reproducible from a seed. Lines carry journal timestamps at
+# exactly `rate` lines/s of log time; whoever consumes them decides the pace
+# (run_generator_mode follows the wall clock, bench/traffic.py goes flat out
+# or writes a capture file).
+
+# Relative weight of each traffic kind when a new action starts.
+GEN_MIX = {
+    "group": 6,       # group call: GROUP_TX, voice frames, speaker changes, GROUP_IDLE
+    "private": 1,     # P2P or Brew circuit call with voice frames and release
+    "sds_text": 2,    # text SDS (D-SDS-DATA / CmceSdsData + Brew transfer)
+    "sds_lip": 3,     # binary LIP position report + Brew transfer
+    "sds_status": 1,  # U-STATUS
+    "rssi": 8,        # MsRssiUpdate for a local terminal
+    "register": 2,    # location update with group list (now and then a detach)
+    "affiliate": 1,   # group attach/detach and scan-list affiliation
+    "energy": 2,      # energy saving mode change
+    "noise": 74,      # PHY/MAC/LLC debug lines no parser branch matches
+}
+# A TG carries one call at a time and a radio one private call; an action that
+# finds them all busy logs noise instead.
+
+GEN_NOISE = [
+    "DEBUG [phy] burst decoded: slot={slot} frame={n} multiframe={m} crc_ok=true",
+    "TRACE [umac] MAC-RESOURCE fill bits=17 length_indication={n} encryption_mode=0",
+    "DEBUG [llc] BL-DATA ns=1 nr=0 fcs_ok=true len={n}",
+    "DEBUG [lmac] AACH: ul_usage=Traffic({slot}) dl_usage=Unallocated",
+    "TRACE [entities/mle] rx_prim: SapMsg {{ sap: TlaSap, src: Llc, dest: Mle, dltime: {m}/{n}/01/1 }}",
+]
+
+GEN_TEXTS = [
+    "73 de EA5GVK", "QRV on TG 214", "Net at 21:00", "QSL 73", "On my way",
+    "Radio check OK", "Leaving the base", "At destination", "All clear",
+]
+
+GEN_STATUSES = ["NetworkUserSpecific(61000)", "NetworkUserSpecific(62000)", "Acknowledge", "EmergencyAlert"]
+
+
+def parse_gen_mix(spec):
+    """TETRA_GEN_MIX="group=50,noise=0" -> GEN_MIX with those weights replaced."""
+    mix = dict(GEN_MIX)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        kind, _, weight = item.partition("=")
+        try:
+            if kind.strip() not in mix:
+                raise ValueError
+            mix[kind.strip()] = max(0.0, float(weight))
+        except ValueError:
+            print(f"Ignoring bad TETRA_GEN_MIX entry: {item!r}", file=sys.stderr)
+    return mix
 
-    while True:
-        r, _, _ = select.select([proc.stdout], [], [], 0.25)
-        if r:
-            line = proc.stdout.readline()
-            if not line:
-                break
-            mon.process_line(line.strip())
 
+class TrafficGenerator:
+    """
+    Seeded log-line source for `terminals` radios: a local_share of them
+    registered on this base station, the rest External (heard via Brew).
+    Talkers are drawn Zipf-like, so a few regulars carry most calls.
+    """
+
+    def __init__(self, terminals=500, seed=1, mix=None, local_share=0.1,
+                 tgs=("91", "262", "2621", "214", "2140", "1", "10", "9")):
+        self.rng = random.Random(seed)
+        self.mix = mix or dict(GEN_MIX)
+        self.tgs = list(tgs)
+        n_local = max(2, int(terminals * local_share))
+        self.locals = [str(2145000 + i) for i in range(n_local)]
+        self.externals = [str(3000000 + i * 37) for i in range(max(1, terminals - n_local))]
+        self.everyone = self.locals + self.externals
+        self.callsigns = {issi: f"EA{i % 10}{chr(65 + i // 260 % 26)}{chr(65 + i // 10 % 26)}{chr(65 + i % 26)}"
+                          for i, issi in enumerate(self.everyone)}
+        shuffled = list(self.everyone)
+        self.rng.shuffle(shuffled)
+        self._talkers = shuffled
+        self._talker_weights = list(accumulate(1.0 / (rank + 1) for rank in range(len(shuffled))))
+        self._kinds = [k for k, w in self.mix.items() if w > 0]
+        self._kind_weights = list(accumulate(self.mix[k] for k in self._kinds))
+        self._groups = {issi: self.rng.sample(self.tgs, self.rng.randint(1, 3)) for issi in self.locals}
+        self._busy_tgs = {}  # tg -> log time its call ends
+        self._busy_issis = {}  # issi -> log time its private call ends
+        self._seq = 0
+
+    # -- helpers --------------------------------------------------------------
+    def _talker(self):
+        return self.rng.choices(self._talkers, cum_weights=self._talker_weights)[0]
+
+    def _pair(self):
+        src = self._talker()
+        dst = self.rng.choice(self.locals)
+        return (src, dst) if src != dst else (src, self.rng.choice(self.everyone))
+
+    def _next(self):
+        self._seq += 1
+        return self._seq
+
+    @staticmethod
+    def _address(issi):
+        return (f"DEBUG [entities/mm] mm_bs.rs:481: rx_prim: SapMsg {{ sap: LmmSap, src: Mle, dest: Mm, "
+                f"msg: LmmMleUnitdataInd(LmmMleUnitdataInd {{ handle: 4, received_address: TetraAddress "
+                f"{{ ssi: {issi}, ssi_type: Ssi, encrypted: false }} }}) }}")
+
+    @staticmethod
+    def _group_blocks(groups, detach=False):
+        det = "Some(0)" if detach else "None"
+        return ", ".join(
+            f"GroupIdentityUplink {{ class_of_usage: Some(4), group_identity_detachment_uplink: {det}, "
+            f"gssi: Some({g}), address_extension: None, vgssi: None }}" for g in groups)
+
+    @staticmethod
+    def _lip_bytes(lat, lon, speed_idx, dir_idx):
+        """LIP short location report (0x0A + PDU), the inverse of _try_decode_lip_pdu_bytes."""
+        lon_raw = round(lon * (1 << 25) / 360.0) & ((1 << 25) - 1)
+        lat_raw = round(lat * (1 << 24) / 180.0) & ((1 << 24) - 1)
+        bits = f"0000{lon_raw:025b}{lat_raw:024b}010{speed_idx:07b}{dir_idx:04b}"
+        bits += "0" * (-len(bits) % 8)
+        return [0x0A] + [int(bits[i:i + 8], 2) for i in range(0, len(bits), 8)]
+
+    def _sds(self, t, src, dst, payload, kind_bits):
+        """Content line then the Brew transfer line, outgoing or incoming."""
+        data = ", ".join(str(b) for b in payload)
+        if src in self.locals:
+            yield t, (f"DEBUG [entities/cmce] CmceSdsData(CmceSdsData {{ source_issi: {src}, dest_issi: {dst}, "
+                      f"user_defined_data: Type4({len(payload) * 8}, [{data}]) }})")
+            yield t + 0.01, (f"BrewEntity: sending SDS uuid=gen-{self._next()} src={src} dst={dst} "
+                             f"type={kind_bits} {len(payload) * 8} bits")
+        else:
+            yield t, (f"DEBUG [entities/cmce] sds_bs.rs:288: -> D-SDS-DATA DSdsData {{ calling_party_type_identifier: "
+                      f"Ssi, calling_party_address_ssi: Some({src}), user_defined_data: Type4({len(payload) * 8}, "
+                      f"[{data}]), external_subscriber_number: None }}")
+            yield t + 0.01, f"BrewEntity: SDS transfer uuid=gen-{self._next()} src={src} dst={dst} {len(payload)} bytes"
+
+    # -- actions: each yields (log time, message) for one piece of traffic ----
+    def _group(self, t):
+        free = [tg for tg in self.tgs if self._busy_tgs.get(tg, 0) < t]
+        if not free:
+            return self._noise(t)
+        tg = self.rng.choice(free)
+        duration = self.rng.uniform(3, 40)
+        self._busy_tgs[tg] = t + duration + 1
+        slot = self.rng.randint(1, 4)
+        src = self._talker()
+        uuid = f"gen-{self._next()}"
+        out = [(t, f"BrewWorker: GROUP_TX uuid={uuid} src={src} dst={tg}")]
+        speaker_at = t + duration * self.rng.uniform(0.3, 0.7) if self.rng.random() < 0.3 else None
+        frame, at = 1, t + 0.5
+        while at < t + duration:
+            out.append((at, f"BrewEntity: voice frame #{frame} uuid={uuid} len=36 bytes ts={slot}"))
+            frame, at = frame + 1, at + 2.0
+        if speaker_at:
+            out.append((speaker_at, f"BrewEntity: speaker change gssi={tg} new_speaker={self._talker()}"))
+        out.append((t + duration, f"BrewEntity: GROUP_IDLE gssi={tg}"))
+        return out
+
+    def _private(self, t):
+        src, dst = self._pair()
+        if src == dst or self._busy_issis.get(src, 0) >= t or self._busy_issis.get(dst, 0) >= t:
+            return self._noise(t)
+        call_id = str(self._next())
+        duration = self.rng.uniform(5, 60)
+        self._busy_issis[src] = self._busy_issis[dst] = t + duration + 1
+        slot = self.rng.randint(1, 4)
+        if src in self.locals and dst in self.locals:
+            start = (f"INFO [entities/cmce] setup.rs:320: rx_u_setup_p2p: call from ISSI {src} to ISSI {dst} "
+                     f"-> call_id={call_id} ts(call)={slot} usage(call)=14 ts(called)={slot % 4 + 1} usage(called)=15")
+            end = f"<- U-DISCONNECT UDisconnect {{ call_identifier: {call_id}, disconnect_cause: 1 }}"
+            uuid = f"p2p-{call_id}"
+        else:
+            uuid = f"circ-{call_id}"
+            start = (f"CMCE: accepting Brew setup request uuid={uuid} call_id={call_id} src={src} dst={dst} "
+                     f"ts={slot} duplex=true")
+            end = f"BrewEntity: CIRCUIT CALL RELEASE uuid={uuid} cause=0"
+        out = [(t, start)]
+        frame, at = 1, t + 0.5
+        while at < t + duration:
+            out.append((at, f"BrewEntity: voice frame #{frame} uuid={uuid} len=36 bytes ts={slot}"))
+            frame, at = frame + 1, at + 2.0
+        out.append((t + duration, end))
+        return out
+
+    def _sds_text(self, t):
+        src, dst = self._pair()
+        return list(self._sds(t, src, dst, [0x82, 0x04, 0x10, 0x01] + list(self.rng.choice(GEN_TEXTS).encode("iso-8859-1")), 4))
+
+    def _sds_lip(self, t):
+        src, dst = self._pair()
+        lat, lon = self.rng.uniform(36.0, 43.5), self.rng.uniform(-9.0, 4.0)
+        payload = self._lip_bytes(lat, lon, self.rng.randint(0, 40), self.rng.randint(0, 15))
+        return list(self._sds(t, src, dst, payload, 10))
+
+    def _sds_status(self, t):
+        src, dst = self._pair()
+        return [(t, f"SDS: U-STATUS from ISSI {src} to ISSI {dst}, status={self.rng.choice(GEN_STATUSES)}")]
+
+    def _rssi(self, t):
+        issi = self.rng.choice(self.locals)
+        return [(t, f"MsRssiUpdate {{ issi: {issi}, rssi_dbfs: {self.rng.uniform(-95, -20):.2f} }}")]
+
+    def _register(self, t):
+        issi = self.rng.choice(self.locals)
+        if self.rng.random() < 0.1:
+            return [(t, self._address(issi)),
+                    (t + 0.001, "DEBUG [entities/mm] mm_bs.rs:254: <- UItsiDetach { address_extension: None }")]
+        return [(t, self._address(issi)), (t + 0.001, self.registration(issi))]
+
+    def _affiliate(self, t):
+        issi = self.rng.choice(self.locals)
+        groups = self._groups[issi]
+        if self.rng.random() < 0.3:
+            scan = self.rng.sample(self.tgs, self.rng.randint(1, 4))
+            return [(t, f"subscriber affiliate issi={issi} groups=[{', '.join(scan)}]")]
+        tg = self.rng.choice(self.tgs)
+        detach = tg in groups and len(groups) > 1
+        if detach:
+            groups.remove(tg)
+        elif tg not in groups:
+            groups.append(tg)
+        return [(t, self._address(issi)),
+                (t + 0.001, f"DEBUG [entities/mm] mm_bs.rs:254: <- UAttachDetachGroupIdentity {{ group_identity_report: "
+                            f"false, group_identity_uplink: Some([{self._group_blocks([tg], detach)}]), proprietary: None }}")]
+
+    def _energy(self, t):
+        issi = self.rng.choice(self.locals)
+        mode = self.rng.choice(["Eg1", "Eg2", "Eg3", "StayAlive"])
+        return [(t, f"MS {issi} energy saving mode change response: {mode}")]
+
+    def _noise(self, t):
+        line = self.rng.choice(GEN_NOISE).format(slot=self.rng.randint(1, 4), n=self.rng.randint(0, 17),
+                                                 m=self.rng.randint(0, 59))
+        return [(t, line)]
+
+    def registration(self, issi):
+        """ULocationUpdateDemand attaching `issi` to its groups (after its address line)."""
+        return ("DEBUG [entities/mm] mm_bs.rs:76: <- ULocationUpdateDemand { location_update_type: ItsiAttach, "
+                "request_to_append_la: false, energy_saving_mode: Some(Eg1), ssi: None, "
+                "group_identity_location_demand: Some(GroupIdentityLocationDemand { group_identity_attach_detach_mode: 1, "
+                f"group_identity_uplink: Some([{self._group_blocks(self._groups[issi])}]) }}), proprietary: None }}")
+
+    def lines(self, rate, start=None):
+        """Endless (log time, message) stream at `rate` lines/s, starting with every local radio registering."""
+        t = time.time() if start is None else start
+        step = 1.0 / rate
+        pending = []  # heap of (time, seq, message) from actions already started
+        for issi in self.locals:
+            for at, msg in ((t, self._address(issi)), (t, self.registration(issi))):
+                heapq.heappush(pending, (at, self._next(), msg))
+        actions = {kind: getattr(self, f"_{kind}") for kind in self._kinds}
+        while True:
+            if not pending or pending[0][0] > t:
+                kind = self.rng.choices(self._kinds, cum_weights=self._kind_weights)[0]
+                for at, msg in actions[kind](t):
+                    heapq.heappush(pending, (at, self._next(), msg))
+            _, _, msg = heapq.heappop(pending)
+            yield t, msg
+            t += step
+
+    @staticmethod
+    def journal(ts, msg, seq):
+        """One journal-export JSON line, as journalctl -o json would print it."""
+        return json.dumps({"MESSAGE": msg, "__REALTIME_TIMESTAMP": str(int(ts * 1000000)),
+                           "__CURSOR": f"s=gen;i={seq:x}"})
+
+
+def run_generator_mode(hub, commands, gen, rate):
+    """Feed a TrafficGenerator into the primary monitor in real time."""
+    mon = hub.primary
+    mon.callsign_cache.update(gen.callsigns)
+    hub.emit_full_state()
+    stream = gen.lines(rate)
+    seq = 0
+    ts, msg = next(stream)
+    while True:
+        deadline = time.time() + 0.05
+        while ts <= deadline:
+            seq += 1
+            mon.process_line(gen.journal(ts, msg, seq))
+            ts, msg = next(stream)
+        while (remaining := deadline - time.time()) > 0:
+            for cmd in commands.poll(remaining):
+                hub.handle_command(cmd)
+        hub.tick()
+
+
+def start_sources(hub, sources):
+    for src in sources:
+        src.start(hub.monitors[src.station].journal_cursor if hub.seeded else None)
+    if hub.seeded:
+        # The relay already holds this state; no full_state, no resync of its clients.
+        emit("resumed", {"terminals": sum(len(m.terminals) for m in hub.monitors.values()),
+                         "openCalls": sum(len(m.open_calls) for m in hub.monitors.values()),
+                         "cursor": any(m.journal_cursor for m in hub.monitors.values())})
+    else:
+        hub.emit_full_state()
 
-def main():
-    mon = TetraMonitor()
 
-    use_journal = True
+def run_sources(hub, sources, commands):
+    """Read every configured source concurrently and feed each line to its station."""
+    # SystemExit runs the finally below, so the relay's SIGTERM still saves the heatmap.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    start_sources(hub, sources)
+    polled = [src for src in sources if not src.selectable]
     try:
-        result = subprocess.run(["which", "journalctl"], capture_output=True, text=True)
-        if result.returncode != 0:
-            use_journal = False
-    except Exception:
-        use_journal = False
+        while True:
+            by_fd = {src.fileno(): src for src in sources if src.selectable and src.fileno() is not None}
+            watch = list(by_fd) + ([] if commands.fd is None else [commands.fd])
+            r, _, _ = select.select(watch, [], [], 0.25)
+            if commands.fd is not None and commands.fd in r:
+                for cmd in commands.read_ready():
+                    hub.handle_command(cmd)
+            ready = [by_fd[fd] for fd in r if fd in by_fd] + polled
+            for src in ready:
+                lines = src.read_lines()
+                if lines is None:
+                    return  # journalctl exited; the relay restarts us
+                if hub.capture:
+                    hub.capture.add(src.station, lines)
+                mon = hub.monitors[src.station]
+                for line in lines:
+                    mon.process_line(line)
+            hub.tick()
+    finally:
+        if hub.capture:
+            hub.capture.close()
+        hub.heatmap.close()
+
+
+# ── asyncio run loop (TETRA_ASYNCIO=1) ──────────────────────────────────────
+# Same sources, commands and hub as run_sources, but every input is a reader
+# callback and everything periodic is its own task: a slow callsign lookup or
+# a relay that stops reading stdout no longer holds up the next journal line.
+# New periodic work is one more every() task.
+
+class StdoutWriter:
+    """
+    Non-blocking stdout: events are buffered and flushed once per loop turn, or
+    when the pipe drains. Urgent lines skip the wait: they are inserted ahead of
+    every buffered line not yet started and flushed right away, but never ahead
+    of a fence (a buffered full_state sequence, which would replace them).
+    """
+
+    def __init__(self, loop, fd):
+        self.loop = loop
+        self.fd = fd
+        self.buf = bytearray()
+        self.head = 0  # leading bytes of buf that stay first: a partly written line or fenced lines, then urgent lines
+        self.scheduled = False
+        self.waiting = False  # add_writer registered: the pipe was full
+        os.set_blocking(fd, False)
+
+    def write(self, text, urgent=False):
+        if urgent:
+            data = text.encode()
+            self.buf[self.head:self.head] = data
+            self.head += len(data)
+            if not self.waiting:
+                self.flush()
+            return
+        self.buf += text.encode()
+        if not self.scheduled and not self.waiting:
+            self.scheduled = True
+            self.loop.call_soon(self.flush)
+
+    def fence(self):
+        """Keep every line buffered so far ahead of later urgent lines."""
+        self.head = len(self.buf)
+
+    def flush(self):
+        self.scheduled = False
+        try:
+            n = os.write(self.fd, self.buf)
+        except BlockingIOError:
+            n = 0
+        if n:
+            partial = self.buf[n - 1] != 0x0A
+            del self.buf[:n]
+            self.head = max(0, self.head - n)
+            if partial:
+                self.head = max(self.head, self.buf.index(b"\n") + 1)
+        if self.buf and not self.waiting:
+            self.waiting = True
+            self.loop.add_writer(self.fd, self.flush)
+        elif not self.buf and self.waiting:
+            self.waiting = False
+            self.loop.remove_writer(self.fd)
+
+    def close(self):
+        if self.waiting:
+            self.loop.remove_writer(self.fd)
+        os.set_blocking(self.fd, True)
+        if self.buf:
+            os.write(self.fd, self.buf)
+            self.buf.clear()
+
+
+class CallsignResolver:
+    """radioid.net lookups off the loop; the answer is cached and pushed as update_terminal."""
+
+    def __init__(self, hub, loop, concurrency=4):
+        self.hub = hub
+        self.loop = loop
+        self.pending = set()
+        self.limit = asyncio.Semaphore(concurrency)
+
+    def lookup(self, issi):
+        if issi not in self.pending:
+            self.pending.add(issi)
+            self.loop.create_task(self._resolve(issi))
+
+    async def _resolve(self, issi):
+        async with self.limit:
+            # requests has no async API; the blocking call runs in the default executor.
+            started = time.monotonic()
+            call = await self.loop.run_in_executor(None, fetch_callsign, issi)
+            counters.observe_radioid(time.monotonic() - started)
+        self.pending.discard(issi)
+        for mon in self.hub.monitors.values():
+            mon.callsign_cache[issi] = call
+            if call and issi in mon.terminals:
+                mon._emit("update_terminal", mon._terminal_to_dict(issi))
+
+
+async def every(interval, fn, *args):
+    """Call fn(*args) every interval seconds until cancelled."""
+    while True:
+        fn(*args)
+        await asyncio.sleep(interval)
 
-    if os.environ.get("TETRA_DEMO", "0") == "1":
-        use_journal = False
 
-    emit("status", {"mode": "journal" if use_journal else "demo"})
+async def run_sources_async(hub, sources, commands):
+    """asyncio variant of run_sources."""
+    global _writer
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
 
-    if use_journal:
-        run_journal_mode(mon)
+    def stop(*_):
+        if not done.done():
+            done.set_result(None)
+
+    _writer = StdoutWriter(loop, sys.stdout.fileno())
+    hub.resolver = CallsignResolver(hub, loop)
+    loop.add_signal_handler(signal.SIGTERM, stop)
+    start_sources(hub, sources)
+
+    def feed(src, fd=None):
+        lines = src.read_lines()
+        if lines is None:
+            stop()  # journalctl exited; the relay restarts us
+            return
+        if fd is not None and not lines:
+            # Nothing read: a FIFO may just have been reopened under a new (or reused) fd.
+            loop.remove_reader(fd)
+            watch(src)
+        if hub.capture:
+            hub.capture.add(src.station, lines)
+        mon = hub.monitors[src.station]
+        for line in lines:
+            mon.process_line(line)
+
+    def watch(src):
+        fd = src.fileno()
+        if fd is not None:
+            loop.add_reader(fd, feed, src, fd)
+
+    def on_commands():
+        if commands.fd is None:
+            return
+        for cmd in commands.read_ready():
+            hub.handle_command(cmd)
+        if commands.fd is None:
+            loop.remove_reader(cmd_fd)
+
+    tasks = [loop.create_task(every(0.25, hub.tick))]
+    for src in sources:
+        if src.selectable:
+            watch(src)
+        else:
+            tasks.append(loop.create_task(every(0.25, feed, src)))
+    cmd_fd = commands.fd
+    if cmd_fd is not None:
+        try:
+            loop.add_reader(cmd_fd, on_commands)
+        except PermissionError:
+            # stdin is a regular file (e.g. /dev/null), which epoll refuses; poll it.
+            tasks.append(loop.create_task(every(0.25, on_commands)))
+
+    try:
+        await done
+    finally:
+        for task in tasks:
+            task.cancel()
+        if hub.capture:
+            hub.capture.close()
+        hub.heatmap.close()
+        _writer.close()
+        _writer = None
+
+
+def wait_for_seed(hub, commands, timeout=SEED_TIMEOUT):
+    """Apply commands until the relay's "seed" arrives (or timeout); cold start otherwise."""
+    deadline = time.time() + timeout
+    while not hub.seeded and commands.fd is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        for cmd in commands.poll(remaining):
+            hub.handle_command(cmd)
+
+
+def main():
+    sources = parse_sources(os.environ.get("TETRA_SOURCES", ""))
+    hub = StationHub([src.station for src in sources] or [None])
+    commands = CommandReader()
+    # Set by the relay when it restarts us and will send its state first.
+    if os.environ.get("TETRA_SEED", "0") == "1":
+        wait_for_seed(hub, commands)
+
+    live = True
+    if not sources:
+        # Default: one unnamed station fed by the whole journal.
+        sources = [JournalSource(None, None)]
+        try:
+            result = subprocess.run(["which", "journalctl"], capture_output=True, text=True)
+            if result.returncode != 0:
+                live = False
+        except Exception:
+            live = False
+
+    generate = os.environ.get("TETRA_GENERATE", "0") == "1"
+    if os.environ.get("TETRA_DEMO", "0") == "1" or generate:
+        live = False
+
+    if live and CAPTURE_DIR:
+        hub.capture = CaptureTap(CAPTURE_DIR, CAPTURE_MAX_BYTES, CAPTURE_FILES, CAPTURE_TRIGGER)
+    if live and HEATMAP_FILE:
+        hub.heatmap.open(HEATMAP_FILE)
+
+    mode = "journal" if live else "generate" if generate else "demo"
+    emit("status", {"mode": mode, "stations": hub.station_names})
+
+    if live and os.environ.get("TETRA_ASYNCIO", "0") == "1":
+        asyncio.run(run_sources_async(hub, sources, commands))
+    elif live:
+        run_sources(hub, sources, commands)
+    elif generate:
+        gen = TrafficGenerator(
+            terminals=int(os.environ.get("TETRA_GEN_TERMINALS", "500")),
+            seed=int(os.environ.get("TETRA_GEN_SEED", "1")),
+            mix=parse_gen_mix(os.environ.get("TETRA_GEN_MIX", "")),
+        )
+        run_generator_mode(hub, commands, gen, float(os.environ.get("TETRA_GEN_RATE", "50")))
     else:
-        run_demo_mode(mon)
+        run_demo_mode(hub, commands)
 
 
 if __name__ == "__main__":